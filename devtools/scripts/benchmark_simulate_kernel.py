@@ -0,0 +1,66 @@
+"""
+Benchmark of the fast simulation path of system.simulate (kernel=True) against the default object path.
+Reports the integration steps per second of both paths and checks, that they give the same trajectory.
+
+    python devtools/scripts/benchmark_simulate_kernel.py --steps 20000 --save_every_state 1 10
+"""
+import argparse
+import time
+
+import numpy as np
+
+from ensembler.conditions.box_conditions import periodicBoundaryCondition
+from ensembler.potentials import OneD
+from ensembler.samplers import newtonian, stochastic
+from ensembler.system.basic_system import system
+
+samplers = {"velocityVerlet": newtonian.velocityVerletIntegrator,
+            "positionVerlet": newtonian.positionVerletIntegrator,
+            "leapFrog": newtonian.leapFrogIntegrator,
+            "langevin": stochastic.langevinIntegrator,
+            "langevinVelocity": stochastic.langevinVelocityIntegrator,
+            "metropolisMonteCarlo": stochastic.metropolisMonteCarloIntegrator}
+
+potentials = {"harmonicOscillator": OneD.harmonicOscillatorPotential,
+              "doubleWell": OneD.doubleWellPotential}
+
+
+def run(sampler: str, potential: str, steps: int, save_every_state: int, periodic: bool, kernel: bool):
+    np.random.seed(42)
+    conditions = [periodicBoundaryCondition(boundary=[-2, 2])] if (periodic) else []
+    sys = system(potential=potentials[potential](), sampler=samplers[sampler](), conditions=conditions,
+                 start_position=0.5, verbose=False)
+
+    start = time.perf_counter()
+    sys.simulate(steps=steps, save_every_state=save_every_state, verbosity=False, kernel=kernel)
+    return steps / (time.perf_counter() - start), sys.trajectory
+
+
+parser = argparse.ArgumentParser(description="Benchmark system.simulate with and without kernel=True.")
+parser.add_argument("--steps", type=int, default=20000, help="integration steps per simulation")
+parser.add_argument("--save_every_state", type=int, nargs="+", default=[1, 10], help="saving frequencies")
+parser.add_argument("--samplers", nargs="+", default=list(samplers), choices=list(samplers))
+parser.add_argument("--potentials", nargs="+", default=list(potentials), choices=list(potentials))
+parser.add_argument("--periodic", action="store_true", help="add a periodic boundary condition")
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    print("{:<22}{:<20}{:>6}{:>14}{:>14}{:>9}{:>11}".format("sampler", "potential", "save", "object [1/s]",
+                                                           "kernel [1/s]", "speedup", "identical"))
+    for sampler in args.samplers:
+        for potential in args.potentials:
+            for save_every_state in args.save_every_state:
+                object_speed, object_trajectory = run(sampler, potential, args.steps, save_every_state,
+                                                      args.periodic, kernel=False)
+                kernel_speed, kernel_trajectory = run(sampler, potential, args.steps, save_every_state,
+                                                      args.periodic, kernel=True)
+                identical = all(np.array_equal(np.array(object_trajectory[column].tolist(), dtype=float),
+                                               np.array(kernel_trajectory[column].tolist(), dtype=float),
+                                               equal_nan=True) for column in object_trajectory.columns)
+
+                print("{:<22}{:<20}{:>6}{:>14.0f}{:>14.0f}{:>9.1f}{:>11}".format(sampler, potential,
+                                                                                 save_every_state, object_speed,
+                                                                                 kernel_speed,
+                                                                                 kernel_speed / object_speed,
+                                                                                 str(identical)))
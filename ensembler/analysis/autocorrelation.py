@@ -0,0 +1,196 @@
+"""
+Autocorrelation:
+    This module contains functions to analyse correlated time series (e.g. energies of a trajectory).
+    Autocorrelation functions are calculated via FFT in O(n log n), from which the integrated autocorrelation time and
+    the statistical inefficiency g are derived. g is used to detect the equilibrated part of a time series and to
+    subsample uncorrelated frames.
+
+    See Chodera, J. D. J. Chem. Theory Comput. 2016, 12, 1799-1805. doi:10.1021/acs.jctc.5b00784
+"""
+import numpy as np
+
+from ensembler.util.ensemblerTypes import Iterable, Number, Tuple
+
+
+def autocorrelation_function(x: Iterable[Number], y: Iterable[Number] = None, normalize: bool = True) -> np.array:
+    """
+        autocorrelation_function
+            calculates the (cross-)correlation function C(t) = <dx(0) dy(t)> of the time series for all lag times t,
+            via FFT. Each lag time is averaged over all n-t available pairs.
+
+    Parameters
+    ----------
+    x: Iterable[Number]
+        time series
+    y: Iterable[Number], optional
+        second time series for the cross-correlation function (default: None - autocorrelation of x)
+    normalize: bool, optional
+        divide by C(0), such that C(0)=1 (default: True)
+
+    Returns
+    -------
+    np.array
+        correlation function for the lag times 0..n-1
+    """
+    x = np.array(x, dtype=float, ndmin=1)
+    n = len(x)
+    dx = x - np.mean(x)
+    if (y is None):
+        dy = dx
+    else:
+        y = np.array(y, dtype=float, ndmin=1)
+        if (len(y) != n):
+            raise ValueError("autocorrelation_function: x and y need the same length. Got " + str(n) + " and " + str(
+                len(y)))
+        dy = y - np.mean(y)
+
+    # zero padding to avoid the circular correlation
+    size = 2 ** int(np.ceil(np.log2(2 * n)))
+    fft_x = np.fft.rfft(dx, size)
+    fft_y = fft_x if (y is None) else np.fft.rfft(dy, size)
+    correlation = np.fft.irfft(np.conjugate(fft_x) * fft_y, size)[:n] / (n - np.arange(n))
+
+    if (normalize):
+        if (correlation[0] == 0):  # constant time series
+            return np.ones(n)
+        correlation /= correlation[0]
+    return correlation
+
+
+def integrated_autocorrelation_time(x: Iterable[Number], y: Iterable[Number] = None, mintime: int = 3) -> float:
+    """
+        integrated_autocorrelation_time
+            calculates the integrated autocorrelation time tau = sum_t (1-t/n) C(t).
+            The sum is truncated at the first lag time t >= mintime, at which C(t) is not positive anymore.
+
+    Parameters
+    ----------
+    x: Iterable[Number]
+        time series
+    y: Iterable[Number], optional
+        second time series for the cross-correlation (default: None)
+    mintime: int, optional
+        minimal lag time, before the sum can be truncated (default: 3)
+
+    Returns
+    -------
+    float
+        integrated autocorrelation time in units of frames
+    """
+    correlation = autocorrelation_function(x, y)[1:]
+    n = len(correlation) + 1
+    if (n < 2):
+        return 0.0
+
+    t = np.arange(1, n)
+    stop_criterion = (correlation <= 0) & (t >= mintime)
+    stop = np.argmax(stop_criterion) if (np.any(stop_criterion)) else len(correlation)
+
+    return float(np.sum((1 - t[:stop] / n) * correlation[:stop]))
+
+
+def statistical_inefficiency(x: Iterable[Number], y: Iterable[Number] = None, mintime: int = 3) -> float:
+    """
+        statistical_inefficiency
+            calculates the statistical inefficiency g = 1 + 2 tau of a time series. n/g is the number of
+            effectively uncorrelated samples.
+
+    Parameters
+    ----------
+    x: Iterable[Number]
+        time series
+    y: Iterable[Number], optional
+        second time series for the cross-correlation (default: None)
+    mintime: int, optional
+        minimal lag time, before the autocorrelation sum can be truncated (default: 3)
+
+    Returns
+    -------
+    float
+        statistical inefficiency g >= 1
+    """
+    return max(1.0, 1 + 2 * integrated_autocorrelation_time(x, y, mintime=mintime))
+
+
+def detect_equilibration(x: Iterable[Number], nskip: int = None, mintime: int = 3) -> Tuple[int, float, float]:
+    """
+        detect_equilibration
+            detects the start of the equilibrated part of a time series, by maximizing the number of effectively
+            uncorrelated samples (n-t0)/g(t0) over the tested starting frames t0.
+            Each tested frame needs one FFT of x[t0:], so the cost is O(n/nskip * n log n). The default grid of about
+            100 starting frames keeps this at O(n log n), nskip=1 tests all frames in O(n^2 log n).
+
+    Parameters
+    ----------
+    x: Iterable[Number]
+        time series
+    nskip: int, optional
+        only every nskip-th frame is tested as start of the equilibrated region (default: None - max(1, n // 100))
+    mintime: int, optional
+        minimal lag time, before the autocorrelation sum can be truncated (default: 3)
+
+    Returns
+    -------
+    Tuple[int, float, float]
+        first equilibrated frame t0, statistical inefficiency g of x[t0:], effective number of samples in x[t0:]
+    """
+    x = np.array(x, dtype=float, ndmin=1)
+    if (len(x) < 2):
+        return 0, 1.0, float(len(x))
+
+    if (nskip is None):
+        nskip = max(1, len(x) // 100)
+    start_frames = np.arange(0, len(x) - 1, nskip)
+    g = np.array([statistical_inefficiency(x[t0:], mintime=mintime) for t0 in start_frames])
+    effective_samples = (len(x) - start_frames) / g
+
+    best = int(np.argmax(effective_samples))
+    return int(start_frames[best]), float(g[best]), float(effective_samples[best])
+
+
+def subsample_indices(n_samples: int, g: float) -> np.array:
+    """
+        subsample_indices
+            indices of n_samples frames, that are (approximately) g frames apart.
+
+    Parameters
+    ----------
+    n_samples: int
+        number of frames
+    g: float
+        statistical inefficiency
+
+    Returns
+    -------
+    np.array
+        indices of the uncorrelated frames
+    """
+    if (g < 1):
+        raise ValueError("subsample_indices: the statistical inefficiency needs to be >= 1. Got " + str(g))
+    indices = np.unique(np.floor(np.arange(0, n_samples / g) * g + 0.5).astype(int))
+    return indices[indices < n_samples]
+
+
+def subsample_correlated_data(x: Iterable[Number], g: float = None, mintime: int = 3) -> np.array:
+    """
+        subsample_correlated_data
+            indices of effectively uncorrelated frames of a time series.
+
+    Parameters
+    ----------
+    x: Iterable[Number]
+        time series
+    g: float, optional
+        statistical inefficiency (default: None - it is calculated from x)
+    mintime: int, optional
+        minimal lag time, before the autocorrelation sum can be truncated (default: 3)
+
+    Returns
+    -------
+    np.array
+        indices of the uncorrelated frames
+    """
+    x = np.array(x, dtype=float, ndmin=1)
+    if (g is None):
+        g = statistical_inefficiency(x, mintime=mintime)
+    return subsample_indices(len(x), g)
@@ -0,0 +1,137 @@
+"""
+Convergence:
+    This module calculates convergence curves of free energy estimates in a single pass over the samples.
+    The estimate is calculated at checkpoints for growing fractions of the samples, either from the start of the
+    trajectories (forward) or from their end (backward).
+
+    Zwanzig type estimators use running log-sum-exp accumulators, BAR and MBAR start their solvers from the result of
+    the previous checkpoint.
+"""
+import numpy as np
+import pandas as pd
+
+from ensembler.analysis.freeEnergyCalculation import zwanzigEquation, threeStateZwanzig, bennetAcceptanceRatio, \
+    multistateEnvelopingDistributionSampling
+from ensembler.util.ensemblerTypes import Tuple, Iterable, Number
+
+
+class convergenceAnalysis:
+    """
+    This class calculates the convergence curves of a free energy estimator of
+    ensembler.analysis.freeEnergyCalculation. The result is a tidy pd.DataFrame with one row per direction and
+    checkpoint (and state for multistate estimators), that can be directly plotted.
+    """
+    directions: Tuple[str] = ("forward", "backward")
+
+    def __init__(self, estimator, n_checkpoints: int = 20, directions: Iterable[str] = ("forward", "backward")):
+        """
+        __init__
+
+        Parameters
+        ----------
+        estimator: _FreeEnergyCalculator
+            a free energy estimator of ensembler.analysis.freeEnergyCalculation (e.g. zwanzigEquation(kT=True))
+        n_checkpoints: int, optional
+            number of equally spaced checkpoints (default: 20)
+        directions: Iterable[str], optional
+            "forward": growing fractions from the start of the samples, "backward": from the end of the samples.
+            (default: ("forward", "backward"))
+        """
+        if (any(direction not in self.__class__.directions for direction in directions)):
+            raise ValueError("convergenceAnalysis: directions can only be " + str(self.__class__.directions) +
+                             ". Got: " + str(directions))
+        if (n_checkpoints < 1):
+            raise ValueError("convergenceAnalysis: needs at least one checkpoint. Got: " + str(n_checkpoints))
+
+        self.estimator = estimator
+        self.n_checkpoints = n_checkpoints
+        self.directions = tuple(directions)
+
+    def _checkpoint_sizes(self, n_samples: int) -> np.array:
+        fractions = np.linspace(0, 1, self.n_checkpoints + 1)[1:]
+        return np.maximum(1, np.round(fractions * n_samples).astype(int))
+
+    @staticmethod
+    def _select(n_samples: int, n_selected: int, direction: str) -> slice:
+        return slice(0, n_selected) if (direction == "forward") else slice(n_samples - n_selected, n_samples)
+
+    def _running_zwanzig(self, Vi: np.array, Vj: np.array, direction: str) -> np.array:
+        """
+        Zwanzig estimates at all checkpoints from one running log-sum-exp accumulator.
+        """
+        beta = 1 / (self.estimator.constants[self.estimator.k] * self.estimator.constants[self.estimator.T])
+        dV = -beta * (Vj - np.reshape(Vi, (len(Vi),) + (1,) * (Vj.ndim - 1)))
+        if (direction == "backward"):
+            dV = dV[::-1]
+        accumulated = np.logaddexp.accumulate(dV, axis=0)
+
+        sizes = self._checkpoint_sizes(len(dV))
+        return -(accumulated[sizes - 1] - np.log(sizes).reshape((-1,) + (1,) * (dV.ndim - 1))) / beta
+
+    def calculate(self, **energies: Iterable[Number]) -> pd.DataFrame:
+        """
+            calculate
+                calculates the convergence curves. The energies are passed with the argument names of the estimators
+                calculate method (e.g. Vi=..., Vj=... for zwanzigEquation or V_kn=..., N_k=... for
+                multistateBennetAcceptanceRatio).
+
+        Returns
+        -------
+        pd.DataFrame
+            columns: direction, fraction, n_samples, (state), dF, ddF (NaN, if the estimator provides no error)
+        """
+        energies, groups = self.estimator.group_energies(energies)
+        fractions = np.linspace(0, 1, self.n_checkpoints + 1)[1:]
+        group_sizes = [self._checkpoint_sizes(n_samples) for _, n_samples in groups]
+        n_samples = np.sum(group_sizes, axis=0)
+
+        rows = []
+        for direction in self.directions:
+            if (isinstance(self.estimator, multistateEnvelopingDistributionSampling)):
+                dF = self._running_zwanzig(energies["Vr"], np.reshape(energies["V_is"], (len(energies["Vr"]), -1)),
+                                           direction)
+                rows.extend((direction, fraction, n, state, dF_t[state], np.nan)
+                            for fraction, n, dF_t in zip(fractions, n_samples, dF) for state in range(len(dF_t)))
+
+            elif (isinstance(self.estimator, threeStateZwanzig)):
+                dF = self._running_zwanzig(energies["Vr"], energies["Vj"], direction) - \
+                     self._running_zwanzig(energies["Vr"], energies["Vi"], direction)
+                rows.extend((direction, fraction, n, dF_t, np.nan)
+                            for fraction, n, dF_t in zip(fractions, n_samples, dF))
+
+            elif (isinstance(self.estimator, zwanzigEquation)):
+                dF = self._running_zwanzig(energies["Vi"], energies["Vj"], direction)
+                rows.extend((direction, fraction, n, dF_t, np.nan)
+                            for fraction, n, dF_t in zip(fractions, n_samples, dF))
+
+            elif ("N_k" in energies):
+                dF = None  # the result of the previous checkpoint is the initial guess of the next one
+                for checkpoint, fraction in enumerate(fractions):
+                    columns = np.concatenate([np.arange(offset, offset + n_group)[
+                                                  self._select(n_group, sizes[checkpoint], direction)]
+                                              for (offset, n_group), sizes in zip(groups, group_sizes)])
+                    N_k = np.zeros(len(energies["N_k"]), dtype=int)
+                    N_k[energies["N_k"] > 0] = [sizes[checkpoint] for sizes in group_sizes]
+                    dF, ddF = self.estimator.calculate_with_error(V_kn=energies["V_kn"][:, columns], N_k=N_k,
+                                                                  initial_guess=dF)
+                    rows.extend((direction, fraction, n_samples[checkpoint], state, dF[state], ddF[state])
+                                for state in range(len(dF)))
+
+            else:
+                dF = None  # the result of the previous checkpoint is the initial guess of the next one
+                for checkpoint, fraction in enumerate(fractions):
+                    selected = {}
+                    for (names, n_group), sizes in zip(groups, group_sizes):
+                        selection = self._select(n_group, sizes[checkpoint], direction)
+                        selected.update({name: energies[name][selection] for name in names})
+
+                    if (isinstance(self.estimator, bennetAcceptanceRatio)):
+                        dF, ddF = self.estimator.calculate_with_error(**selected, initial_guess=dF)
+                    else:
+                        dF, ddF = self.estimator.calculate(**selected), np.nan
+                    rows.append((direction, fraction, n_samples[checkpoint], dF, ddF))
+
+        columns = ["direction", "fraction", "n_samples", "dF", "ddF"]
+        if ("N_k" in energies or isinstance(self.estimator, multistateEnvelopingDistributionSampling)):
+            columns.insert(3, "state")
+        return pd.DataFrame(rows, columns=columns)
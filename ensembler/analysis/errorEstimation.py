@@ -0,0 +1,223 @@
+"""
+Error Estimation:
+    This module estimates the statistical uncertainty of any free energy estimator in
+    ensembler.analysis.freeEnergyCalculation by resampling.
+
+    bootstrap:      (moving-block) bootstrap - the index sets of many resamples are drawn as one vectorized array.
+    blockAveraging: the samples are split into contiguous blocks, that are evaluated independently.
+
+    The resamples can be evaluated in parallel by a process pool.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ensembler.util.ensemblerTypes import Union, List, Tuple, Iterable, Dict, Number
+
+# context shared with the worker processes (set by the pool initializer)
+_worker_context: dict = None
+
+
+def _initialize_worker(context: dict):
+    global _worker_context
+    _worker_context = context
+
+
+def _bootstrap_batch_worker(seed: int, n_resamples: int) -> np.array:
+    return _bootstrap_batch(_worker_context, seed, n_resamples)
+
+
+def _block_worker(block: int) -> np.array:
+    return _evaluate_block(_worker_context, block)
+
+
+def _resample(context: dict, group_indices: List[np.array]) -> float:
+    """
+    evaluates the estimator on the samples selected by the indices of each sample group.
+    """
+    energies = context["energies"]
+    groups = context["groups"]
+
+    if ("N_k" in energies):  # multistate estimator: the groups are the column blocks of V_kn
+        columns = np.concatenate([offset + indices for (offset, _), indices in zip(groups, group_indices)])
+        N_k = np.zeros(len(energies["N_k"]), dtype=int)
+        N_k[np.array(energies["N_k"]) > 0] = [len(indices) for indices in group_indices]
+        return context["estimator"].calculate(V_kn=energies["V_kn"][:, columns], N_k=N_k)
+    else:
+        resampled = {}
+        for (names, _), indices in zip(groups, group_indices):
+            resampled.update({name: energies[name][indices] for name in names})
+        return context["estimator"].calculate(**resampled)
+
+
+def _draw_indices(generator: np.random.Generator, n_resamples: int, n_samples: int, block_length: int) -> np.array:
+    """
+    draws the (moving-block) bootstrap index sets of n_resamples resamples as one array of shape (n_resamples, n_samples).
+    """
+    if (block_length <= 1):
+        return generator.integers(0, n_samples, size=(n_resamples, n_samples))
+
+    block_length = min(block_length, n_samples)
+    n_blocks = int(np.ceil(n_samples / block_length))
+    starts = generator.integers(0, n_samples - block_length + 1, size=(n_resamples, n_blocks))
+    indices = starts[:, :, None] + np.arange(block_length)[None, None, :]
+    return indices.reshape(n_resamples, -1)[:, :n_samples]
+
+
+def _bootstrap_batch(context: dict, seed: int, n_resamples: int) -> np.array:
+    generator = np.random.default_rng(seed)
+    group_indices = [_draw_indices(generator, n_resamples, n_samples, context["block_length"])
+                     for _, n_samples in context["groups"]]
+    return np.array([_resample(context, [indices[resample] for indices in group_indices])
+                     for resample in range(n_resamples)], dtype=float)
+
+
+def _evaluate_block(context: dict, block: int) -> np.array:
+    group_indices = []
+    for _, n_samples in context["groups"]:
+        bounds = np.linspace(0, n_samples, context["n_blocks"] + 1).astype(int)
+        group_indices.append(np.arange(bounds[block], bounds[block + 1]))
+    return np.array(_resample(context, group_indices), dtype=float)
+
+
+class _resamplingErrorEstimator:
+    """
+    base class of the resampling error estimators. It wraps a free energy estimator and organizes the given energies
+    into groups of arrays, that share the same samples and are therefore resampled together.
+    """
+
+    def __init__(self, estimator, n_processes: int = 1):
+        """
+        __init__
+
+        Parameters
+        ----------
+        estimator: _FreeEnergyCalculator
+            a free energy estimator of ensembler.analysis.freeEnergyCalculation (e.g. zwanzigEquation(kT=True))
+        n_processes: int, optional
+            number of processes evaluating the resamples in parallel. (default: 1 - serial evaluation)
+        """
+        self.estimator = estimator
+        self.n_processes = n_processes
+
+    def _build_context(self, energies: Dict[str, Iterable[Number]]) -> dict:
+        energies, groups = self.estimator.group_energies(energies)
+        return {"estimator": self.estimator, "energies": energies, "groups": groups}
+
+    def _map(self, context: dict, function, worker, *arguments) -> List[np.array]:
+        """
+        evaluates function(context, *argument) for all arguments, serial or with the process pool.
+        """
+        if (self.n_processes > 1):
+            with ProcessPoolExecutor(max_workers=self.n_processes, initializer=_initialize_worker,
+                                     initargs=(context,)) as executor:
+                return list(executor.map(worker, *arguments))
+        else:
+            return [function(context, *argument) for argument in zip(*arguments)]
+
+
+class bootstrap(_resamplingErrorEstimator):
+    """
+    This class estimates the uncertainty of a free energy estimator with the bootstrap method.
+    For correlated samples, the moving-block bootstrap draws blocks of block_length consecutive samples.
+    """
+
+    def __init__(self, estimator, n_bootstraps: int = 1000, block_length: int = 1, n_processes: int = 1,
+                 seed: int = None):
+        """
+        __init__
+
+        Parameters
+        ----------
+        estimator: _FreeEnergyCalculator
+            a free energy estimator of ensembler.analysis.freeEnergyCalculation (e.g. bennetAcceptanceRatio(kT=True))
+        n_bootstraps: int, optional
+            number of bootstrap resamples (default: 1000)
+        block_length: int, optional
+            length of the blocks for the moving-block bootstrap, 1 is the standard bootstrap (default: 1)
+        n_processes: int, optional
+            number of processes evaluating the resamples in parallel. (default: 1 - serial evaluation)
+        seed: int, optional
+            seed of the random number generation (default: None - random)
+        """
+        super().__init__(estimator=estimator, n_processes=n_processes)
+        self.n_bootstraps = n_bootstraps
+        self.block_length = block_length
+        self.seed = seed
+
+    def calculate(self, **energies: Iterable[Number]) -> Tuple[Union[float, np.array], Union[float, np.array]]:
+        """
+            calculate
+                calculates the estimate of all samples and its bootstrap standard error.
+                The energies are passed with the argument names of the estimators calculate method
+                (e.g. Vi=..., Vj=... for zwanzigEquation or V_kn=..., N_k=... for multistateBennetAcceptanceRatio).
+                The bootstrap estimates are stored in bootstrap_estimates.
+
+        Returns
+        -------
+        Tuple[Union[float, np.array], Union[float, np.array]]
+            estimate, standard error
+        """
+        context = self._build_context(energies)
+        context["block_length"] = self.block_length
+
+        # batches of resamples with independent seeds, each drawn as one index array of bounded size.
+        # The batches do not depend on n_processes, so a seed gives the same result in serial and parallel.
+        max_samples = max(n_samples for _, n_samples in context["groups"])
+        batch_size = max(1, min(64, 2 ** 24 // max_samples))
+        batch_sizes = [min(batch_size, self.n_bootstraps - start) for start in range(0, self.n_bootstraps, batch_size)]
+        seeds = [int(child.generate_state(1)[0]) for child in
+                 np.random.SeedSequence(self.seed).spawn(len(batch_sizes))]
+
+        batches = self._map(context, _bootstrap_batch, _bootstrap_batch_worker, seeds, batch_sizes)
+        self.bootstrap_estimates = np.concatenate(batches)
+
+        estimate = self.estimator.calculate(**context["energies"])
+        return estimate, np.std(self.bootstrap_estimates, axis=0, ddof=1)
+
+
+class blockAveraging(_resamplingErrorEstimator):
+    """
+    This class estimates the uncertainty of a free energy estimator by block averaging.
+    The samples are split into n_blocks contiguous blocks, each block is evaluated independently and the standard
+    error is derived from the spread of the block estimates.
+    """
+
+    def __init__(self, estimator, n_blocks: int = 10, n_processes: int = 1):
+        """
+        __init__
+
+        Parameters
+        ----------
+        estimator: _FreeEnergyCalculator
+            a free energy estimator of ensembler.analysis.freeEnergyCalculation (e.g. bennetAcceptanceRatio(kT=True))
+        n_blocks: int, optional
+            number of blocks (default: 10)
+        n_processes: int, optional
+            number of processes evaluating the blocks in parallel. (default: 1 - serial evaluation)
+        """
+        super().__init__(estimator=estimator, n_processes=n_processes)
+        if (n_blocks < 2):
+            raise ValueError("blockAveraging needs at least two blocks. Got: " + str(n_blocks))
+        self.n_blocks = n_blocks
+
+    def calculate(self, **energies: Iterable[Number]) -> Tuple[Union[float, np.array], Union[float, np.array]]:
+        """
+            calculate
+                calculates the estimate of all samples and its block averaging standard error.
+                The energies are passed with the argument names of the estimators calculate method
+                (e.g. Vi=..., Vj=... for zwanzigEquation or V_kn=..., N_k=... for multistateBennetAcceptanceRatio).
+                The estimates of the blocks are stored in block_estimates.
+
+        Returns
+        -------
+        Tuple[Union[float, np.array], Union[float, np.array]]
+            estimate, standard error
+        """
+        context = self._build_context(energies)
+        context["n_blocks"] = self.n_blocks
+
+        self.block_estimates = np.array(self._map(context, _evaluate_block, _block_worker, range(self.n_blocks)))
+
+        estimate = self.estimator.calculate(**context["energies"])
+        return estimate, np.std(self.block_estimates, axis=0, ddof=1) / np.sqrt(self.n_blocks)
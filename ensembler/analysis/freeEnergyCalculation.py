@@ -5,7 +5,7 @@ Free Energy Calculations:
 """
 # Generic Typing
 from numbers import Number
-from typing import Iterable
+from typing import Dict, Iterable, List, Tuple
 
 # Calculations
 import numpy as np
@@ -13,6 +13,8 @@ import sympy as sp
 import mpmath as mp
 from scipy import constants as const
 
+from ensembler.analysis.autocorrelation import subsample_correlated_data
+
 
 class _FreeEnergyCalculator:
     constants: dict
@@ -26,6 +28,9 @@ class _FreeEnergyCalculator:
     J_to_cal: float = 0.239005736
     k, T, Vi, Vj = sp.symbols("k T, Vi, Vj")
 
+    # names of the calculate arguments, that share the same samples (e.g. for resampling). None: all arguments.
+    _sample_groups: Tuple[Tuple[str]] = None
+
     def __init__(self):
         pass
 
@@ -41,12 +46,51 @@ class _FreeEnergyCalculator:
     def calculate(self, Vi: (Iterable[Number], Number), Vj: (Iterable[Number], Number)) -> float:
         raise NotImplementedError("This Function needs to be Implemented")
 
+    def group_energies(self, energies: Dict[str, Iterable[Number]]) -> Tuple[Dict[str, np.array], List[tuple]]:
+        """
+            group_energies
+                organizes the energies of a calculate call into groups of arrays, that share the same samples
+                (e.g. for resampling or convergence analysis).
+
+        Parameters
+        ----------
+        energies: Dict[str, Iterable[Number]]
+            the energies with the argument names of calculate
+
+        Returns
+        -------
+        Tuple[Dict[str, np.array], List[tuple]]
+            the energies as arrays and the groups. For multistate estimators (V_kn, N_k), the groups are
+            (offset, n_samples) of the sampled column blocks, otherwise (names, n_samples) following _sample_groups.
+        """
+        if ("N_k" in energies):
+            V_kn = np.array(energies["V_kn"], dtype=float, ndmin=2)
+            N_k = np.array(energies["N_k"], dtype=int, ndmin=1)
+            offsets = np.concatenate([[0], np.cumsum(N_k)])[:-1]
+            groups = [(offset, n_samples) for offset, n_samples in zip(offsets, N_k) if (n_samples > 0)]
+            return {"V_kn": V_kn, "N_k": N_k}, groups
+
+        energies = {name: np.array(values, dtype=float, ndmin=1) for name, values in energies.items()}
+        sample_groups = self._sample_groups
+        if (sample_groups is None):
+            sample_groups = (tuple(energies.keys()),)
+
+        groups = []
+        for names in sample_groups:
+            if (any(name not in energies for name in names)):
+                raise ValueError("the estimator " + str(self.__class__.__name__) + " needs the energies " + str(names))
+            lengths = set(len(energies[name]) for name in names)
+            if (len(lengths) != 1):
+                raise ValueError("the energies " + str(names) + " share the same samples and need the same length.")
+            groups.append((names, lengths.pop()))
+        return energies, groups
+
     def _update_function(self):
         self.simplified_equation = self.equation.subs(self.constants)
 
     @classmethod
-    def _prepare_type(self, *arrays):
-        return tuple(map(lambda arr: np.array(list(map(lambda x: np.float(x), arr)),ndmin=1), arrays))
+    def _prepare_type(cls, *arrays):
+        return tuple(map(lambda arr: np.array(arr, dtype=float, ndmin=1), arrays))
 
     @classmethod
     def get_equation(cls) -> sp.Function:
@@ -84,7 +128,7 @@ class zwanzigEquation(_FreeEnergyCalculator):
     constants: dict
 
     def __init__(self, T: float = 298, k: float = const.k * const.Avogadro, kT: bool = False, kJ: bool = False,
-                 kCal: bool = False):
+                 kCal: bool = False, mpmath_fallback: bool = False):
         """
         __init__
             Here you can set Class wide the parameters T and k for the Zwanzig Equation
@@ -101,10 +145,14 @@ class zwanzigEquation(_FreeEnergyCalculator):
             overwrites k to get the Boltzman constant with units kJ/(mol*K)
         kCal: bool, optional
             overwrites k to get the Boltzman constant with units kcal/(mol*K)
+        mpmath_fallback: bool, optional
+            recalculate with the arbitrary precision mpmath implementation, if the float64 result is not finite.
+            (default: False)
 
         """
 
         self.constants = {}
+        self.mpmath_fallback = mpmath_fallback
         if (kT):
             self.set_parameters(T=1, k=1)
         elif (kJ):
@@ -116,7 +164,8 @@ class zwanzigEquation(_FreeEnergyCalculator):
 
         self._update_function()
 
-    def calculate(self, Vi: (Iterable[Number], Number), Vj: (Iterable[Number], Number)) -> float:
+    def calculate(self, Vi: (Iterable[Number], Number), Vj: (Iterable[Number], Number),
+                  decorrelate: bool = False) -> float:
         """zwanzig
 
         Calculate a free energy difference with the Zwanzig equation (aka exponential formula or thermodynamic perturbation).
@@ -127,6 +176,9 @@ class zwanzigEquation(_FreeEnergyCalculator):
         analyzed with the potential energy function of the final state. The variable kT expects the product of the Boltzmann
         constant with the temperature that was used to generate the trajectory in the respective units of the potential energies.
 
+        The calculation uses the vectorized log-sum-exp implementation. If mpmath_fallback is set, a non finite float64
+        result is recalculated with mpmath.
+
         See Zwanzig, R. W. J. Chem. Phys. 1954, 22, 1420-1426. doi:10.1063/1.1740409
 
         Parameters
@@ -135,6 +187,8 @@ class zwanzigEquation(_FreeEnergyCalculator):
             Potential energies of state I
         Vj : np.array
             Potential energies of state J
+        decorrelate: bool, optional
+            only use the uncorrelated samples, subsampled with the statistical inefficiency of Vj-Vi (default: False)
 
         Returns
         -------
@@ -142,7 +196,58 @@ class zwanzigEquation(_FreeEnergyCalculator):
             free energy difference
 
         """
-        return float(self._calculate_mpmath(Vi=Vi, Vj=Vj))
+        if (decorrelate):
+            Vi, Vj = self._prepare_type(Vi, Vj)
+            indices = subsample_correlated_data(Vj - Vi)
+            Vi, Vj = Vi[indices], Vj[indices]
+
+        dF = self._calculate_efficient(Vi=Vi, Vj=Vj)
+
+        # float64 lost the result - use the arbitrary precision implementation, if requested.
+        if (self.mpmath_fallback and not np.isfinite(dF)):
+            dF = self._calculate_mpmath(Vi=Vi, Vj=Vj)
+
+        return float(dF)
+
+    def calculate_batch(self, Vi: Iterable[Number], Vj: Iterable[Number]) -> np.array:
+        """
+            calculate_batch
+                Calculate the free energy differences of many state pairs at once with the Zwanzig equation.
+                The samples are expected along the first axis and the state pairs along the second axis.
+                One dimensional arrays are broadcasted, e.g. the energies of the sampled state Vi of shape (nSamples)
+                can be combined with the energies of many perturbed states Vj of shape (nSamples, nStates).
+
+        Parameters
+        ----------
+        Vi : np.array
+            Potential energies of state I - shape (nSamples) or (nSamples, nPairs)
+        Vj : np.array
+            Potential energies of state J - shape (nSamples) or (nSamples, nPairs)
+
+        Returns
+        -------
+        np.array
+            free energy differences of all pairs - shape (nPairs)
+
+        """
+        Vi, Vj = self._prepare_type(Vi, Vj)
+        if (not (Vi.shape[0] == Vj.shape[0])):
+            raise ValueError(
+                "Zwanzig Error: The given arrays for Vi and Vj must have the same number of samples. \n Actually they have: " + str(
+                    Vi.shape[0]) + " \t " + str(Vj.shape[0]) + "\n")
+
+        beta = 1 / (self.constants[self.k] * self.constants[self.T])
+        dVij = - beta * (np.reshape(Vj, (Vj.shape[0], -1)) - np.reshape(Vi, (Vi.shape[0], -1)))
+
+        from scipy import special as s
+        dF = - (1 / beta) * s.logsumexp(dVij, b=1 / dVij.shape[0], axis=0)
+
+        if (self.mpmath_fallback and not np.all(np.isfinite(dF))):
+            Vi_pairs, Vj_pairs = np.broadcast_arrays(np.reshape(Vi, (Vi.shape[0], -1)), np.reshape(Vj, (Vj.shape[0], -1)))
+            for pair in np.where(~np.isfinite(dF))[0]:
+                dF[pair] = self._calculate_mpmath(Vi=Vi_pairs[:, pair], Vj=Vj_pairs[:, pair])
+
+        return dF
 
     def _calculate_implementation_bruteForce(self, Vi: (Iterable, Number), Vj: (Iterable, Number)) -> float:
         """
@@ -295,12 +400,12 @@ class zwanzigEquation(_FreeEnergyCalculator):
             free energy difference
 
         """
+        Vi, Vj = self._prepare_type(Vi, Vj)
         if (not (len(Vi) == len(Vj))):
             raise ValueError(
                 "Zwanzig Error: The given arrays for Vi and Vj must have the same length. \n Actually they have: " + str(
-                    len(Vi) + " \t " + str(len(Vj))) + "\n")
+                    len(Vi)) + " \t " + str(len(Vj)) + "\n")
 
-        Vi, Vj = self._prepare_type(Vi, Vj)
         beta = 1 / (self.constants[self.k] * self.constants[self.T])
 
         # Calculate the potential energy difference in reduced units of kT
@@ -308,7 +413,7 @@ class zwanzigEquation(_FreeEnergyCalculator):
 
         # Return free energy difference
         from scipy import special as s
-        dF = - np.float(1 / beta) * s.logsumexp(np.array(dVij, dtype=np.float), b=1 / len(dVij))
+        dF = - float(1 / beta) * s.logsumexp(dVij, b=1 / len(dVij))
         return dF
 
     def _calculate_mpmath(self,  Vi: (Iterable, Number), Vj: (Iterable, Number))->float:
@@ -331,9 +436,9 @@ class zwanzigEquation(_FreeEnergyCalculator):
             free energy difference
 
         """
-        beta = np.float(1 / (self.constants[self.k] * self.constants[self.T]))
+        beta = float(1 / (self.constants[self.k] * self.constants[self.T]))
 
-        return - (1 / beta) * np.float(mp.ln(np.mean(list(map(mp.exp, -beta*(np.array(Vj, ndmin=1) - np.array(Vi, ndmin=1)))))))
+        return - (1 / beta) * float(mp.ln(np.mean(list(map(mp.exp, -beta*(np.array(Vj, ndmin=1) - np.array(Vi, ndmin=1)))))))
 
     def set_parameters(self, T: float = None, k: float = None):
         """
@@ -372,7 +477,7 @@ class threeStateZwanzig(zwanzigEquation):
             sp.log(sp.exp(-(1 / (k * T)) * (Vi - Vr))) - sp.log(sp.exp(-(1 / (k * T)) * (Vj - Vr))))
 
     def __init__(self, kCal: bool = False, T: float = 298, k: float = const.k * const.Avogadro, kT: bool = False,
-                 kJ: bool = False):
+                 kJ: bool = False, mpmath_fallback: bool = False):
         """
         __init__
             this class provides the implementation for the Free energy calculation with EDS.
@@ -390,8 +495,11 @@ class threeStateZwanzig(zwanzigEquation):
             overwrites k to get the Boltzman constant with units kJ/(mol*K)
         kCal: bool, optional
             overwrites k to get the Boltzman constant with units kcal/(mol*K)
+        mpmath_fallback: bool, optional
+            recalculate with the arbitrary precision mpmath implementation, if the float64 result is not finite.
+            (default: False)
         """
-        super().__init__(kCal=kCal, T=T, k=k, kT=kT, kJ=kJ)
+        super().__init__(kCal=kCal, T=T, k=k, kT=kT, kJ=kJ, mpmath_fallback=mpmath_fallback)
 
     def calculate(self, Vi: (Iterable[Number], Number), Vj: (Iterable[Number], Number),
                   Vr: (Iterable[Number], Number)) -> float:
@@ -447,7 +555,7 @@ class threeStateZwanzig(zwanzigEquation):
         Vi, Vj, Vr = self._prepare_type(Vi, Vj, Vr)
 
         # Build Zwanzig
-        zwanz = zwanzigEquation()
+        zwanz = zwanzigEquation(mpmath_fallback=self.mpmath_fallback)
         zwanz.constants = self.constants
 
         # Calc
@@ -465,6 +573,176 @@ class dfEDS(threeStateZwanzig):
     pass
 
 
+class multistateEnvelopingDistributionSampling(zwanzigEquation):
+    r"""
+            this class provides the free energy calculation for EDS simulations with N end states.
+            The free energies of all end states relative to the reference state are calculated in one vectorized
+            log-sum-exp pass over the (nSamples x nStates) energy matrix.
+
+            $dF_{iR} = -\frac{1}{\beta} * \ln(\langle e^{-\beta * (V_i-V_R)}\rangle_R)$
+
+            The free energies can be used to propose new energy offsets $E^R_i$ for the enveloped potential, such that all
+            end states contribute equally to the reference state.
+    """
+    k, T, Vi, Vr = sp.symbols("k T Vi Vr")
+    equation: sp.Function = -(1 / (k * T)) * sp.log(sp.exp(-(1 / (k * T)) * (Vi - Vr)))
+
+    def __init__(self, T: float = 298, k: float = const.k * const.Avogadro, kT: bool = False, kJ: bool = False,
+                 kCal: bool = False, mpmath_fallback: bool = False):
+        """
+        __init__
+            Here you can set Class wide the parameters T and k for the EDS free energy calculation.
+
+        Parameters
+        ----------
+        T: float, optional
+            Temperature in Kelvin, defaults to 398
+        k: float, optional
+            boltzmann Constant, defaults to const.k*const.Avogadro
+        kT: bool, optional
+            overwrites T and k to set all results in units of $k_bT$
+        kJ: bool, optional
+            overwrites k to get the Boltzman constant with units kJ/(mol*K)
+        kCal: bool, optional
+            overwrites k to get the Boltzman constant with units kcal/(mol*K)
+        mpmath_fallback: bool, optional
+            recalculate with the arbitrary precision mpmath implementation, if the float64 result is not finite.
+            (default: False)
+        """
+        super().__init__(T=T, k=k, kT=kT, kJ=kJ, kCal=kCal, mpmath_fallback=mpmath_fallback)
+
+    def _prepare_input(self, V_is: Iterable[Iterable[Number]], Vr: Iterable[Number],
+                       decorrelate: bool = False) -> Tuple[np.array, np.array]:
+        V_is, Vr = self._prepare_type(V_is, Vr)
+        V_is = np.reshape(V_is, (V_is.shape[0], -1))
+        if (not (V_is.shape[0] == Vr.shape[0])):
+            raise ValueError(
+                "EDS Error: The given arrays for V_is and Vr must have the same number of samples. \n Actually they have: " + str(
+                    V_is.shape[0]) + " \t " + str(Vr.shape[0]) + "\n")
+
+        if (decorrelate):
+            indices = subsample_correlated_data(Vr)
+            V_is, Vr = V_is[indices], Vr[indices]
+        return V_is, Vr
+
+    def calculate(self, V_is: Iterable[Iterable[Number]], Vr: Iterable[Number], decorrelate: bool = False) -> np.array:
+        """
+            calculate
+                calculates the free energies of all end states relative to the reference state.
+
+        Parameters
+        ----------
+        V_is : np.array
+            the potential energies of all end states while sampling the reference state - shape (nSamples, nStates)
+        Vr : np.array
+            the potential energy of the reference state while sampling the reference state - shape (nSamples)
+        decorrelate: bool, optional
+            only use the uncorrelated samples, subsampled with the statistical inefficiency of Vr (default: False)
+
+        Returns
+        -------
+        np.array
+            free energies dF_iR of the end states relative to the reference state - shape (nStates)
+        """
+        V_is, Vr = self._prepare_input(V_is=V_is, Vr=Vr, decorrelate=decorrelate)
+        return self.calculate_batch(Vi=Vr, Vj=V_is)
+
+    def calculate_pairwise(self, V_is: Iterable[Iterable[Number]], Vr: Iterable[Number],
+                           decorrelate: bool = False) -> np.array:
+        """
+            calculate_pairwise
+                calculates the free energy differences between all pairs of end states via the reference state.
+
+        Parameters
+        ----------
+        V_is : np.array
+            the potential energies of all end states while sampling the reference state - shape (nSamples, nStates)
+        Vr : np.array
+            the potential energy of the reference state while sampling the reference state - shape (nSamples)
+        decorrelate: bool, optional
+            only use the uncorrelated samples, subsampled with the statistical inefficiency of Vr (default: False)
+
+        Returns
+        -------
+        np.array
+            free energy differences dF_ij = dF_jR - dF_iR - shape (nStates, nStates)
+        """
+        dF_iR = self.calculate(V_is=V_is, Vr=Vr, decorrelate=decorrelate)
+        return dF_iR[None, :] - dF_iR[:, None]
+
+    def propose_eoff(self, V_is: Iterable[Iterable[Number]], Vr: Iterable[Number], Eoff: Iterable[Number],
+                     damping: float = 1.0, reference_state: int = 0, decorrelate: bool = False) -> np.array:
+        """
+            propose_eoff
+                proposes new energy offsets for the enveloped potential (e.g. for envelopedPotential.set_Eoff).
+                The offsets are set to the free energies of the end states, such that all end states contribute
+                equally to the reference state. The offset of reference_state is kept, as only the differences of the
+                offsets matter. The step from the current offsets can be damped for iterative offset refinement.
+
+        Parameters
+        ----------
+        V_is : np.array
+            the potential energies of all end states while sampling the reference state - shape (nSamples, nStates)
+        Vr : np.array
+            the potential energy of the reference state while sampling the reference state - shape (nSamples)
+        Eoff : np.array
+            the energy offsets of the reference state used for the sampling - shape (nStates)
+        damping: float, optional
+            fraction of the step from the current to the estimated offsets, 1 takes the full step (default: 1.0)
+        reference_state: int, optional
+            index of the end state, whose offset is kept (default: 0)
+        decorrelate: bool, optional
+            only use the uncorrelated samples, subsampled with the statistical inefficiency of Vr (default: False)
+
+        Returns
+        -------
+        np.array
+            new energy offsets - shape (nStates)
+        """
+        dF_iR = self.calculate(V_is=V_is, Vr=Vr, decorrelate=decorrelate)
+        return self.propose_eoff_from_free_energies(dF_iR=dF_iR, Eoff=Eoff, damping=damping,
+                                                    reference_state=reference_state)
+
+    def propose_eoff_from_free_energies(self, dF_iR: Iterable[Number], Eoff: Iterable[Number], damping: float = 1.0,
+                                        reference_state: int = 0) -> np.array:
+        """
+            propose_eoff_from_free_energies
+                proposes new energy offsets (see propose_eoff) from already estimated free energies of the end states
+                relative to the reference state, e.g. from running exponential averages.
+
+        Parameters
+        ----------
+        dF_iR : np.array
+            free energies of the end states relative to the reference state - shape (nStates)
+        Eoff : np.array
+            the energy offsets of the reference state used for the sampling - shape (nStates)
+        damping: float, optional
+            fraction of the step from the current to the estimated offsets, 1 takes the full step (default: 1.0)
+        reference_state: int, optional
+            index of the end state, whose offset is kept (default: 0)
+
+        Returns
+        -------
+        np.array
+            new energy offsets - shape (nStates)
+        """
+        dF_iR = np.array(dF_iR, dtype=float, ndmin=1)
+        Eoff = np.array(Eoff, dtype=float, ndmin=1)
+        if (not (0 < damping <= 1)):
+            raise ValueError("EDS Error: the damping needs to be in (0, 1]. Got: " + str(damping))
+        if (not (len(dF_iR) == len(Eoff))):
+            raise ValueError("EDS Error: The energy matrix contains " + str(len(dF_iR)) + " states, but got " + str(
+                len(Eoff)) + " energy offsets.\n")
+
+        target = dF_iR - dF_iR[reference_state] + Eoff[reference_state]
+        return Eoff + damping * (target - Eoff)
+
+
+# alternative class names
+class multistateEDS(multistateEnvelopingDistributionSampling):
+    pass
+
+
 class bennetAcceptanceRatio(_FreeEnergyCalculator):
     """
     This class implements the BAR method.
@@ -477,6 +755,7 @@ class bennetAcceptanceRatio(_FreeEnergyCalculator):
     equation: sp.Function = (1 / (k * T)) * (
             sp.log(sp.exp((1 / (k * T)) * (Vi_j - Vj_j + C))) - sp.log(sp.exp((1 / (k * T)) * (Vj_i - Vi_i + C))))
     constants: dict = {T: 298, k: const.k * const.Avogadro, C: Number}
+    _sample_groups: Tuple[Tuple[str]] = (("Vi_i", "Vj_i"), ("Vi_j", "Vj_j"))
 
     # Numeric parameters
     convergence_radius: float
@@ -530,10 +809,12 @@ class bennetAcceptanceRatio(_FreeEnergyCalculator):
         self._update_function()
 
     def calculate(self, Vi_i: Iterable[Number], Vj_i: Iterable[Number],
-                  Vi_j: Iterable[Number], Vj_j: Iterable[Number], verbose: bool = False) -> float:
+                  Vi_j: Iterable[Number], Vj_j: Iterable[Number], verbose: bool = False,
+                  decorrelate: bool = False, initial_guess: float = None) -> float:
         """
             calculate
                 this function is calculating the free energy difference of two states with the BAR method.
+                The implicit BAR equation is solved in log space with a safeguarded Newton iteration (see _calculate_logspace).
 
 
         Parameters
@@ -546,6 +827,15 @@ class bennetAcceptanceRatio(_FreeEnergyCalculator):
              potential energies of stateI while sampling stateJ
         Vj_j : np.array
              potential energies of stateJ while sampling stateJ
+        verbose: bool, optional
+            print the iterations
+        decorrelate: bool, optional
+            only use the uncorrelated samples of both states, subsampled with the statistical inefficiency of the
+            energy differences (default: False)
+        initial_guess: float, optional
+            free energy difference, at which the iteration and the search of the root bracket start, e.g. the result
+            of a similar calculation (default: None - the constant C inside the bracket of the exponential averaging
+            estimates of both directions)
 
         Returns
         -------
@@ -553,7 +843,254 @@ class bennetAcceptanceRatio(_FreeEnergyCalculator):
             free energy difference
 
         """
-        return self._calculate_optimize(Vi_i, Vj_i, Vi_j, Vj_j, verbose=verbose)
+        dF, _ = self._calculate_logspace(Vi_i, Vj_i, Vi_j, Vj_j, verbose=verbose, decorrelate=decorrelate,
+                                         initial_guess=initial_guess)
+        return dF
+
+    def calculate_with_error(self, Vi_i: Iterable[Number], Vj_i: Iterable[Number],
+                             Vi_j: Iterable[Number], Vj_j: Iterable[Number], verbose: bool = False,
+                             decorrelate: bool = False, initial_guess: float = None) -> Tuple[float, float]:
+        """
+            calculate_with_error
+                calculates the BAR free energy difference and its analytical standard error estimate (Bennett 1976).
+
+
+        Parameters
+        ----------
+        Vi_i : np.array
+            potential energies of stateI while sampling stateI
+        Vj_i : np.array
+             potential energies of stateJ while sampling stateI
+        Vi_j : np.array
+             potential energies of stateI while sampling stateJ
+        Vj_j : np.array
+             potential energies of stateJ while sampling stateJ
+        verbose: bool, optional
+            print the iterations
+        decorrelate: bool, optional
+            only use the uncorrelated samples of both states, subsampled with the statistical inefficiency of the
+            energy differences (default: False)
+        initial_guess: float, optional
+            free energy difference, at which the iteration and the search of the root bracket start, e.g. the result
+            of a similar calculation (default: None - the constant C inside the bracket of the exponential averaging
+            estimates of both directions)
+
+        Returns
+        -------
+        Tuple[float, float]
+            free energy difference, standard error of the free energy difference
+
+        """
+        return self._calculate_logspace(Vi_i, Vj_i, Vi_j, Vj_j, verbose=verbose, decorrelate=decorrelate,
+                                        initial_guess=initial_guess)
+
+    def calculate_ladder(self, V_kn: Iterable[Iterable[Number]], N_k: Iterable[int],
+                         verbose: bool = False, decorrelate: bool = False) -> Tuple[np.array, np.array]:
+        """
+            calculate_ladder
+                chained BAR over a ladder of states (e.g. a lambda ladder). The free energy difference between each
+                pair of neighbouring states k and k+1 is calculated, the total free energy difference is the sum.
+
+
+        Parameters
+        ----------
+        V_kn : np.array
+            potential energies of shape (K, N). V_kn[k, n] is the energy of sample n evaluated in state k.
+            The samples are ordered by the state they were sampled from.
+        N_k : Iterable[int]
+            number of samples drawn from each state (K entries, summing up to N).
+        verbose: bool, optional
+            print the iterations
+        decorrelate: bool, optional
+            only use the uncorrelated samples of each state pair (default: False)
+
+        Returns
+        -------
+        Tuple[np.array, np.array]
+            free energy differences of the K-1 neighbouring state pairs, standard errors of the differences
+            (cumulative results: np.cumsum(dF) and np.sqrt(np.cumsum(ddF**2)))
+
+        """
+        V_kn = np.array(V_kn, dtype=float, ndmin=2)
+        N_k = np.array(N_k, dtype=int, ndmin=1)
+
+        if (V_kn.shape[0] != len(N_k)):
+            raise ValueError("BAR Error: V_kn needs one row per state. Got " + str(V_kn.shape[0]) + " rows for " + str(
+                len(N_k)) + " states.")
+        if (V_kn.shape[1] != np.sum(N_k)):
+            raise ValueError("BAR Error: the number of samples in N_k (" + str(np.sum(N_k)) +
+                             ") does not match the columns of V_kn (" + str(V_kn.shape[1]) + ").")
+
+        bounds = np.concatenate([[0], np.cumsum(N_k)])
+        dF = np.zeros(len(N_k) - 1)
+        ddF = np.zeros(len(N_k) - 1)
+        for state in range(len(N_k) - 1):
+            samples_i = slice(bounds[state], bounds[state + 1])
+            samples_j = slice(bounds[state + 1], bounds[state + 2])
+            dF[state], ddF[state] = self._calculate_logspace(Vi_i=V_kn[state, samples_i],
+                                                             Vj_i=V_kn[state + 1, samples_i],
+                                                             Vi_j=V_kn[state, samples_j],
+                                                             Vj_j=V_kn[state + 1, samples_j], verbose=verbose,
+                                                             decorrelate=decorrelate)
+        return dF, ddF
+
+    @staticmethod
+    def _log_fermi(x: np.array) -> np.array:
+        """
+        numerically stable logarithm of the fermi function: ln(1/(1+e^x)) = -softplus(x)
+        """
+        return -(np.maximum(x, 0) + np.log1p(np.exp(-np.abs(x))))
+
+    def _bar_residual(self, x: float, w_F: np.array, w_R: np.array, M: float) -> Tuple[float, float]:
+        """
+            _bar_residual
+                implicit BAR equation in reduced units and its derivative with respect to x = beta*dF.
+                The residual is monotonically increasing in x and zero at the BAR solution.
+
+        Parameters
+        ----------
+        x: float
+            reduced free energy guess
+        w_F: np.array
+            reduced forward work beta*(Vj_i - Vi_i)
+        w_R: np.array
+            reduced reverse work beta*(Vi_j - Vj_j)
+        M: float
+            ln(N_F/N_R)
+
+        Returns
+        -------
+        Tuple[float, float]
+            residual, derivative of the residual
+        """
+        from scipy import special as s
+        z_F = M + w_F - x
+        z_R = -M + w_R + x
+        log_f_F = self._log_fermi(z_F)
+        log_f_R = self._log_fermi(z_R)
+
+        log_sum_F = s.logsumexp(log_f_F)
+        log_sum_R = s.logsumexp(log_f_R)
+        residual = log_sum_F - log_sum_R
+
+        # d/dx ln(sum f) = +- sum f(1-f) / sum f, with ln(1-f(z)) = ln(f(-z)) = ln(f(z)) + z
+        d_F = np.exp(s.logsumexp(2 * log_f_F + z_F) - log_sum_F)
+        d_R = np.exp(s.logsumexp(2 * log_f_R + z_R) - log_sum_R)
+        return residual, d_F + d_R
+
+    def _calculate_logspace(self, Vi_i: (Iterable[Number], Number), Vj_i: (Iterable[Number], Number),
+                            Vi_j: (Iterable[Number], Number), Vj_j: (Iterable[Number], Number),
+                            verbose: bool = False, decorrelate: bool = False,
+                            initial_guess: float = None) -> Tuple[float, float]:
+        """
+        _calculate_logspace
+            this function is calculating the free energy difference of two states with the BAR method.
+            All fermi sums are evaluated vectorized in float64 log space (log-sum-exp of softplus terms).
+            The implicit BAR equation is solved by Newton iterations, which are safeguarded by bisection
+            on a bracket of the root. The bracket is searched around the initial guess, if one is given.
+
+
+        Parameters
+        ----------
+        Vi_i : np.array
+            potential energies of stateI while sampling stateI
+        Vj_i : np.array
+             potential energies of stateJ while sampling stateI
+        Vi_j : np.array
+             potential energies of stateI while sampling stateJ
+        Vj_j : np.array
+             potential energies of stateJ while sampling stateJ
+        verbose: bool, optional
+            print the iterations
+        decorrelate: bool, optional
+            only use the uncorrelated samples of both states, subsampled with the statistical inefficiency of the
+            energy differences (default: False)
+        initial_guess: float, optional
+            free energy difference, at which the iteration and the search of the root bracket start, e.g. the result
+            of a similar calculation (default: None - the constant C inside the bracket of the exponential averaging
+            estimates of both directions)
+
+        Returns
+        -------
+        Tuple[float, float]
+            free energy difference, analytical standard error of the free energy difference
+
+        """
+        from scipy import special as s
+        Vi_i, Vj_i, Vi_j, Vj_j = self._prepare_type(Vi_i, Vj_i, Vi_j, Vj_j)
+
+        if (not ((len(Vi_i) == len(Vj_i)) and (len(Vi_j) == len(Vj_j)))):  # I and J simulation don't need the same length.
+            raise ValueError(
+                "BAR Error: The given arrays for Vi and Vj must have the same length. \n Actually they have: " + str(
+                    len(Vi_i)) + " \t " + str(len(Vj_i)) + "\n" + str(len(Vi_j)) + " \t " + str(len(Vj_j)) + "\n")
+
+        if (decorrelate):
+            indices_i = subsample_correlated_data(Vj_i - Vi_i)
+            indices_j = subsample_correlated_data(Vi_j - Vj_j)
+            Vi_i, Vj_i = Vi_i[indices_i], Vj_i[indices_i]
+            Vi_j, Vj_j = Vi_j[indices_j], Vj_j[indices_j]
+
+        beta = 1 / (self.constants[self.k] * self.constants[self.T])
+        self.constants.update({self.beta: beta})
+
+        w_F = beta * (Vj_i - Vi_i)
+        w_R = beta * (Vi_j - Vj_j)
+        M = np.log(len(w_F) / len(w_R))
+
+        if (initial_guess is None):
+            # bracket the root, starting from the exponential averaging estimates of both directions
+            x_F = -(s.logsumexp(-w_F) - np.log(len(w_F)))
+            x_R = s.logsumexp(-w_R) - np.log(len(w_R))
+            lower, upper = min(x_F, x_R) - 1, max(x_F, x_R) + 1
+            x = beta * self.constants.get(self.C, 0.0)
+            if (not (lower < x < upper)):
+                x = 0.5 * (x_F + x_R)
+        else:
+            x = beta * initial_guess
+            lower, upper = x - 1, x + 1
+        width = upper - lower
+        while (self._bar_residual(lower, w_F, w_R, M)[0] > 0):
+            lower -= width
+            width *= 2
+        while (self._bar_residual(upper, w_F, w_R, M)[0] < 0):
+            upper += width
+            width *= 2
+
+
+        if (verbose): print("Iterate: \tconvergence raidus: " + str(self.convergence_radius))
+        for iteration in range(self.max_iterations):
+            residual, derivative = self._bar_residual(x, w_F, w_R, M)
+            if (residual > 0):
+                upper = x
+            else:
+                lower = x
+
+            new_x = x - residual / derivative
+            if (not (lower < new_x < upper)):  # Newton step left the bracket: bisect
+                new_x = 0.5 * (lower + upper)
+
+            convergence = abs(new_x - x) / beta
+            x = new_x
+            if (verbose): print("Iteration: " + str(iteration) + "\tdF: " + str(x / beta), "\tconvergence", convergence)
+
+            if (convergence <= self.convergence_radius and iteration + 1 >= self.min_iterations):
+                break
+        else:
+            raise Exception("BAR is not converged after " + str(self.max_iterations) + " steps. stopped at: " + str(
+                x / beta))
+
+        self.constants.update({self.C: float(x / beta)})
+
+        # analytical variance: var(f_F)/(N_F <f_F>^2) + var(f_R)/(N_R <f_R>^2), evaluated in log space
+        log_f_F = self._log_fermi(M + w_F - x)
+        log_f_R = self._log_fermi(-M + w_R + x)
+        variance = 0.0
+        for log_f in (log_f_F, log_f_R):
+            log_mean = s.logsumexp(log_f) - np.log(len(log_f))
+            log_mean_sq = s.logsumexp(2 * log_f) - np.log(len(log_f))
+            variance += max(np.exp(log_mean_sq - 2 * log_mean) - 1, 0.0) / len(log_f)
+
+        return float(x / beta), float(np.sqrt(variance) / beta)
 
     def _calc_bar(self, C: Number, Vj_i: np.array, Vi_i: np.array, Vi_j: np.array, Vj_j: np.array) -> Number:
         """
@@ -753,3 +1290,352 @@ class bennetAcceptanceRatio(_FreeEnergyCalculator):
 # alternative class names
 class bar(bennetAcceptanceRatio):
     pass
+
+
+class multistateBennetAcceptanceRatio(_FreeEnergyCalculator):
+    r"""
+    This class implements the multistate Bennett acceptance ratio (MBAR) method.
+    $f_i = -\ln \sum_n \frac{e^{-u_i(x_n)}}{\sum_k N_k e^{f_k - u_k(x_n)}}$
+    with the reduced energies $u_k = \beta V_k$ and the reduced free energies $f_k = \beta F_k$.
+
+    The free energies are obtained by minimizing the convex MBAR objective with L-BFGS followed by Newton iterations.
+    All sums over the samples are accumulated in log space in chunks of samples, such that only the energy matrix itself
+    (which can also be a np.memmap) needs to fit into memory.
+
+    See Shirts, M. R., Chodera, J. D. J. Chem. Phys. 2008, 129, 124105. doi:10.1063/1.2978177
+    """
+    k, T, i, j, n, K, N = sp.symbols("k T i j n K N", integer=True)
+    V, f, N_k = sp.IndexedBase("V"), sp.IndexedBase("f"), sp.IndexedBase("N_k")
+    equation: sp.Function = -k * T * sp.log(sp.Sum(sp.exp(-V[i, n] / (k * T)) / sp.Sum(
+        N_k[j] * sp.exp((f[j] - V[j, n]) / (k * T)), (j, 0, K - 1)), (n, 0, N - 1)))
+    constants: dict
+
+    # Numeric parameters
+    convergence_radius: float
+    max_iterations: int
+    chunk_size: int
+
+    def __init__(self, T: float = 298, k: float = const.k * const.Avogadro,
+                 kT: bool = False, kJ: bool = False, kCal: bool = False,
+                 convergence_radius: float = 10 ** (-10), max_iterations: int = 1000, chunk_size: int = None):
+        """
+        __init__
+            Here you can set Class wide the parameters T and k for the MBAR equations
+
+        Parameters
+        ----------
+        T: float, optional
+            Temperature in Kelvin, defaults to 398
+        k: float, optional
+            boltzmann Constant, defaults to const.k*const.Avogadro
+        kT: bool, optional
+            overwrites T and k to set all results in units of $k_bT$
+        kJ: bool, optional
+            overwrites k to get the Boltzman constant with units kJ/(mol*K)
+        kCal: bool, optional
+            overwrites k to get the Boltzman constant with units kcal/(mol*K)
+        convergence_radius: float, optional
+            the solution is converged, if the largest gradient component of the objective (per sample) is below the
+            convergence radius.
+        max_iterations: int, optional
+            maximal number of L-BFGS iterations.
+        chunk_size: int, optional
+            number of samples processed at once. By default chosen such that a chunk holds ~4*10^6 energies.
+        """
+
+        self.constants = {}
+        if (kT):
+            self.set_parameters(T=1, k=1)
+        elif (kJ):
+            self.set_parameters(T=T, k=const.k * const.Avogadro / 1000)
+        elif (kCal):
+            self.set_parameters(T=T, k=const.k * const.Avogadro * self.J_to_cal / 1000)
+        else:
+            self.set_parameters(T=T, k=k)
+
+        # deal with numeric params:
+        self.convergence_radius = convergence_radius
+        self.max_iterations = max_iterations
+        self.chunk_size = chunk_size
+
+        self._update_function()
+
+    def calculate(self, V_kn: Iterable[Iterable[Number]], N_k: Iterable[int], verbose: bool = False,
+                  decorrelate: bool = False, initial_guess: Iterable[Number] = None) -> np.array:
+        """
+            calculate
+                calculates the free energies of all states relative to the first state with MBAR.
+
+
+        Parameters
+        ----------
+        V_kn : np.array
+            potential energies of shape (K, N). V_kn[k, n] is the energy of sample n evaluated in state k.
+            The samples are ordered by the state they were sampled from. (if kT is set, these are the reduced energies u_kn)
+        N_k : Iterable[int]
+            number of samples drawn from each state (K entries, summing up to N). States without samples are allowed.
+        verbose: bool, optional
+            print the solver progress
+        decorrelate: bool, optional
+            only use the uncorrelated samples of each state, subsampled with the statistical inefficiency of the
+            energies of the sampled state (default: False)
+        initial_guess: Iterable[Number], optional
+            free energies of the K states relative to the first state, at which the solver starts, e.g. the result of
+            a similar calculation (default: None - all zero)
+
+        Returns
+        -------
+        np.array
+            free energies of the K states relative to the first state
+
+        """
+        if (decorrelate):
+            V_kn, N_k = self._decorrelate(V_kn, N_k)
+
+        f_k = self._solve(V_kn, N_k, verbose=verbose, initial_guess=initial_guess)
+        beta = 1 / (self.constants[self.k] * self.constants[self.T])
+        return (f_k - f_k[0]) / beta
+
+    def calculate_with_error(self, V_kn: Iterable[Iterable[Number]], N_k: Iterable[int], verbose: bool = False,
+                             decorrelate: bool = False,
+                             initial_guess: Iterable[Number] = None) -> Tuple[np.array, np.array]:
+        """
+            calculate_with_error
+                calculates the free energies of all states relative to the first state with MBAR and their
+                asymptotic standard errors. The full matrix of the free energy difference errors is
+                available afterwards from get_error_matrix.
+
+
+        Parameters
+        ----------
+        V_kn : np.array
+            potential energies of shape (K, N). V_kn[k, n] is the energy of sample n evaluated in state k.
+            The samples are ordered by the state they were sampled from. (if kT is set, these are the reduced energies u_kn)
+        N_k : Iterable[int]
+            number of samples drawn from each state (K entries, summing up to N). States without samples are allowed.
+        verbose: bool, optional
+            print the solver progress
+        decorrelate: bool, optional
+            only use the uncorrelated samples of each state, subsampled with the statistical inefficiency of the
+            energies of the sampled state (default: False)
+        initial_guess: Iterable[Number], optional
+            free energies of the K states relative to the first state, at which the solver starts, e.g. the result of
+            a similar calculation (default: None - all zero)
+
+        Returns
+        -------
+        Tuple[np.array, np.array]
+            free energies of the K states relative to the first state, standard errors of these free energy differences
+
+        """
+        if (decorrelate):
+            V_kn, N_k = self._decorrelate(V_kn, N_k)
+
+        f_k = self._solve(V_kn, N_k, verbose=verbose, initial_guess=initial_guess)
+        beta = 1 / (self.constants[self.k] * self.constants[self.T])
+        self._theta = self._covariance(V_kn, N_k, f_k)
+        return (f_k - f_k[0]) / beta, self.get_error_matrix()[0]
+
+    def get_error_matrix(self) -> np.array:
+        """
+            get_error_matrix
+                standard errors of all free energy differences F_j - F_i of the last calculate_with_error call.
+
+        Returns
+        -------
+        np.array
+            (K, K) matrix of standard errors
+
+        """
+        if (not hasattr(self, "_theta")):
+            raise ValueError("MBAR Error: no covariance available. Call calculate_with_error first.")
+        theta = self._theta
+        diag = np.diag(theta)
+        variance = diag[:, None] + diag[None, :] - 2 * theta
+        beta = 1 / (self.constants[self.k] * self.constants[self.T])
+        return np.sqrt(np.clip(variance, 0, None)) / beta
+
+    def _prepare_input(self, V_kn: Iterable[Iterable[Number]], N_k: Iterable[int]) -> Tuple[np.array, np.array]:
+        if (not isinstance(V_kn, np.ndarray)):
+            V_kn = np.array(V_kn, dtype=float, ndmin=2)  # np.memmaps are kept and read chunkwise
+        N_k = np.array(N_k, dtype=float, ndmin=1)
+
+        if (V_kn.ndim != 2 or V_kn.shape[0] != len(N_k)):
+            raise ValueError("MBAR Error: V_kn needs the shape (K, N) with one row per state. Got " + str(
+                V_kn.shape) + " for " + str(len(N_k)) + " states.")
+        if (V_kn.shape[1] != np.sum(N_k)):
+            raise ValueError("MBAR Error: the number of samples in N_k (" + str(int(np.sum(N_k))) +
+                             ") does not match the columns of V_kn (" + str(V_kn.shape[1]) + ").")
+        if (np.sum(N_k > 0) == 0):
+            raise ValueError("MBAR Error: at least one state needs samples.")
+        return V_kn, N_k
+
+    def _decorrelate(self, V_kn: Iterable[Iterable[Number]], N_k: Iterable[int]) -> Tuple[np.array, np.array]:
+        """
+        subsamples the uncorrelated samples of each state, based on the energies of the sampled state.
+        """
+        V_kn, N_k = self._prepare_input(V_kn, N_k)
+        bounds = np.concatenate([[0], np.cumsum(N_k)]).astype(int)
+
+        indices = []
+        for state in np.flatnonzero(N_k > 0):
+            indices.append(bounds[state] + subsample_correlated_data(V_kn[state, bounds[state]:bounds[state + 1]]))
+            N_k[state] = len(indices[-1])
+        return V_kn[:, np.concatenate(indices)], N_k
+
+    def _chunks(self, V_kn: np.array):
+        """
+        yields the reduced energies u_kn chunk by chunk of samples.
+        """
+        beta = 1 / (self.constants[self.k] * self.constants[self.T])
+        chunk_size = self.chunk_size if (self.chunk_size is not None) else max(1, 2 ** 22 // V_kn.shape[0])
+        for start in range(0, V_kn.shape[1], chunk_size):
+            yield beta * np.asarray(V_kn[:, start:start + chunk_size], dtype=float)
+
+    def _accumulate(self, V_kn: np.array, N_k: np.array, f_k: np.array,
+                    hessian: bool = False) -> Tuple[float, np.array, np.array]:
+        """
+            _accumulate
+                accumulates the MBAR objective, the column sums of the weight matrix W_nk and optionally W^T W
+                over all sample chunks.
+                W_nk = exp(f_k - u_kn) / sum_l N_l exp(f_l - u_ln)
+
+        Returns
+        -------
+        Tuple[float, np.array, np.array]
+            sum_n ln(sum_k N_k exp(f_k - u_kn)), sum_n W_nk, W^T W (None if not requested)
+        """
+        from scipy import special as s
+        log_denominator_sum = 0.0
+        weight_sum = np.zeros(len(N_k))
+        weight_products = np.zeros((len(N_k), len(N_k))) if (hessian) else None
+
+        for u_chunk in self._chunks(V_kn):
+            log_w = f_k[:, None] - u_chunk
+            log_denominator = s.logsumexp(log_w, b=N_k[:, None], axis=0)
+            log_denominator_sum += np.sum(log_denominator)
+
+            W = np.exp(log_w - log_denominator[None, :])
+            weight_sum += np.sum(W, axis=1)
+            if (hessian):
+                weight_products += W @ W.T
+        return log_denominator_sum, weight_sum, weight_products
+
+    def _solve(self, V_kn: Iterable[Iterable[Number]], N_k: Iterable[int], verbose: bool = False,
+               initial_guess: Iterable[Number] = None) -> np.array:
+        r"""
+            _solve
+                solves the MBAR equations for the reduced free energies. The objective
+                $F(f) = \sum_n \ln \sum_k N_k e^{f_k - u_kn} - \sum_k N_k f_k$
+                is convex and minimized over the sampled states (the first sampled state is fixed to zero) with L-BFGS,
+                the result is polished by Newton iterations. Free energies of unsampled states are evaluated afterwards.
+                The minimization starts at the initial guess (free energies relative to the first state), if given.
+
+        Returns
+        -------
+        np.array
+            reduced free energies of all K states (not yet shifted to the first state)
+        """
+        from scipy import optimize
+        from scipy import special as s
+        V_kn, N_k = self._prepare_input(V_kn, N_k)
+        n_samples = np.sum(N_k)
+        sampled = np.flatnonzero(N_k > 0)
+        free = sampled[1:]  # the first sampled state is the gauge
+
+        def expand(x: np.array) -> np.array:
+            f_k = np.zeros(len(N_k))
+            f_k[free] = x
+            return f_k
+
+        def objective(x: np.array) -> Tuple[float, np.array]:
+            f_k = expand(x)
+            log_denominator_sum, weight_sum, _ = self._accumulate(V_kn, N_k, f_k)
+            value = (log_denominator_sum - np.dot(N_k, f_k)) / n_samples
+            gradient = (N_k * weight_sum - N_k)[free] / n_samples
+            return value, gradient
+
+        if (initial_guess is None):
+            x = np.zeros(len(free))
+        else:
+            initial_guess = np.array(initial_guess, dtype=float, ndmin=1)
+            if (len(initial_guess) != len(N_k)):
+                raise ValueError("MBAR Error: the initial guess needs one free energy per state. Got " + str(
+                    len(initial_guess)) + " for " + str(len(N_k)) + " states.")
+            beta = 1 / (self.constants[self.k] * self.constants[self.T])
+            x = beta * (initial_guess[free] - initial_guess[sampled[0]])
+
+        if (len(free) > 0):
+            result = optimize.minimize(objective, x, jac=True, method="L-BFGS-B",
+                                       options={"maxiter": self.max_iterations, "gtol": self.convergence_radius})
+            x = result.x
+            if (verbose): print("L-BFGS: iterations " + str(result.nit) + "\t" + str(result.message))
+
+            # Newton polishing with the analytical hessian
+            for iteration in range(50):
+                f_k = expand(x)
+                _, weight_sum, weight_products = self._accumulate(V_kn, N_k, f_k, hessian=True)
+                gradient = (N_k * weight_sum - N_k)[free]
+                if (verbose): print("Newton: iteration " + str(iteration) + "\tmax gradient: " + str(
+                    np.max(np.abs(gradient)) / n_samples))
+                if (np.max(np.abs(gradient)) / n_samples < self.convergence_radius):
+                    break
+                hessian = np.diag(N_k * weight_sum) - N_k[:, None] * weight_products * N_k[None, :]
+                step = np.linalg.lstsq(hessian[np.ix_(free, free)], gradient, rcond=None)[0]
+                x = x - step
+
+        # self consistent evaluation for all states (this includes the unsampled ones)
+        f_k = expand(x)
+        log_numerator = np.full(len(N_k), -np.inf)
+        for u_chunk in self._chunks(V_kn):
+            log_denominator = s.logsumexp(f_k[:, None] - u_chunk, b=N_k[:, None], axis=0)
+            log_numerator = np.logaddexp(log_numerator, s.logsumexp(-u_chunk - log_denominator[None, :], axis=1))
+        f_k = -log_numerator
+        return f_k
+
+    def _covariance(self, V_kn: Iterable[Iterable[Number]], N_k: Iterable[int], f_k: np.array) -> np.array:
+        r"""
+            _covariance
+                asymptotic covariance matrix of the reduced free energies
+                $\Theta = V S (I - S V^T N V S)^+ S V^T$,
+                with the singular value decomposition W = U S V^T of the weight matrix. V and S are obtained from the
+                eigen decomposition of W^T W, which is accumulated chunkwise, so W is never stored.
+
+        Returns
+        -------
+        np.array
+            (K, K) covariance matrix in reduced units
+        """
+        V_kn, N_k = self._prepare_input(V_kn, N_k)
+        _, _, weight_products = self._accumulate(V_kn, N_k, f_k, hessian=True)
+
+        eigenvalues, V = np.linalg.eigh(weight_products)
+        S = np.diag(np.sqrt(np.clip(eigenvalues, 0, None)))
+        inner = np.eye(len(N_k)) - S @ V.T @ np.diag(N_k) @ V @ S
+        # inner is singular (gauge freedom of f); its null eigenvalue is only accurate to ~eps**0.5, due to W^T W.
+        return V @ S @ np.linalg.pinv(inner, rcond=10 ** (-10)) @ S @ V.T
+
+    def set_parameters(self, T: float = None, k: float = None):
+        """
+            set_parameters setter for the parameters T and k
+
+        Parameters
+        ----------
+        T: float, optional
+            Temperature in Kelvin, defaults to 398
+        k: float, optional
+            boltzmann Constant, defaults to const.k*const.Avogadro
+
+        """
+        if (isinstance(T, Number)):
+            self.constants.update({self.T: T})
+
+        if (isinstance(k, Number)):
+            self.constants.update({self.k: k})
+
+        self._update_function()
+
+
+# alternative class names
+class mbar(multistateBennetAcceptanceRatio):
+    pass
@@ -0,0 +1,221 @@
+"""
+Reduced Energies:
+    This module builds reduced energy matrices u_kn, by re-evaluating the sampled configurations of one or more
+    trajectories with the potentials of all K states. These matrices are the input of the multistate estimators in
+    ensembler.analysis.freeEnergyCalculation (e.g. MBAR, chained BAR).
+"""
+import copy
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy import constants as const
+
+from ensembler.util.ensemblerTypes import systemCls, potentialCls
+from ensembler.util.ensemblerTypes import Union, List, Tuple, Iterable, Dict, Number
+
+# state potentials shared with the worker processes (set by the pool initializer)
+_worker_potentials: List[potentialCls] = None
+
+
+def _initialize_worker(potentials: List[potentialCls]):
+    global _worker_potentials
+    _worker_potentials = potentials
+
+
+def _evaluate_chunk_worker(positions: np.array) -> np.array:
+    return reducedEnergyMatrix._evaluate_chunk(potentials=_worker_potentials, positions=positions)
+
+
+class reducedEnergyMatrix:
+    r"""
+    This class builds the reduced energy matrix $u_{kn} = \beta_k V_k(x_n)$ for K states and N sampled configurations.
+
+    The states are either given as a list of potentials, or as one potential and a list of parameter sets.
+    A parameter set is a dict, that is applied to a copy of the potential. For each key, the setter set_<key> of the
+    potential is used if present, otherwise the attribute is set directly (e.g. {"s": 0.1} or {"Eoff": [0, 10]}).
+
+    The positions are read and evaluated in chunks, which are written directly into the matrix. Therefore only one
+    chunk of positions per process is in memory, and the matrix can be written to a memory-mapped .npy file. The
+    chunks can be evaluated in parallel with a process pool.
+    """
+
+    def __init__(self, potentials: List[potentialCls] = None, potential: potentialCls = None,
+                 parameter_sets: List[Dict[str, object]] = None,
+                 T: Union[Number, Iterable[Number]] = 298, k: float = const.k * const.Avogadro,
+                 kT: bool = False, kJ: bool = False, kCal: bool = False,
+                 chunk_size: int = 10 ** 5, n_processes: int = 1):
+        """
+        __init__
+            define the K states and the reduction of the energies.
+
+        Parameters
+        ----------
+        potentials: List[potentialCls], optional
+            one potential per state.
+        potential: potentialCls, optional
+            a potential, that is copied and modified by the parameter_sets (used if potentials is not given)
+        parameter_sets: List[Dict[str, object]], optional
+            one parameter set per state, applied to a copy of potential.
+        T: Union[Number, Iterable[Number]], optional
+            Temperature in Kelvin, either one for all states or one per state. (default: 298)
+        k: float, optional
+            boltzmann Constant, defaults to const.k*const.Avogadro
+        kT: bool, optional
+            the energies are already in units of $k_bT$ (no reduction)
+        kJ: bool, optional
+            overwrites k to get the Boltzman constant with units kJ/(mol*K)
+        kCal: bool, optional
+            overwrites k to get the Boltzman constant with units kcal/(mol*K)
+        chunk_size: int, optional
+            number of positions evaluated at once. (default: 10^5)
+        n_processes: int, optional
+            number of processes evaluating the chunks in parallel. (default: 1 - serial evaluation)
+        """
+        if (potentials is not None):
+            self.potentials = list(potentials)
+        elif (potential is not None and parameter_sets is not None):
+            self.potentials = [self._apply_parameter_set(potential, parameter_set) for parameter_set in parameter_sets]
+        else:
+            raise ValueError("reducedEnergyMatrix needs either a list of potentials or a potential and parameter_sets.")
+
+        if (kT):
+            k, T = 1, 1
+        elif (kJ):
+            k = const.k * const.Avogadro / 1000
+        elif (kCal):
+            k = const.k * const.Avogadro * 0.239005736 / 1000
+
+        T = np.array(T, dtype=float, ndmin=1)
+        if (len(T) == 1):
+            T = np.repeat(T, len(self.potentials))
+        elif (len(T) != len(self.potentials)):
+            raise ValueError("reducedEnergyMatrix: got " + str(len(T)) + " temperatures for " + str(
+                len(self.potentials)) + " states.")
+        self.beta = 1 / (k * T)
+
+        self.chunk_size = chunk_size
+        self.n_processes = n_processes
+
+    @property
+    def nStates(self) -> int:
+        return len(self.potentials)
+
+    @staticmethod
+    def _apply_parameter_set(potential: potentialCls, parameter_set: Dict[str, object]) -> potentialCls:
+        state_potential = copy.deepcopy(potential)
+        for key, value in parameter_set.items():
+            if (hasattr(state_potential, "set_" + key)):
+                getattr(state_potential, "set_" + key)(value)
+            elif (hasattr(state_potential, key)):
+                setattr(state_potential, key, value)
+            else:
+                raise ValueError("reducedEnergyMatrix: the potential " + str(state_potential.name) +
+                                 " has no parameter " + str(key))
+        return state_potential
+
+    @staticmethod
+    def _n_frames(trajectory: Union[systemCls, Iterable]) -> int:
+        """
+        number of frames of a system trajectory (or of an array of positions), without reading the positions.
+        """
+        if (hasattr(trajectory, "_trajectory")):
+            return len(trajectory._trajectory)
+        else:
+            return len(trajectory)
+
+    @staticmethod
+    def _iterate_positions(trajectory: Union[systemCls, Iterable], chunk_size: int) -> Iterable[np.array]:
+        """
+        yields the positions of a system trajectory (or of an array of positions, e.g. a np.memmap) chunkwise.
+        """
+        frames = trajectory._trajectory if (hasattr(trajectory, "_trajectory")) else trajectory
+        for start in range(0, len(frames), chunk_size):
+            if (hasattr(trajectory, "_trajectory")):
+                yield np.array([state.position for state in frames[start:start + chunk_size]], dtype=float)
+            else:
+                yield np.array(frames[start:start + chunk_size], dtype=float)
+
+    @staticmethod
+    def _evaluate_chunk(potentials: List[potentialCls], positions: np.array) -> np.array:
+        """
+        evaluates the potential energies of all states for a chunk of positions.
+        """
+        energies = np.empty((len(potentials), len(positions)))
+        for state, potential in enumerate(potentials):
+            energies[state] = np.broadcast_to(np.reshape(potential.ene(positions), -1), len(positions))
+        return energies
+
+    def build(self, trajectories: Union[systemCls, Iterable[Union[systemCls, Iterable]]],
+              sampled_states: Iterable[int] = None, out_path: str = None) -> Tuple[np.array, np.array]:
+        """
+            build
+                evaluates the positions of all trajectories with all K state potentials.
+
+        Parameters
+        ----------
+        trajectories: Union[systemCls, Iterable[Union[systemCls, Iterable]]]
+            simulated systems or arrays of positions (a single system or np.array is treated as one trajectory).
+        sampled_states: Iterable[int], optional
+            index of the state each trajectory was sampled from. By default trajectory i was sampled from state i
+            if the numbers of trajectories and states match.
+        out_path: str, optional
+            if given, u_kn is written to a memory-mapped .npy file at this path.
+
+        Returns
+        -------
+        Tuple[np.array, np.array]
+            u_kn of shape (K, N) with the samples ordered by their sampled state, N_k the number of samples per state.
+        """
+        if (hasattr(trajectories, "_trajectory") or isinstance(trajectories, np.ndarray)):
+            trajectories = [trajectories]
+        trajectories = list(trajectories)
+
+        if (sampled_states is None):
+            if (len(trajectories) != self.nStates):
+                raise ValueError("reducedEnergyMatrix: please provide sampled_states, as the number of trajectories (" +
+                                 str(len(trajectories)) + ") differs from the number of states (" + str(
+                    self.nStates) + ").")
+            sampled_states = range(self.nStates)
+        sampled_states = np.array(sampled_states, dtype=int, ndmin=1)
+        if (len(sampled_states) != len(trajectories)):
+            raise ValueError("reducedEnergyMatrix: sampled_states needs one entry per trajectory.")
+
+        order = np.argsort(sampled_states, kind="stable")
+        N_k = np.zeros(self.nStates, dtype=int)
+        for trajectory_index in order:
+            N_k[sampled_states[trajectory_index]] += self._n_frames(trajectories[trajectory_index])
+
+        if (out_path is None):
+            u_kn = np.empty((self.nStates, np.sum(N_k)))
+        else:
+            u_kn = np.lib.format.open_memmap(out_path, mode="w+", dtype=float, shape=(self.nStates, np.sum(N_k)))
+
+        # the chunks are read lazily, trajectory by trajectory in the order of the sampled states
+        chunks = (chunk for trajectory_index in order
+                  for chunk in self._iterate_positions(trajectories[trajectory_index], self.chunk_size))
+        beta = self.beta[:, np.newaxis]
+        start = 0
+        if (self.n_processes > 1):
+            with ProcessPoolExecutor(max_workers=self.n_processes, initializer=_initialize_worker,
+                                     initargs=(self.potentials,)) as executor:
+                # at most two chunks per process are submitted at once, to bound the memory
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(executor.submit(_evaluate_chunk_worker, chunk))
+                    if (len(pending) >= 2 * self.n_processes):
+                        energies = pending.popleft().result()
+                        u_kn[:, start:start + energies.shape[1]] = beta * energies
+                        start += energies.shape[1]
+                while (len(pending) > 0):
+                    energies = pending.popleft().result()
+                    u_kn[:, start:start + energies.shape[1]] = beta * energies
+                    start += energies.shape[1]
+        else:
+            for chunk in chunks:
+                u_kn[:, start:start + len(chunk)] = beta * self._evaluate_chunk(self.potentials, chunk)
+                start += len(chunk)
+
+        if (out_path is not None):
+            u_kn.flush()
+        return u_kn, N_k
@@ -0,0 +1,261 @@
+"""
+Streaming Free Energy:
+    This module contains online free energy estimators, that observe running simulations (see ensembler.system.observers).
+    Every every_step steps, they evaluate the potentials at the current position of the system and fold the result into
+    running sums. The free energy is available at any time, without storing the trajectory.
+
+    streamingZwanzig:   running log-sum-exp of the Zwanzig equation.
+    streamingBAR:       running Fermi sums of the BAR equation on a grid of free energy offsets, fed by two systems.
+"""
+import warnings
+
+import numpy as np
+from scipy import constants as const
+from scipy import special as s
+
+from ensembler.system.observers import _observerCls
+from ensembler.util.ensemblerTypes import systemCls as systemType, potentialCls as potentialType
+from ensembler.util.ensemblerTypes import Union, Iterable, Number, NoReturn
+
+
+def _beta(T: Number, k: Number, kT: bool, kJ: bool, kCal: bool) -> float:
+    if (kT):
+        return 1.0
+    elif (kJ):
+        k = const.k * const.Avogadro / 1000
+    elif (kCal):
+        k = const.k * const.Avogadro * 0.239005736 / 1000
+    return 1 / (k * T)
+
+
+class streamingZwanzig(_observerCls):
+    """
+    This class estimates the free energy difference between the sampled state I and a target state J with the Zwanzig
+    equation during a simulation. Add it as observer to the system sampling state I.
+
+    dF = - 1/beta ln(<e^(-beta(V_j-V_i))>_i)
+    """
+    name: str = "streaming Zwanzig"
+
+    def __init__(self, Vj: potentialType = None, Vi: potentialType = None, every_step: int = 1,
+                 T: Number = 298, k: Number = const.k * const.Avogadro, kT: bool = False, kJ: bool = False,
+                 kCal: bool = False):
+        """
+            __init__
+
+        Parameters
+        ----------
+        Vj: potentialType
+            potential of the target state J
+        Vi: potentialType, optional
+            potential of the sampled state I (default: None - the potential of the observed system)
+        every_step: int, optional
+            fold in the current position every n steps. (default: 1)
+        T: float, optional
+            Temperature in Kelvin, defaults to 298
+        k: float, optional
+            boltzmann Constant, defaults to const.k*const.Avogadro
+        kT: bool, optional
+            the energies are in units of $k_bT$
+        kJ: bool, optional
+            overwrites k to get the Boltzman constant with units kJ/(mol*K)
+        kCal: bool, optional
+            overwrites k to get the Boltzman constant with units kcal/(mol*K)
+        """
+        super().__init__(every_step=every_step)
+
+        self.Vi = Vi
+        self.Vj = Vj
+        self.beta = _beta(T=T, k=k, kT=kT, kJ=kJ, kCal=kCal)
+        self.reset()
+
+    def reset(self) -> NoReturn:
+        """
+            reset
+                forget all accumulated samples.
+        """
+        self.n_samples = 0
+        self._log_sum = -np.inf
+        self._log_sum_squares = -np.inf
+
+    def update(self, Vi: Union[Number, Iterable[Number]], Vj: Union[Number, Iterable[Number]]) -> NoReturn:
+        """
+            update
+                fold energies into the running sums.
+
+        Parameters
+        ----------
+        Vi: Union[Number, Iterable[Number]]
+            potential energies of state I while sampling state I
+        Vj: Union[Number, Iterable[Number]]
+            potential energies of state J while sampling state I
+        """
+        dV = -self.beta * (np.array(Vj, dtype=float, ndmin=1) - np.array(Vi, dtype=float, ndmin=1))
+        self.n_samples += len(dV)
+        self._log_sum = np.logaddexp(self._log_sum, s.logsumexp(dV))
+        self._log_sum_squares = np.logaddexp(self._log_sum_squares, s.logsumexp(2 * dV))
+
+    def observe(self, system: systemType) -> NoReturn:
+        """
+            observe
+                evaluates both potentials at the current position of the system and folds the energies into the
+                running sums.
+        """
+        Vi = self.Vi if (self.Vi is not None) else system.potential
+        self.update(Vi=Vi.ene(system._currentPosition), Vj=self.Vj.ene(system._currentPosition))
+
+    @property
+    def free_energy(self) -> float:
+        """
+        the current free energy estimate
+        """
+        if (self.n_samples == 0):
+            return np.nan
+        return float(-(self._log_sum - np.log(self.n_samples)) / self.beta)
+
+    @property
+    def error(self) -> float:
+        """
+        the current standard error estimate of the free energy (delta method, assumes uncorrelated samples)
+        """
+        if (self.n_samples < 2):
+            return np.nan
+        log_mean = self._log_sum - np.log(self.n_samples)
+        log_mean_squares = self._log_sum_squares - np.log(self.n_samples)
+        relative_variance = max(np.exp(log_mean_squares - 2 * log_mean) - 1, 0.0)
+        return float(np.sqrt(relative_variance / self.n_samples) / self.beta)
+
+
+class _streamingBARObserver(_observerCls):
+    """
+    observer feeding one of the two sampled states of a streamingBAR estimator.
+    """
+    name: str = "streaming BAR observer"
+
+    def __init__(self, estimator: "streamingBAR" = None, sampled_state: str = "i", every_step: int = 1):
+        super().__init__(every_step=every_step)
+        self.estimator = estimator
+        self.sampled_state = sampled_state
+
+    def observe(self, system: systemType) -> NoReturn:
+        current_position = system._currentPosition
+        Vi, Vj = self.estimator.Vi.ene(current_position), self.estimator.Vj.ene(current_position)
+        if (self.sampled_state == "i"):
+            self.estimator.update_forward(Vi_i=Vi, Vj_i=Vj)
+        else:
+            self.estimator.update_reverse(Vi_j=Vi, Vj_j=Vj)
+
+
+class streamingBAR:
+    """
+    This class estimates the free energy difference between the states I and J with the BAR method during two
+    simulations, one sampling state I and one sampling state J. Add observer_i as observer to the system sampling
+    state I and observer_j to the system sampling state J.
+
+    The Fermi sums depend on the unknown free energy difference. Therefore, they are accumulated on a grid of reduced
+    offsets y = beta*dF - ln(N_i/N_j), on which the BAR equation is solved by linear interpolation.
+    """
+    name: str = "streaming BAR"
+
+    def __init__(self, Vi: potentialType = None, Vj: potentialType = None, every_step: int = 1,
+                 dF_grid: Iterable[Number] = np.linspace(-50, 50, 1001),
+                 T: Number = 298, k: Number = const.k * const.Avogadro, kT: bool = False, kJ: bool = False,
+                 kCal: bool = False):
+        """
+            __init__
+
+        Parameters
+        ----------
+        Vi: potentialType
+            potential of state I
+        Vj: potentialType
+            potential of state J
+        every_step: int, optional
+            fold in the current positions of the systems every n steps. (default: 1)
+        dF_grid: Iterable[Number], optional
+            grid of free energy offsets in energy units, on which the Fermi sums are accumulated. It needs to
+            enclose the free energy difference, the spacing limits the accuracy. (default: np.linspace(-50, 50, 1001))
+        T: float, optional
+            Temperature in Kelvin, defaults to 298
+        k: float, optional
+            boltzmann Constant, defaults to const.k*const.Avogadro
+        kT: bool, optional
+            the energies are in units of $k_bT$
+        kJ: bool, optional
+            overwrites k to get the Boltzman constant with units kJ/(mol*K)
+        kCal: bool, optional
+            overwrites k to get the Boltzman constant with units kcal/(mol*K)
+        """
+        self.Vi = Vi
+        self.Vj = Vj
+        self.beta = _beta(T=T, k=k, kT=kT, kJ=kJ, kCal=kCal)
+        self._y_grid = self.beta * np.sort(np.array(dF_grid, dtype=float, ndmin=1))
+        self.reset()
+
+        self.observer_i = _streamingBARObserver(estimator=self, sampled_state="i", every_step=every_step)
+        self.observer_j = _streamingBARObserver(estimator=self, sampled_state="j", every_step=every_step)
+
+    def reset(self) -> NoReturn:
+        """
+            reset
+                forget all accumulated samples.
+        """
+        self.n_forward = 0
+        self.n_reverse = 0
+        self._log_fermi_sum_forward = np.full(len(self._y_grid), -np.inf)
+        self._log_fermi_sum_reverse = np.full(len(self._y_grid), -np.inf)
+
+    def update_forward(self, Vi_i: Union[Number, Iterable[Number]], Vj_i: Union[Number, Iterable[Number]]) -> NoReturn:
+        """
+            update_forward
+                fold energies of configurations sampled in state I into the Fermi sums.
+
+        Parameters
+        ----------
+        Vi_i: Union[Number, Iterable[Number]]
+            potential energies of state I while sampling state I
+        Vj_i: Union[Number, Iterable[Number]]
+            potential energies of state J while sampling state I
+        """
+        w_F = self.beta * (np.array(Vj_i, dtype=float, ndmin=1) - np.array(Vi_i, dtype=float, ndmin=1))
+        self.n_forward += len(w_F)
+        log_fermi = -np.logaddexp(0, w_F[:, None] - self._y_grid[None, :])
+        self._log_fermi_sum_forward = np.logaddexp(self._log_fermi_sum_forward, s.logsumexp(log_fermi, axis=0))
+
+    def update_reverse(self, Vi_j: Union[Number, Iterable[Number]], Vj_j: Union[Number, Iterable[Number]]) -> NoReturn:
+        """
+            update_reverse
+                fold energies of configurations sampled in state J into the Fermi sums.
+
+        Parameters
+        ----------
+        Vi_j: Union[Number, Iterable[Number]]
+            potential energies of state I while sampling state J
+        Vj_j: Union[Number, Iterable[Number]]
+            potential energies of state J while sampling state J
+        """
+        w_R = self.beta * (np.array(Vi_j, dtype=float, ndmin=1) - np.array(Vj_j, dtype=float, ndmin=1))
+        self.n_reverse += len(w_R)
+        log_fermi = -np.logaddexp(0, w_R[:, None] + self._y_grid[None, :])
+        self._log_fermi_sum_reverse = np.logaddexp(self._log_fermi_sum_reverse, s.logsumexp(log_fermi, axis=0))
+
+    @property
+    def free_energy(self) -> float:
+        """
+        the current free energy estimate
+        """
+        if (self.n_forward == 0 or self.n_reverse == 0):
+            return np.nan
+
+        # the BAR residual is monotonically increasing in y
+        residual = self._log_fermi_sum_forward - self._log_fermi_sum_reverse
+        above = np.flatnonzero(residual >= 0)
+        if (len(above) == 0 or above[0] == 0):
+            warnings.warn("streamingBAR: the free energy difference is not enclosed by dF_grid.")
+            return np.nan
+
+        upper = above[0]
+        lower = upper - 1
+        y = self._y_grid[lower] - residual[lower] * (self._y_grid[upper] - self._y_grid[lower]) / (
+                residual[upper] - residual[lower])
+        return float((y + np.log(self.n_forward / self.n_reverse)) / self.beta)
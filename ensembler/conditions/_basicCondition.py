@@ -4,7 +4,7 @@ Module: Conditions
 """
 
 from ensembler.util.basic_class import _baseClass, notImplementedERR
-from ensembler.util.ensemblerTypes import systemCls as systemType, NoReturn
+from ensembler.util.ensemblerTypes import systemCls as systemType, NoReturn, Callable, Union
 
 
 class _conditionCls(_baseClass):
@@ -85,6 +85,20 @@ class _conditionCls(_baseClass):
         """
         notImplementedERR()
 
+    def _kernel(self) -> Union[Callable, None]:
+        """
+            _kernel
+                returns the condition as function for the fast simulation path of system.simulate(kernel=True).
+                The function maps (step, position, velocity) to the new (position, velocity). Only stateless
+                conditions, that act on the position and velocity alone, can provide a kernel.
+
+        Returns
+        -------
+        Union[Callable, None]
+            the kernel function or None, if the condition needs the coupled system.
+        """
+        return None
+
     def couple_system(self, system: systemType) -> NoReturn:
         """
             Couple the given system to the condition.
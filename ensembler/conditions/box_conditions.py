@@ -1,7 +1,7 @@
 import numpy as np
 
 from ensembler.conditions._basicCondition import _conditionCls
-from ensembler.util.ensemblerTypes import systemCls as systemType, Iterable, Number, Union
+from ensembler.util.ensemblerTypes import systemCls as systemType, Iterable, Number, Union, Callable
 
 
 class _boundaryCondition(_conditionCls):
@@ -113,15 +113,22 @@ class periodicBoundaryCondition(_boundaryCondition):
         self._parse_boundary(boundary)
 
 
+    @property
+    def box_length(self) -> np.array:
+        """
+        the length of the box in each dimension.
+        """
+        return self.higherbounds - self.lowerbounds
+
     def apply(self, current_position: Union[Iterable[Number], Number]) -> Union[Iterable[Number], Number]:
         """
-        apply the periodic boundary condition
+        apply the periodic boundary condition. Positions outside of the box are shifted by one box length. The last
+        axis of multiple positions (e.g. walkers or particles) is the dimension, in one dimension any shape is accepted.
+
         Parameters
         ----------
         current_position: Union[Iterable[Number], Number]
             current system position
-        current_velocity: Union[Iterable[Number], Number]
-            current systems velocity
         Returns
         -------
         Union[Iterable[Number], Number]
@@ -130,18 +137,36 @@ class periodicBoundaryCondition(_boundaryCondition):
         """
         if self.verbose: print("periodic boundary_condition: before: ", current_position)
         current_position = np.array(current_position, ndmin=1)
-        for dim in range(self.nDim):
-            if (current_position[dim] < self.lowerbounds[dim]):
-                if self.verbose: print("LOWER")
-                current_position[dim] = self.higherbounds[dim] - (self.lowerbounds[dim] - current_position[dim])
+        if (self.nDim == 1):
+            lowerbounds, higherbounds = self.lowerbounds[0], self.higherbounds[0]
+        else:
+            lowerbounds, higherbounds = self.lowerbounds, self.higherbounds
 
-            elif (current_position[dim] > self.higherbounds[dim]):
-                if self.verbose: print("UPPER")
-                current_position[dim] = self.lowerbounds[dim] + (current_position[dim] - self.higherbounds[dim])
-            if self.verbose: print("periodic boundary_condition: after: ", current_position)
+        current_position = np.where(current_position < lowerbounds,
+                                    higherbounds - (lowerbounds - current_position),
+                                    np.where(current_position > higherbounds,
+                                             lowerbounds + (current_position - higherbounds), current_position))
 
+        if self.verbose: print("periodic boundary_condition: after: ", current_position)
         return current_position
 
+    def minimum_image(self, displacements: Union[Iterable[Number], Number]) -> Union[Iterable[Number], Number]:
+        """
+        maps displacement vectors to their shortest periodic image. The last axis is the dimension.
+
+        Parameters
+        ----------
+        displacements: Union[Iterable[Number], Number]
+            displacement vectors between positions
+
+        Returns
+        -------
+        Union[Iterable[Number], Number]
+            displacements of the nearest images
+        """
+        box_length = self.box_length[0] if (self.nDim == 1) else self.box_length
+        return displacements - box_length * np.round(displacements / box_length)
+
     def apply_coupled(self):
         """
         Applies the box Condition to the coupled system.
@@ -149,3 +174,16 @@ class periodicBoundaryCondition(_boundaryCondition):
         if (self.system.step % self._tau == 0):
             newCurrentPosition = self.apply(current_position=self.system._currentPosition)
             self.system._currentPosition = np.squeeze(newCurrentPosition)
+
+    def _kernel(self) -> Callable:
+        """
+        the periodic boundary condition for the fast simulation path of system.simulate(kernel=True).
+        """
+        tau, apply = self._tau, self.apply
+
+        def kernel(step: int, position: Union[Iterable[Number], Number], velocity: Union[Iterable[Number], Number]):
+            if (step % tau == 0):
+                position = np.squeeze(apply(current_position=position))
+            return position, velocity
+
+        return kernel
@@ -1,6 +1,5 @@
 import warnings
 
-import numpy as np
 from scipy import constants as const
 from scipy.stats import maxwell
 
@@ -101,8 +100,7 @@ class andersonThermostat(thermostat):
 
     def _collision(self) -> bool:
         p_collision = (2 * self.a * self.k) / (3 * self.kb * self.N_dens ** (1 / 3) * self.N ** (2 / 3))
-        options = [True, False]
-        collision = np.random.choice(a=options, p=(p_collision, 1 - p_collision))
+        collision = self.system.rng.random() < p_collision
         return collision
 
     def _rescale_velocities(self):
@@ -113,7 +111,8 @@ class andersonThermostat(thermostat):
     def _calculate_scaling_factor(self):
         # pick new temperature randomly
         self._new_temperature = maxwell.rvs(loc=self.temperature - self.temperature_noise_range,
-                                            scale=self.temperature_noise_range)
+                                            scale=self.temperature_noise_range,
+                                            random_state=self.system.rng.generator)
         self._currentTemperature = (
             self.system._currentTemperature if (self.system._currentTemperature != 0) else 0.000001)
         self.system._currentTemperature = self._new_temperature
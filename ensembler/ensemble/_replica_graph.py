@@ -17,6 +17,9 @@ import multiprocessing as mult
 
 from ensembler.ensemble import exchange_pattern
 from ensembler.util.basic_class import _baseClass
+from ensembler.util.checkpoint import stack_states, unstack_states
+from ensembler.util.random_stream import randomStream
+from ensembler.util.profiling import simulationProfile
 from ensembler.util.ensemblerTypes import systemCls, List, Dict, Tuple, Iterable, Union, NoReturn, Number
 
 
@@ -31,6 +34,7 @@ class _mutliReplicaApproach(_baseClass):
     exchange_dimensions: Dict
 
     ### NODES - Replicas
+    rng: randomStream  # random stream of the ensemble, the replicas get independent streams
 
 
     """
@@ -270,6 +274,89 @@ class _mutliReplicaApproach(_baseClass):
         self._replicas: dict = {}
         self._nReplicas: int = None
         self._replica_graph_dimensions: int = None
+        self.profile: simulationProfile = None  # ensemble phases (e.g. exchange), filled by simulate(profile=True)
+
+    def _checkpoint_state(self) -> Dict:
+        """
+        the checkpoint of an ensemble contains its random stream and the checkpoints of all replicas (including their
+        replicaID, which is exchanged), stacked per attribute.
+        """
+        state = super()._checkpoint_state()
+        replica_states = []
+        for replica_key in sorted(self.replicas):
+            replica = self.replicas[replica_key]
+            replica_state = replica._checkpoint_state()
+            if (hasattr(replica, "replicaID")):
+                replica_state["replicaID"] = replica.replicaID
+            replica_states.append(replica_state)
+        state["replicas"] = stack_states(replica_states)
+        state["rng"] = self.rng.get_state()
+        return state
+
+    def _restore_checkpoint_state(self, state: Dict):
+        """
+        restores the replicas of the ensemble. The ensemble needs to be constructed with the same replicas.
+        """
+        if (len(self.replicas) != len(list(state["replicas"].values())[0])):
+            raise IOError("The checkpoint contains " + str(len(list(state["replicas"].values())[0])) +
+                          " replicas, but the ensemble has " + str(len(self.replicas)) + " replicas.")
+        super()._restore_checkpoint_state(state)
+        self.rng.set_state(state["rng"])
+        for replica_key, replica_state in zip(sorted(self.replicas), unstack_states(state["replicas"], len(self.replicas))):
+            if ("replicaID" in replica_state):
+                self.replicas[replica_key].replicaID = replica_state.pop("replicaID")
+            self.replicas[replica_key]._restore_checkpoint_state(replica_state)
+
+    def get_profile_report(self, per_replica: bool = False) -> pd.DataFrame:
+        """
+            get_profile_report
+                the counts and times of the simulations with profile=True, aggregated over all replicas and the
+                ensemble phases (e.g. the exchanges).
+
+        Parameters
+        ----------
+        per_replica: bool, optional
+            return one report per replica and the ensemble, marked by the column replica (None for the ensemble
+            phases), instead of the sum. (default: False)
+
+        Returns
+        -------
+        pd.DataFrame
+            one row per simulation phase and per potential class and function (see simulationProfile.report)
+        """
+        profiles = {replica_key: replica.profile for replica_key, replica in self.replicas.items()
+                    if (replica.profile is not None)}
+        if (self.profile is not None):
+            profiles[None] = self.profile
+
+        if (per_replica):
+            reports = []
+            for replica_key, profile in profiles.items():
+                report = profile.report()
+                report.insert(0, "replica", replica_key)
+                reports.append(report)
+            if (len(reports) == 0):
+                report = simulationProfile().report()
+                report.insert(0, "replica", None)
+                return report
+            return pd.concat(reports, ignore_index=True)
+        return simulationProfile().merge(profiles.values()).report()
+
+    def set_trajectory_retention(self, policy: str = "all", n_frames: int = None) -> NoReturn:
+        """
+            set_trajectory_retention
+                sets the trajectory retention policy of all replicas, e.g. to bound the memory of long simulations
+                (see system.set_trajectory_retention).
+
+        Parameters
+        ----------
+        policy: str, optional
+            all, none, last, stride or reservoir (default: all)
+        n_frames: int, optional
+            number of kept states per replica for last, stride and reservoir (default: None)
+        """
+        for replica in self.replicas.values():
+            replica.set_trajectory_retention(policy=policy, n_frames=n_frames)
 
     ##init funcs
     def _initialise_replica_graph(self, verbose: bool = False)->NoReturn:
@@ -346,6 +433,15 @@ class _mutliReplicaApproach(_baseClass):
         #    copy.deepcopy(self.system)
         replicas = [copy.deepcopy(self.system) for x in range(self.nReplicas)]  # generate deepcopies
 
+        # independent random streams for the ensemble and each replica
+        self.rng, *replica_streams = self.system.rng.spawn(self.nReplicas + 1)
+        for replica, replica_stream in zip(replicas, replica_streams):
+            replica.rng = replica_stream
+            replica.profile = None
+            if (replica.trajectory_retention == "reservoir"):
+                # independent subsamples of the replicas
+                replica.set_trajectory_retention("reservoir", replica._trajectory.n_frames)
+
         # build up graph - set parameters
         replicaID = 0
         for coords, replica in zip(coordinates, replicas):
@@ -386,6 +482,7 @@ class _replicaExchange(_mutliReplicaApproach):
     _currentTrial: int
     _exchange_pattern: exchange_pattern.Exchange_pattern = None
     nSteps_between_trials: int
+    _checkpoint_attributes = ("_currentTrial", "nSteps_between_trials")
 
 
     ###METROPOLIS CRITERION
@@ -399,7 +496,7 @@ class _replicaExchange(_mutliReplicaApproach):
     _randomness_factor = 0.1
     _temperature_exchange: float = 298
     _default_randomness = lambda self, originalParams, swappedParams: (
-            (1 / self._randomness_factor) * np.random.rand() <= np.exp(
+            (1 / self._randomness_factor) * self.rng.random() <= np.exp(
         -1.0 / (const.gas_constant / 1000.0 * self._temperature_exchange) * (
                 originalParams - swappedParams + 0.0000001)))  # pseudo count, if params are equal
 
@@ -468,7 +565,8 @@ class _replicaExchange(_mutliReplicaApproach):
         self._initialise_replica_graph()
         self._init_exchanges()
 
-    def simulate(self, ntrials: int, steps_between_trials: int = None, reset_ensemble: bool = False)->Dict[str, namedtuple]:
+    def simulate(self, ntrials: int, steps_between_trials: int = None, reset_ensemble: bool = False,
+                 profile: bool = False)->Dict[str, namedtuple]:
         """
         simulates the replica exchange approach by executing ntrials with x steps between the trials.
 
@@ -480,6 +578,8 @@ class _replicaExchange(_mutliReplicaApproach):
             steps between the exchange trials (Default: None - use object attribute value)
         reset_ensemble: bool,  optional
             reset the ensemble to start (default: false)
+        profile: bool, optional
+            profile the replica simulations and the exchanges, see get_profile_report (default: False)
 
         Returns
         -------
@@ -497,18 +597,35 @@ class _replicaExchange(_mutliReplicaApproach):
         if (isinstance(steps_between_trials, int)):
             self.set_simulation_steps_between_trials(nsteps=steps_between_trials)
 
+        exchange = self.exchange
+        if (profile):
+            if (self.profile is None):
+                self.profile = simulationProfile()
+            exchange = self.profile.timed("exchange", exchange)
+
         for _ in tqdm(range(ntrials), desc="Running trials", leave=True):
-            self.run()
-            self.exchange()
+            self.run(profile=profile)
+            exchange()
         return self.get_replicas_current_states()
 
+    def _checkpoint_state(self) -> Dict:
+        state = super()._checkpoint_state()
+        state["exchange_offset"] = getattr(self._exchange_pattern, "exchange_offset", None)
+        return state
+
+    def _restore_checkpoint_state(self, state: Dict):
+        super()._restore_checkpoint_state(state)
+        self.set_simulation_steps_between_trials(self.nSteps_between_trials)
+        if (state.get("exchange_offset") is not None):
+            self._exchange_pattern.exchange_offset = state["exchange_offset"]
+
     def exchange(self)->NoReturn:
         """
         Try to exchange the replica nodes according to the exchange pattern.
         """
         self._exchange_pattern.exchange(verbose=self.verbose)
 
-    def run(self, verbosity: bool = False)->NoReturn:
+    def run(self, verbosity: bool = False, profile: bool = False)->NoReturn:
         """
             run simulation for all replicas
 
@@ -516,11 +633,13 @@ class _replicaExchange(_mutliReplicaApproach):
         ----------
         verbosity: bool, optional
             MORE Output!
+        profile: bool, optional
+            profile the replica simulations (default: False)
 
         """
         for replica_coords, replica in self.replicas.items():
             replica.simulate(steps=self.nSteps_between_trials, withdraw_traj=False, init_system=False,
-                             verbosity=verbosity)
+                             verbosity=verbosity, profile=profile)
 
     def _run_parallel(self, verbosity: bool = False, nProcesses: int = 4)->NoReturn:
         """
@@ -13,6 +13,7 @@ from ensembler.ensemble._replica_graph import _mutliReplicaApproach
 from ensembler.samplers import stochastic
 from ensembler.system import perturbed_system
 from ensembler.util.ensemblerTypes import systemCls, Dict, Tuple, NoReturn
+from ensembler.util.profiling import simulationProfile
 
 
 class conveyorBelt(_mutliReplicaApproach):
@@ -27,6 +28,8 @@ class conveyorBelt(_mutliReplicaApproach):
     replica_graph_dimensions: int = 1
     exchange_dimensions: Dict[str, np.array]
     nSteps_between_trials: int = 1
+    _checkpoint_attributes = ("_currentTrial", "reject", "capital_lambda", "mem", "biasene", "num_gp", "mem_fc",
+                              "gp_spacing", "nSteps_between_trials")
 
     exchange_information: pd.DataFrame = pd.DataFrame(columns=["Step", "capital_lambda", "TotE", "biasE", "doAccept"])
     system_trajs: dict = {}
@@ -40,7 +43,7 @@ class conveyorBelt(_mutliReplicaApproach):
     _randomness_factor = 0.1
     _temperature_exchange: float = 298
     _default_randomness = lambda self, originalParams, swappedParams: (
-            (1 / self._randomness_factor) * np.random.rand() <= np.exp(
+            (1 / self._randomness_factor) * self.rng.random() <= np.exp(
         -1.0 / (const.gas_constant / 1000.0 * self._temperature_exchange) * (
                 originalParams - swappedParams + 0.0000001)))  # pseudo count, if params are equal
 
@@ -157,7 +160,8 @@ class conveyorBelt(_mutliReplicaApproach):
                  ntrials: int,
                  nSteps_between_trials: int = 1,
                  reset_ensemble: bool = False,
-                 verbosity: bool = True):
+                 verbosity: bool = True,
+                 profile: bool = False):
         """
             Integrates the conveyor belt ensemble
 
@@ -171,6 +175,8 @@ class conveyorBelt(_mutliReplicaApproach):
             reset ensemble for starting the simulation? (Default: False)
         verbosity: bool, optional
             verbose output? (Default: False)
+        profile: bool, optional
+            profile the replica simulations and the conveyor belt moves, see get_profile_report (Default: False)
 
         Returns
         -------
@@ -181,23 +187,29 @@ class conveyorBelt(_mutliReplicaApproach):
         if (isinstance(nSteps_between_trials, int)):
             self.set_simulation_n_steps_between_trials(n_steps=nSteps_between_trials)
 
+        accept_move = self.accept_move
+        if (profile):
+            if (self.profile is None):
+                self.profile = simulationProfile()
+            accept_move = self.profile.timed("accept_move", accept_move)
+
         self.__tmp_exchange_traj = []
         for _ in tqdm(range(ntrials), desc="Trials: ", mininterval=1.0, leave=verbosity):
-            self.accept_move()
-            self.run()
+            accept_move()
+            self.run(profile=profile)
 
         self.exchange_information = pd.concat([self.exchange_information, pd.DataFrame(self.__tmp_exchange_traj)],ignore_index=True)
 
         # self.exchange_information = self.exchange_information
 
-    def run(self, verbosity: bool = False) -> NoReturn:
+    def run(self, verbosity: bool = False, profile: bool = False) -> NoReturn:
         """
                 Integrates the systems of the ensemble for the :var:nSteps_between_trials.
         """
 
         self._currentTrial += 1
         for replica_coords, replica in self.replicas.items():
-            replica.simulate(steps=self.nSteps_between_trials, verbosity=verbosity)
+            replica.simulate(steps=self.nSteps_between_trials, verbosity=verbosity, profile=profile)
 
     def accept_move(self) -> NoReturn:
         """
@@ -212,7 +224,7 @@ class conveyorBelt(_mutliReplicaApproach):
         oldBiasene = self.biasene
         oldBlam = self.capital_lambda
 
-        self.capital_lambda += (np.random.rand() * 2.0 - 1.0) * np.pi / 4.0
+        self.capital_lambda += (self.rng.random() * 2.0 - 1.0) * np.pi / 4.0
         self.capital_lambda = self.capital_lambda % (2.0 * np.pi)
         self.update_all_lambda(self.capital_lambda)
 
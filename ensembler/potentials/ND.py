@@ -4,12 +4,15 @@ Module: Potential
      This module contains all available potentials.
 """
 
+import itertools
+
 import numpy as np
 import sympy as sp
 from ensembler.util import ensemblerTypes as t
-from ensembler.util.ensemblerTypes import  Number, Union, Iterable
+from ensembler.util.ensemblerTypes import  Number, Union, Iterable, Tuple
 # Base Classes
-from ensembler.potentials._basicPotentials import _potentialNDCls
+from ensembler.potentials._basicPotentials import _potentialNDCls, _compositePotentialCls
+from ensembler.potentials import OneD
 
 class harmonicOscillatorPotential(_potentialNDCls):
     """
@@ -74,11 +77,16 @@ class envelopedPotential(_potentialNDCls):
 
     Here N-states are coupled by the log-sum-exp resulting in a new reference state $V_R$,
 
-    $V_R = -1/{\beta} * \ln(\sum_i^Ne^(-\beta*s*(V_i-E^R_i)))$
+    $V_R = -1/{\beta*s_0} * \ln(\sum_i^Ne^(-\beta*s_i*(V_i-E^R_i)))$
+
+    Each state can have its own smoothing parameter s_i. The energies and forces are calculated from the stacked
+    (positions x states) energy matrix.
 
     This potential coupling is for example used in EDS.
     """
     name = "Enveloping Potential"
+    _checkpoint_attributes = ("_s", "_Eoff_i")
+    force_sign: float = -1.0
 
     T, kb, position = sp.symbols("T kb r")
     beta = 1 / (kb * T)
@@ -145,10 +153,7 @@ class envelopedPotential(_potentialNDCls):
         # also make sure that states are up to work:
         [V._update_functions() for V in self.V_is]
 
-        if (all([self.s_i[0] == s for s in self.s_i[1:]])):
-            self.ene = self._calculate_energies_singlePos_overwrite_oneS
-        else:
-            self.ene = self._calculate_energies_singlePos_overwrite_multiS
+        self.ene = self._calculate_energies_singlePos_overwrite
         self.force = self._calculate_dvdpos_singlePos_overwrite
 
     @property
@@ -265,111 +270,99 @@ class envelopedPotential(_potentialNDCls):
                 len(s)) + "\t states in Vi" + str(len(self.V_is)))
         self._update_functions()
 
-    def _calculate_energies_singlePos_overwrite_multiS(self, positions) -> np.array:
-        sum_prefactors, _ = self._logsumexp_calc_gromos(positions)
-        beta = self.constants[self.T] * self.constants[self.kb]  # kT - *self.constants[self.T]
-        Vr = (-1 / (beta)) * sum_prefactors
-        return np.squeeze(Vr)
+    def _state_energies(self, positions) -> np.array:
+        """
+        stacked energies of all states.
+
+        Parameters
+        ----------
+        positions
+
+        Returns
+        -------
+        np.array
+            energy matrix - shape (nPositions, nStates)
+        """
+        energies = [np.reshape(V.ene(positions), -1) for V in self.V_is]
+        n_positions = max(len(V) for V in energies)
+        return np.stack([np.broadcast_to(V, n_positions) for V in energies], axis=1)
 
-    def _calculate_energies_singlePos_overwrite_oneS(self, positions) -> np.array:
+    def _calculate_energies_singlePos_overwrite(self, positions) -> np.array:
         sum_prefactors, _ = self._logsumexp_calc(positions)
-        beta = self.constants[self.T] * self.constants[self.kb]
+        beta = 1 / (self.constants[self.T] * self.constants[self.kb])
         Vr = (-1 / (beta * self.s_i[0])) * sum_prefactors
-        return np.squeeze(Vr)
+        return np.squeeze(Vr)[()]
 
     def _calculate_dvdpos_singlePos_overwrite(self, positions: (t.Iterable[float])) -> np.array:
         """
+        the forces are the state forces weighted by their contribution to the reference state and s_i/s_0.
+
         Parameters
         ----------
         positions
 
         Returns
         -------
-
+        np.array
+            forces - shape (nPositions, nDimensions), squeezed
         """
-        positions = np.array(positions, ndmin=2)
-        # print("Pos: ", position)
-
-        V_R_part, V_Is_ene = self._logsumexp_calc_gromos(positions)
-        V_R_part = np.array(V_R_part, ndmin=2).T
-        # print("V_R_part: ", V_R_part.shape, V_R_part)
-        # print("V_I_ene: ",V_Is_ene.shape, V_Is_ene)
-        V_Is_dhdpos = np.array([-statePot.force(positions) for statePot in self.V_is], ndmin=1).T
-        # print("V_I_force: ",V_Is_dhdpos.shape, V_Is_dhdpos)
-
-        adapt = np.concatenate([V_R_part for s in range(self.constants[self.nStates])], axis=1)
-        # print("ADAPT: ",adapt.shape, adapt)
-        scaling = np.exp(V_Is_ene - adapt)
-        # print("scaling: ", scaling.shape, scaling)
-        dVdpos_state = np.multiply(scaling,
-                                   V_Is_dhdpos)  # np.array([(ene/V_R_part) * force for ene, force in zip(V_Is_ene, V_Is_dhdpos)])
-        # print("state_contributions: ",dVdpos_state.shape, dVdpos_state)
-        dVdpos = np.sum(dVdpos_state, axis=1)
-        # print("forces: ",dVdpos.shape, dVdpos)
+        sum_prefactors, prefactors = self._logsumexp_calc(positions)
+        s_i = np.array(self.s_i, dtype=float)
+        weights = np.exp(prefactors - sum_prefactors[:, None]) * (s_i / s_i[0])[None, :]
+
+        n_positions = prefactors.shape[0]
+        V_Is_dhdpos = []
+        for statePot in self.V_is:
+            dhdpos = -np.array(statePot.force(positions), dtype=float)
+            if (dhdpos.ndim == 0):  # constant state forces
+                dhdpos = np.broadcast_to(dhdpos, n_positions)
+            V_Is_dhdpos.append(np.reshape(dhdpos, (n_positions, -1)))
+        dVdpos = np.sum(weights[:, :, None] * np.stack(V_Is_dhdpos, axis=1), axis=1)
 
         return np.squeeze(dVdpos)
 
-    def _logsumexp_calc(self, position):
-        prefactors = []
-        beta = self.constants[self.T] * self.constants[self.kb]
-        for state in range(self.constants[self.nStates]):
-            prefactor = np.array(-beta * self.s_i[state] * (self.V_is[state].ene(position) - self.Eoff_i[state]),
-                                 ndmin=1).T
-            prefactors.append(prefactor)
-        prefactors = np.array(prefactors, ndmin=2).T
-
-        from scipy.special import logsumexp
-        # print("Prefactors", prefactors)
-        sum_prefactors = logsumexp(prefactors, axis=1)
-        # print("logexpsum: ", np.squeeze(sum_prefactors))
-
-        return np.squeeze(sum_prefactors), np.array(prefactors, ndmin=2).T
-
-    def _logsumexp_calc_gromos(self, position):
+    def _logsumexp_calc(self, positions, state_energies: np.array = None):
         """
-        code from gromos:
+        log-sum-exp of the stacked state prefactors -beta*s_i*(V_i-E^R_i).
 
         Parameters
         ----------
-        position
+        positions
+        state_energies: np.array, optional
+            energies of all states at the positions, if already evaluated (see _state_energies)
 
         Returns
         -------
-
+        Tuple[np.array, np.array]
+            log-sum-exp - shape (nPositions), prefactors - shape (nPositions, nStates)
         """
-        prefactors = []
-        beta = self.constants[self.T] * self.constants[self.kb]  # kT - *self.constants[self.T]
-        partA = np.array(-beta * self.s_i[0] * (self.V_is[0].ene(position) - self.Eoff_i[0]), ndmin=1)
-        partB = np.array(-beta * self.s_i[1] * (self.V_is[1].ene(position) - self.Eoff_i[1]), ndmin=1)
+        if (state_energies is None):
+            state_energies = self._state_energies(positions)
+        beta = 1 / (self.constants[self.T] * self.constants[self.kb])
+        prefactors = -beta * np.array(self.s_i, dtype=float)[None, :] * (
+                state_energies - np.array(self.Eoff_i, dtype=float)[None, :])
 
-        partAB = np.array([partA, partB]).T
-        log_prefac = 1 + np.exp(np.min(partAB, axis=1) - np.max(partAB, axis=1))
-        sum_prefactors = np.max(partAB, axis=1) + np.log(log_prefac)
-
-        prefactors.append(partA)
-        prefactors.append(partB)
+        from scipy.special import logsumexp
+        return logsumexp(prefactors, axis=1), prefactors
 
-        # more than two states!
-        for state in range(2, self.constants[self.nStates]):
-            partN = np.array(-beta * self.s_i[state] * (self.V_is[state].ene(position) - self.Eoff_i[state]), ndmin=1)
-            prefactors.append(partN)
-            sum_prefactors = np.max([sum_prefactors, partN], axis=1) + np.log(1 + np.exp(
-                np.min([sum_prefactors, partN], axis=1) - np.max([sum_prefactors, partN], axis=1)))
-            # print("prefactors: ", sum_prefactors)
-        return sum_prefactors, np.array(prefactors, ndmin=2).T
 
 class lambdaEDSPotential(envelopedPotential):
     """
     This implementation of exponential Coupling combined with linear compling is called $\lambda$-EDS the implementation of function is more numerical robust to the hybrid coupling class.
 
 
-    Here two-states are coupled by the log-sum-exp and weighted by lambda resulting in a new reference state $V_R$,
+    Here N-states are coupled by the log-sum-exp and weighted by lambda resulting in a new reference state $V_R$,
 
-    $V_R = -\frac{1}{\beta*s} * \ln(\lambda * e^(-\beta*s*(V_A-E^R_A)) + (1-\lambda)*e^(-\beta*s*(V_B-E^R_B)))$
+    $V_R = -1/{\beta*s_0} * \ln(\sum_i^N \lambda_i * e^(-\beta*s_i*(V_i-E^R_i)))$
+
+    For two states, a single lambda gives the weights $\lambda$ and $1-\lambda$. For more states, either a weight per
+    state is given, or a single lambda weights the first state and $1-\lambda$ is split evenly over the other states.
+    With ene_lambda_grid, the energies of a whole grid of lambdas can be calculated at once.
 
     This potential coupling is for example used in $\lambda$-EDS.
     """
     name: str = "lambda enveloped Potential"
+    _checkpoint_attributes = ("_s", "_Eoff_i", "_lam_i")
 
     T, kb, position = sp.symbols("T kb r")
     beta = 1 / (kb * T)
@@ -436,69 +429,79 @@ class lambdaEDSPotential(envelopedPotential):
 
     @lam_i.setter
     def lam_i(self, lam: Union[Number, Iterable[Number]]):
-        if (isinstance(lam, Number) and self.constants[self.nStates] == 2):
-            self._lam_i = np.array([lam] + [1 - lam for x in range(1, self.constants[self.nStates])], ndmin=1)
-            lamis = {"lam_" + str(i): self.lam_i[i] for i in range(self.constants[self.nStates])}
-            self.constants.update({**lamis})
-        elif (isinstance(lam, Number)):
-            self._lam_i = np.array([1 / self.constants[self.nStates] for x in range(self.constants[self.nStates])],
-                                   ndmin=1)
-            lamis = {"lam_" + str(i): self.lam_i[i] for i in range(self.constants[self.nStates])}
-            self.constants.update({**lamis})
-        elif (len(lam) == self.constants[self.nStates]):
-            raise NotImplementedError("Currently Only one lam runs supported!")
-            # self._lam_i = np.array(lam, ndmin=1)
-            # self.constants.update({self.lamis: self._lam_i})
+        self._lam_i = self._lambda_vector(lam)
+        lamis = {"lam_" + str(i): self.lam_i[i] for i in range(self.constants[self.nStates])}
+        self.constants.update({**lamis})
+
+    def _lambda_vector(self, lam: Union[Number, Iterable[Number]]) -> np.array:
+        """
+            _lambda_vector
+                translates a lambda into the weights of all states. A single lambda is the weight of the first state,
+                the remaining weight 1-lambda is split evenly over the other states.
+
+        Parameters
+        ----------
+        lam: Union[Number, Iterable[Number]]
+            a single lambda or one weight per state
+
+        Returns
+        -------
+        np.array
+            weights of the states - shape (nStates)
+        """
+        nStates = self.constants[self.nStates]
+        if (isinstance(lam, Number)):
+            lam_i = np.array([lam] + [(1 - lam) / (nStates - 1) for x in range(1, nStates)], dtype=float, ndmin=1)
+        elif (len(lam) == nStates):
+            lam_i = np.array(lam, dtype=float, ndmin=1)
         else:
-            raise IOError("s Vector/Number and state potentials don't have the same length!\n states in s " + str(
-                lam) + "\t states in Vi" + str(len(self.V_is)))
+            raise IOError("lam Vector/Number and state potentials don't have the same length!\n states in lam " + str(
+                len(lam)) + "\t states in Vi" + str(nStates))
 
-    def _calculate_energies_singlePos_overwrite(self, position) -> np.array:
-        # print("Positions: ",position)
-        # print("s_i: ",self.s_i)
-        sum_prefactors, _ = self._logsumexp_calc(position)
-        beta = self.constants[self.T] * self.constants[self.kb]  # kT - *self.constants[self.T]
-        Vr = (-1 / (beta * self.s_i[0])) * sum_prefactors
-        # print("finalVR", Vr)
-        return np.squeeze(Vr)
+        if (np.any(lam_i < 0)):
+            raise ValueError("The lambda weights of the states need to be positive! Got: " + str(lam_i))
+        return lam_i
 
-    def _calculate_dvdpos_singlePos_overwrite(self, positions: (t.Iterable[float])) -> np.array:
-        positions = np.array(positions, ndmin=2)
-        # print("Pos: ", position)
-        V_R_part, V_Is_ene = self._logsumexp_calc(positions)
-        # print("V_I_ene: ",V_Is_ene.shape, V_Is_ene)
-        V_R_part = np.array(V_R_part, ndmin=2).T
-        # print("V_R_part: ", V_R_part.shape, V_R_part)
-        V_Is_dhdpos = np.array([-statePot.force(positions) for statePot in self.V_is], ndmin=1).T
-        # print("V_I_force: ",V_Is_dhdpos.shape, V_Is_dhdpos)
-        adapt = np.concatenate([V_R_part for s in range(self.constants[self.nStates])], axis=1).T
-        # print("ADAPT: ",adapt.shape, adapt)
-        # print(self.lam_i)
-        scaling = (np.array(self.lam_i, ndmin=2).T * (np.exp(V_Is_ene - adapt))).T
-
-        # print("scaling: ", scaling.shape, scaling)
-        dVdpos_state = scaling * V_Is_dhdpos
-        # print("state_contributions: ",dVdpos_state.shape, dVdpos_state)
-        dVdpos = np.sum(dVdpos_state, axis=1)
-        # print("forces: ",dVdpos.shape, dVdpos)
+    def _logsumexp_calc(self, positions, state_energies: np.array = None):
+        """
+        log-sum-exp of the state prefactors -beta*s_i*(V_i-E^R_i), weighted by lambda_i.
+        The returned prefactors contain the weights as ln(lambda_i), such that the energies and forces of the
+        enveloped potential apply.
+        """
+        sum_prefactors, prefactors = super()._logsumexp_calc(positions, state_energies=state_energies)
+        with np.errstate(divide="ignore"):
+            prefactors = prefactors + np.log(self.lam_i)[None, :]
 
-        return np.squeeze(dVdpos)
+        from scipy.special import logsumexp
+        return logsumexp(prefactors, axis=1), prefactors
+
+    def ene_lambda_grid(self, positions, lambdas: Iterable[Union[Number, Iterable[Number]]]) -> np.array:
+        """
+            ene_lambda_grid
+                calculates the energies for a grid of lambdas at once. The state energies are evaluated only once.
+
+        Parameters
+        ----------
+        positions
+            positions to evaluate
+        lambdas: Iterable[Union[Number, Iterable[Number]]]
+            lambdas of the grid, each either a single lambda or one weight per state
 
-    def _logsumexp_calc(self, position):
-        prefactors = []
-        beta = self.constants[self.T] * self.constants[self.kb]
-        for state in range(self.constants[self.nStates]):
-            prefactor = np.array(-beta * self.s_i[state] * (self.V_is[state].ene(position) - self.Eoff_i[state]),
-                                 ndmin=1).T
-            prefactors.append(prefactor)
-        prefactors = np.array(prefactors, ndmin=2).T
+        Returns
+        -------
+        np.array
+            energies - shape (nLambda, nPositions)
+        """
+        lam_i = np.array([self._lambda_vector(lam) for lam in lambdas], ndmin=2)
+        _, prefactors = super()._logsumexp_calc(positions)
 
         from scipy.special import logsumexp
-        sum_prefactors = logsumexp(prefactors, axis=1, b=self.lam)
+        sum_prefactors = logsumexp(prefactors[None, :, :], axis=2, b=lam_i[:, None, :])
+        beta = 1 / (self.constants[self.T] * self.constants[self.kb])
+        return (-1 / (beta * self.s_i[0])) * sum_prefactors
 
-        return np.squeeze(sum_prefactors), np.array(prefactors, ndmin=2).T
 
-class sumPotentials(_potentialNDCls):
+class sumPotentials(_compositePotentialCls, _potentialNDCls):
     """
     Adds n different potentials.
      For adding up wavepotentials, we recommend using the addedwavePotential class.
@@ -513,16 +516,19 @@ class sumPotentials(_potentialNDCls):
 
     V_functional = sp.Sum(potentials[i, 0], (i, 0, nPotentials))
 
-    def __init__(self, potentials: t.List[_potentialNDCls] = (harmonicOscillatorPotential(), harmonicOscillatorPotential(r_shift=[1,1,1], nDimensions=3))):
+    def __init__(self, potentials: t.List[_potentialNDCls] = (harmonicOscillatorPotential(), harmonicOscillatorPotential(r_shift=[1,1,1], nDimensions=3)),
+                 threads: int = 1):
         """
         __init__
             This is the Constructor of an summed Potentials
 
         Parameters
         ----------
-        potentials: List[_potential2DCls], optional
-            it uses the 2D potential class to generate its potential,
-            default to (wavePotential(), wavePotential(multiplicity=[3, 3]))
+        potentials: List[_potentialNDCls], optional
+            the potentials of the same dimensionality, that are summed up,
+            default to (harmonicOscillatorPotential(), harmonicOscillatorPotential(r_shift=[1,1,1], nDimensions=3))
+        threads: int, optional
+            number of threads evaluating the potentials, useful for expensive potentials (default: 1)
         """
         if(all([potentials[0].constants[V.nDimensions] == V.constants[V.nDimensions] for V in potentials])):
             nDim = potentials[0].constants[potentials[0].nDimensions]
@@ -530,6 +536,8 @@ class sumPotentials(_potentialNDCls):
             raise ValueError("The potentials don't share the same dimensionality!\n\t"+str([V.constants[V.nDimensions] for V in potentials]))
 
 
+        self.potential_terms = list(potentials)
+        self.threads = threads
         self.constants = {self.nPotentials: len(potentials)}
         self.constants.update({"V_" + str(i): potentials[i].V for i in range(len(potentials))})
 
@@ -560,13 +568,228 @@ class sumPotentials(_potentialNDCls):
         msg += "\n"
         return msg
 
-    # OVERRIDE
+
+class pairPotential(_potentialNDCls):
+    """
+    Potential of interacting particles, that is the sum of a pair potential over all pairs of particles within a cutoff.
+    The pair potential is a one dimensional potential of the distance r of two particles
+    (e.g. OneD.lennardJonesPotential or OneD.coulombPotential). The positions of all particles are passed at once
+    with the shape (nParticles, nDimensions), or (nParticles) in one dimension.
+
+    The pairs are taken from a Verlet neighbour list with the radius cutoff + skin, which is built with a cell list
+    and only rebuilt, once a particle moved further than skin/2. With a periodic box (the box of a
+    periodicBoundaryCondition), the distances are calculated with the minimum image convention.
+    """
+    name: str = "Pair Potential"
+    _checkpoint_attributes = ("_pairs", "_reference_positions", "n_neighbour_list_builds")
+    position: sp.Symbol = sp.symbols("r")
+
+    def __init__(self, pair_potential: _potentialNDCls = OneD.lennardJonesPotential(sigma=1, epsilon=1),
+                 nDimensions: int = 3, cutoff: Number = 2.5, skin: Number = 0.3, box: t.conditionCls = None,
+                 shift_energies: bool = True):
+        """
+        __init__
+            This is the Constructor of the pair potential.
+
+        Parameters
+        ----------
+        pair_potential: _potential1DCls, optional
+            pair potential as function of the distance, defaults to OneD.lennardJonesPotential(sigma=1, epsilon=1)
+        nDimensions: int, optional
+            dimensionality of the particle positions, defaults to 3
+        cutoff: Number, optional
+            pairs with a larger distance do not interact, defaults to 2.5
+        skin: Number, optional
+            additional radius of the neighbour list. The larger the skin, the less often the list is rebuilt.
+            With 0, the list is rebuilt whenever the positions change. Defaults to 0.3
+        box: periodicBoundaryCondition, optional
+            periodic box of the particles, that is used for the minimum image distances (default: None - no box)
+        shift_energies: bool, optional
+            shift the pair energies by the energy at the cutoff, so that they are continuous. (default: True)
+        """
+        if (cutoff <= 0 or skin < 0):
+            raise ValueError("pairPotential: the cutoff needs to be positive and the skin not negative. Got: cutoff=" +
+                             str(cutoff) + " skin=" + str(skin))
+        if (box is not None and box.nDim != nDimensions):
+            raise ValueError("pairPotential: the box has " + str(box.nDim) + " dimensions, but the potential " +
+                             str(nDimensions))
+        if (box is not None and np.any(box.higherbounds - box.lowerbounds < 2 * (cutoff + skin))):
+            raise ValueError("pairPotential: the box needs to be at least twice as large as cutoff + skin.")
+
+        self.pair_potential = pair_potential
+        self.cutoff = cutoff
+        self.skin = skin
+        self.box = box
+        self.shift_energies = shift_energies
+        self.n_neighbour_list_builds = 0
+        self.reset_neighbour_list()
+
+        super().__init__(nDimensions=nDimensions)
+
+    def _initialize_functions(self):
+        """
+        The symbolic functions are the ones of the pair potential.
+        """
+        self.position = self.pair_potential.position
+        self.V_functional = self.pair_potential.V_functional
+
     def _update_functions(self):
         """
-        _update_functions
-            calculates the current energy and derivative of the energy
+        The pair energies and forces are calculated with the compiled functions of the pair potential.
+        """
+        self.V = self.pair_potential.V
+        self.dVdpos_functional = sp.diff(self.V_functional, self.position)
+        self.dVdpos = self.pair_potential.dVdpos
+        self._energy_shift = float(self.pair_potential.ene(self.cutoff)) if (self.shift_energies) else 0.0
+
+    """
+        neighbour list
+    """
+
+    def reset_neighbour_list(self):
+        """
+            reset_neighbour_list
+                the neighbour list is rebuilt at the next evaluation.
+        """
+        self._pairs = None
+        self._reference_positions = None
+
+    def _as_particles(self, positions: Union[Iterable[Number], Iterable[Iterable[Number]]]) -> np.array:
+        return np.reshape(np.array(positions, dtype=float), (-1, self.constants[self.nDimensions]))
+
+    def _minimum_image(self, displacements: np.array) -> np.array:
+        return displacements if (self.box is None) else self.box.minimum_image(displacements)
+
+    def _build_neighbour_list(self, positions: np.array) -> Tuple[np.array, np.array]:
         """
-        super()._update_functions()
+        builds the pairs (i < j) within cutoff + skin with a cell list. The particles are sorted into cells of at
+        least the list radius, so that only the particles of the neighbouring cells need to be compared.
+        """
+        nParticles, nDimensions = positions.shape
+        radius = self.cutoff + self.skin
+        if (self.box is not None):
+            lowerbounds, box_length = self.box.lowerbounds, self.box.box_length
+            positions = lowerbounds + np.mod(positions - lowerbounds, box_length)
+        else:
+            lowerbounds = np.min(positions, axis=0)
+            box_length = np.max(positions, axis=0) - lowerbounds + radius
+
+        n_cells = np.maximum(np.floor(box_length / radius).astype(int), 1)
+        cells = np.clip(np.floor((positions - lowerbounds) / (box_length / n_cells)).astype(int), 0, n_cells - 1)
+        cell_ids = np.ravel_multi_index(cells.T, n_cells)
+        order = np.argsort(cell_ids, kind="stable")
+        counts = np.bincount(cell_ids, minlength=np.prod(n_cells))
+        starts = np.cumsum(counts) - counts
+
+        first, second = [], []
+        for offset in itertools.product([-1, 0, 1], repeat=nDimensions):
+            neighbour_cells = cells + np.array(offset)
+            if (self.box is not None):
+                neighbour_cells = np.mod(neighbour_cells, n_cells)
+                particles = np.arange(nParticles)
+            else:
+                particles = np.flatnonzero(np.all((neighbour_cells >= 0) & (neighbour_cells < n_cells), axis=1))
+            neighbour_ids = np.ravel_multi_index(neighbour_cells[particles].T, n_cells)
+
+            # all particles of the neighbouring cell for each particle
+            n_neighbours = counts[neighbour_ids]
+            i = np.repeat(particles, n_neighbours)
+            within_cell = np.arange(len(i)) - np.repeat(np.cumsum(n_neighbours) - n_neighbours, n_neighbours)
+            j = order[np.repeat(starts[neighbour_ids], n_neighbours) + within_cell]
+
+            first.append(i[i < j])
+            second.append(j[i < j])
+
+        i, j = np.concatenate(first), np.concatenate(second)
+        if (self.box is not None and np.any(n_cells < 3)):  # with less than 3 cells, neighbouring cells repeat
+            i, j = np.divmod(np.unique(i * nParticles + j), nParticles)
+
+        displacements = self._minimum_image(positions[j] - positions[i])
+        within = np.sum(np.square(displacements), axis=1) < radius ** 2
+        return i[within], j[within]
+
+    def neighbour_pairs(self, positions: Union[Iterable[Number], Iterable[Iterable[Number]]]) -> Tuple[np.array, np.array]:
+        """
+            neighbour_pairs
+                returns the pairs (i, j) of the Verlet neighbour list and rebuilds it, if a particle moved further than
+                skin/2 since the last build.
 
-        self.tmp_Vfunc = self._calculate_energies
-        self.tmp_dVdpfunc = self._calculate_dVdpos
\ No newline at end of file
+        Parameters
+        ----------
+        positions: Union[Iterable[Number], Iterable[Iterable[Number]]]
+            positions of all particles
+
+        Returns
+        -------
+        Tuple[np.array, np.array]
+            indices of the first and second particles of the pairs
+        """
+        positions = self._as_particles(positions)
+        if (self._pairs is None or len(positions) != len(self._reference_positions) or np.max(
+                np.sum(np.square(self._minimum_image(positions - self._reference_positions)), axis=1)) > (
+                self.skin / 2) ** 2):
+            self._pairs = self._build_neighbour_list(positions)
+            self._reference_positions = positions
+            self.n_neighbour_list_builds += 1
+        return self._pairs
+
+    def _interacting_pairs(self, positions: np.array) -> Tuple[np.array, np.array, np.array, np.array]:
+        """
+        pairs within the cutoff with their displacement vectors and distances.
+        """
+        i, j = self.neighbour_pairs(positions)
+        displacements = self._minimum_image(positions[j] - positions[i])
+        distances = np.sqrt(np.sum(np.square(displacements), axis=1))
+        within = distances < self.cutoff
+        return i[within], j[within], displacements[within], distances[within]
+
+    """
+        public
+    """
+
+    def ene(self, positions: Union[Iterable[Number], Iterable[Iterable[Number]]]) -> Number:
+        """
+            ene
+                calculates the total potential energy of the particles.
+
+        Parameters
+        ----------
+        positions: Union[Iterable[Number], Iterable[Iterable[Number]]]
+            positions of all particles
+
+        Returns
+        -------
+        Number
+            the total potential energy
+        """
+        positions = self._as_particles(positions)
+        _, _, _, distances = self._interacting_pairs(positions)
+        pair_energies = np.broadcast_to(self.pair_potential.ene(distances), distances.shape)
+        return np.sum(pair_energies - self._energy_shift)
+
+    def force(self, positions: Union[Iterable[Number], Iterable[Iterable[Number]]]) -> np.array:
+        """
+            force
+                calculates the gradients of the total potential energy with the positions of all particles.
+
+        Parameters
+        ----------
+        positions: Union[Iterable[Number], Iterable[Iterable[Number]]]
+            positions of all particles
+
+        Returns
+        -------
+        np.array
+            the gradients in the shape of the positions
+        """
+        shape = np.shape(positions)
+        positions = self._as_particles(positions)
+        i, j, displacements, distances = self._interacting_pairs(positions)
+
+        # dV/dx_j = dV/dr * (x_j - x_i)/r = -dV/dx_i
+        pair_gradients = (np.broadcast_to(self.pair_potential.force(distances), distances.shape) / distances)[:, None] * \
+                         displacements
+        gradients = np.stack([np.bincount(j, pair_gradients[:, dim], minlength=len(positions)) -
+                              np.bincount(i, pair_gradients[:, dim], minlength=len(positions))
+                              for dim in range(positions.shape[1])], axis=1)
+        return np.reshape(gradients, shape)
@@ -9,7 +9,8 @@ import numpy as np
 import scipy.constants as const
 import sympy as sp
 
-from ensembler.potentials._basicPotentials import _potential1DCls, _potential1DClsPerturbed
+from ensembler.potentials._basicPotentials import _potential1DCls, _potential1DClsPerturbed, _compositePotentialCls, \
+    _tabulatedPotentialCls
 
 from ensembler.util.ensemblerTypes import Union, Number, Iterable, systemCls
 """
@@ -558,11 +559,16 @@ class envelopedPotential(_potential1DCls):
 
     Here N-states are coupled by the log-sum-exp resulting in a new reference state $V_R$,
 
-    $V_R = -1/{\beta} * \ln(\sum_i^Ne^(-\beta*s*(V_i-E^R_i)))$
+    $V_R = -1/{\beta*s_0} * \ln(\sum_i^Ne^(-\beta*s_i*(V_i-E^R_i)))$
+
+    Each state can have its own smoothing parameter s_i. The energies and forces are calculated from the stacked
+    (positions x states) energy matrix.
 
     This potential coupling is for example used in EDS.
     """
     name = "Enveloping Potential"
+    _checkpoint_attributes = ("_s", "_Eoff_i")
+    force_sign: float = -1.0
 
     T, kb, position = sp.symbols("T kb r")
     beta = 1 / (kb * T)
@@ -629,10 +635,7 @@ class envelopedPotential(_potential1DCls):
         # also make sure that states are up to work:
         [V._update_functions() for V in self.V_is]
 
-        if (all([self.s_i[0] == s for s in self.s_i[1:]])):
-            self.ene = self._calculate_energies_singlePos_overwrite_oneS
-        else:
-            self.ene = self._calculate_energies_singlePos_overwrite_multiS
+        self.ene = self._calculate_energies_singlePos_overwrite
         self.force = self._calculate_dvdpos_singlePos_overwrite
 
     @property
@@ -741,107 +744,87 @@ class envelopedPotential(_potential1DCls):
             sis = {"s_" + str(i): self.s_i[i] for i in range(self.constants[self.nStates])}
             self.constants.update({**sis})
         elif (len(s) == self.constants[self.nStates]):
-            raise NotImplementedError("Currently Only one s runs supported!")
-            # self._s = s
-            # self.constants.update({self.sis: self._s})
-            # sis = {"s_" + str(i): self.s_i[i] for i in range(self.constants[self.nStates])}
-            # self.constants.update({**sis})
+            self._s = list(s)
+            sis = {"s_" + str(i): self.s_i[i] for i in range(self.constants[self.nStates])}
+            self.constants.update({**sis})
         else:
             raise IOError("s Vector/Number and state potentials don't have the same length!\n states in s " + str(
                 len(s)) + "\t states in Vi" + str(len(self.V_is)))
 
-    def _calculate_energies_singlePos_overwrite_multiS(self, positions) -> np.array:
-        sum_prefactors, _ = self._logsumexp_calc_gromos(positions)
-        beta = self.constants[self.T] * self.constants[self.kb]  # kT - *self.constants[self.T]
-        Vr = (-1 / (beta)) * sum_prefactors
-        return np.squeeze(Vr)
+    def _state_energies(self, positions) -> np.array:
+        """
+        stacked energies of all states.
 
-    def _calculate_energies_singlePos_overwrite_oneS(self, positions) -> np.array:
+        Parameters
+        ----------
+        positions
+
+        Returns
+        -------
+        np.array
+            energy matrix - shape (nPositions, nStates)
+        """
+        energies = [np.reshape(V.ene(positions), -1) for V in self.V_is]
+        n_positions = max(len(V) for V in energies)
+        return np.stack([np.broadcast_to(V, n_positions) for V in energies], axis=1)
+
+    def _calculate_energies_singlePos_overwrite(self, positions) -> np.array:
         sum_prefactors, _ = self._logsumexp_calc(positions)
-        beta = self.constants[self.T] * self.constants[self.kb]
+        beta = 1 / (self.constants[self.T] * self.constants[self.kb])
         Vr = (-1 / (beta * self.s_i[0])) * sum_prefactors
-        return np.squeeze(Vr)
+        return np.squeeze(Vr)[()]
 
     def _calculate_dvdpos_singlePos_overwrite(self, positions: (t.Iterable[float])) -> np.array:
         """
+        the forces are the state forces weighted by their contribution to the reference state and s_i/s_0.
+
         Parameters
         ----------
         positions
 
         Returns
         -------
-
-        """
-        positions = np.array(positions, ndmin=2)
-        # print("Pos: ", position)
-
-        V_R_part, V_Is_ene = self._logsumexp_calc_gromos(positions)
-        V_R_part = np.array(V_R_part, ndmin=2).T
-        # print("V_R_part: ", V_R_part.shape, V_R_part)
-        # print("V_I_ene: ",V_Is_ene.shape, V_Is_ene)
-        V_Is_dhdpos = np.array([-statePot.force(positions) for statePot in self.V_is], ndmin=1).T
-        # print("V_I_force: ",V_Is_dhdpos.shape, V_Is_dhdpos)
-
-        adapt = np.concatenate([V_R_part for s in range(self.constants[self.nStates])], axis=1)
-        # print("ADAPT: ",adapt.shape, adapt)
-        scaling = np.exp(V_Is_ene - adapt)
-        # print("scaling: ", scaling.shape, scaling)
-        dVdpos_state = np.multiply(scaling,
-                                   V_Is_dhdpos)  # np.array([(ene/V_R_part) * force for ene, force in zip(V_Is_ene, V_Is_dhdpos)])
-        # print("state_contributions: ",dVdpos_state.shape, dVdpos_state)
-        dVdpos = np.sum(dVdpos_state, axis=1)
-        # print("forces: ",dVdpos.shape, dVdpos)
+        np.array
+            forces - shape (nPositions, nDimensions), squeezed
+        """
+        sum_prefactors, prefactors = self._logsumexp_calc(positions)
+        s_i = np.array(self.s_i, dtype=float)
+        weights = np.exp(prefactors - sum_prefactors[:, None]) * (s_i / s_i[0])[None, :]
+
+        n_positions = prefactors.shape[0]
+        V_Is_dhdpos = []
+        for statePot in self.V_is:
+            dhdpos = -np.array(statePot.force(positions), dtype=float)
+            if (dhdpos.ndim == 0):  # constant state forces
+                dhdpos = np.broadcast_to(dhdpos, n_positions)
+            V_Is_dhdpos.append(np.reshape(dhdpos, (n_positions, -1)))
+        dVdpos = np.sum(weights[:, :, None] * np.stack(V_Is_dhdpos, axis=1), axis=1)
 
         return np.squeeze(dVdpos)
 
-    def _logsumexp_calc(self, position):
-        prefactors = []
-        beta = self.constants[self.T] * self.constants[self.kb]
-        for state in range(self.constants[self.nStates]):
-            prefactor = np.array(-beta * self.s_i[state] * (self.V_is[state].ene(position) - self.Eoff_i[state]),
-                                 ndmin=1).T
-            prefactors.append(prefactor)
-        prefactors = np.array(prefactors, ndmin=2).T
-
-        from scipy.special import logsumexp
-        # print("Prefactors", prefactors)
-        sum_prefactors = logsumexp(prefactors, axis=1)
-        # print("logexpsum: ", np.squeeze(sum_prefactors))
-
-        return np.squeeze(sum_prefactors), np.array(prefactors, ndmin=2).T
-
-    def _logsumexp_calc_gromos(self, position):
+    def _logsumexp_calc(self, positions, state_energies: np.array = None):
         """
-        code from gromos:
+        log-sum-exp of the stacked state prefactors -beta*s_i*(V_i-E^R_i).
 
         Parameters
         ----------
-        position
+        positions
+        state_energies: np.array, optional
+            energies of all states at the positions, if already evaluated (see _state_energies)
 
         Returns
         -------
-
+        Tuple[np.array, np.array]
+            log-sum-exp - shape (nPositions), prefactors - shape (nPositions, nStates)
         """
-        prefactors = []
-        beta = self.constants[self.T] * self.constants[self.kb]  # kT - *self.constants[self.T]
-        partA = np.array(-beta * self.s_i[0] * (self.V_is[0].ene(position) - self.Eoff_i[0]), ndmin=1)
-        partB = np.array(-beta * self.s_i[1] * (self.V_is[1].ene(position) - self.Eoff_i[1]), ndmin=1)
-
-        partAB = np.array([partA, partB]).T
-        log_prefac = 1 + np.exp(np.min(partAB, axis=1) - np.max(partAB, axis=1))
-        sum_prefactors = np.max(partAB, axis=1) + np.log(log_prefac)
+        if (state_energies is None):
+            state_energies = self._state_energies(positions)
+        beta = 1 / (self.constants[self.T] * self.constants[self.kb])
+        prefactors = -beta * np.array(self.s_i, dtype=float)[None, :] * (
+                state_energies - np.array(self.Eoff_i, dtype=float)[None, :])
 
-        prefactors.append(partA)
-        prefactors.append(partB)
-
-        # more than two states!
-        for state in range(2, self.constants[self.nStates]):
-            partN = np.array(-beta * self.s_i[state] * (self.V_is[state].ene(position) - self.Eoff_i[state]), ndmin=1)
-            prefactors.append(partN)
-            sum_prefactors = np.max([sum_prefactors, partN], axis=1) + np.log(1 + np.exp(
-                np.min([sum_prefactors, partN], axis=1) - np.max([sum_prefactors, partN], axis=1)))
-            # print("prefactors: ", sum_prefactors)
-        return sum_prefactors, np.array(prefactors, ndmin=2).T
+        from scipy.special import logsumexp
+        return logsumexp(prefactors, axis=1), prefactors
 
 
 class hybridCoupledPotentials(_potential1DClsPerturbed):
@@ -903,13 +886,18 @@ class lambdaEDSPotential(envelopedPotential):
     This implementation of exponential Coupling combined with linear compling is called $\lambda$-EDS the implementation of function is more numerical robust to the hybrid coupling class.
 
 
-    Here two-states are coupled by the log-sum-exp and weighted by lambda resulting in a new reference state $V_R$,
+    Here N-states are coupled by the log-sum-exp and weighted by lambda resulting in a new reference state $V_R$,
 
-    $V_R = -\frac{1}{\beta*s} * \ln(\lambda * e^(-\beta*s*(V_A-E^R_A)) + (1-\lambda)*e^(-\beta*s*(V_B-E^R_B)))$
+    $V_R = -1/{\beta*s_0} * \ln(\sum_i^N \lambda_i * e^(-\beta*s_i*(V_i-E^R_i)))$
+
+    For two states, a single lambda gives the weights $\lambda$ and $1-\lambda$. For more states, either a weight per
+    state is given, or a single lambda weights the first state and $1-\lambda$ is split evenly over the other states.
+    With ene_lambda_grid, the energies of a whole grid of lambdas can be calculated at once.
 
     This potential coupling is for example used in $\lambda$-EDS.
     """
     name: str = "lambda enveloped Potential"
+    _checkpoint_attributes = ("_s", "_Eoff_i", "_lam_i")
 
     T, kb, position = sp.symbols("T kb r")
     beta = 1 / (kb * T)
@@ -976,67 +964,77 @@ class lambdaEDSPotential(envelopedPotential):
 
     @lam_i.setter
     def lam_i(self, lam: Union[Number, Iterable[Number]]):
-        if (isinstance(lam, Number) and self.constants[self.nStates] == 2):
-            self._lam_i = np.array([lam] + [1 - lam for x in range(1, self.constants[self.nStates])], ndmin=1)
-            lamis = {"lam_" + str(i): self.lam_i[i] for i in range(self.constants[self.nStates])}
-            self.constants.update({**lamis})
-        elif (isinstance(lam, Number)):
-            self._lam_i = np.array([1 / self.constants[self.nStates] for x in range(self.constants[self.nStates])],
-                                   ndmin=1)
-            lamis = {"lam_" + str(i): self.lam_i[i] for i in range(self.constants[self.nStates])}
-            self.constants.update({**lamis})
-        elif (len(lam) == self.constants[self.nStates]):
-            raise NotImplementedError("Currently Only one lam runs supported!")
-            # self._lam_i = np.array(lam, ndmin=1)
-            # self.constants.update({self.lamis: self._lam_i})
+        self._lam_i = self._lambda_vector(lam)
+        lamis = {"lam_" + str(i): self.lam_i[i] for i in range(self.constants[self.nStates])}
+        self.constants.update({**lamis})
+
+    def _lambda_vector(self, lam: Union[Number, Iterable[Number]]) -> np.array:
+        """
+            _lambda_vector
+                translates a lambda into the weights of all states. A single lambda is the weight of the first state,
+                the remaining weight 1-lambda is split evenly over the other states.
+
+        Parameters
+        ----------
+        lam: Union[Number, Iterable[Number]]
+            a single lambda or one weight per state
+
+        Returns
+        -------
+        np.array
+            weights of the states - shape (nStates)
+        """
+        nStates = self.constants[self.nStates]
+        if (isinstance(lam, Number)):
+            lam_i = np.array([lam] + [(1 - lam) / (nStates - 1) for x in range(1, nStates)], dtype=float, ndmin=1)
+        elif (len(lam) == nStates):
+            lam_i = np.array(lam, dtype=float, ndmin=1)
         else:
-            raise IOError("s Vector/Number and state potentials don't have the same length!\n states in s " + str(
-                lam) + "\t states in Vi" + str(len(self.V_is)))
+            raise IOError("lam Vector/Number and state potentials don't have the same length!\n states in lam " + str(
+                len(lam)) + "\t states in Vi" + str(nStates))
 
-    def _calculate_energies_singlePos_overwrite(self, position) -> np.array:
-        # print("Positions: ",position)
-        # print("s_i: ",self.s_i)
-        sum_prefactors, _ = self._logsumexp_calc(position)
-        beta = self.constants[self.T] * self.constants[self.kb]  # kT - *self.constants[self.T]
-        Vr = (-1 / (beta * self.s_i[0])) * sum_prefactors
-        # print("finalVR", Vr)
-        return np.squeeze(Vr)
+        if (np.any(lam_i < 0)):
+            raise ValueError("The lambda weights of the states need to be positive! Got: " + str(lam_i))
+        return lam_i
 
-    def _calculate_dvdpos_singlePos_overwrite(self, positions: (t.Iterable[float])) -> np.array:
-        positions = np.array(positions, ndmin=2)
-        # print("Pos: ", position)
-        V_R_part, V_Is_ene = self._logsumexp_calc(positions)
-        # print("V_I_ene: ",V_Is_ene.shape, V_Is_ene)
-        V_R_part = np.array(V_R_part, ndmin=2).T
-        # print("V_R_part: ", V_R_part.shape, V_R_part)
-        V_Is_dhdpos = np.array([-statePot.force(positions) for statePot in self.V_is], ndmin=1).T
-        # print("V_I_force: ",V_Is_dhdpos.shape, V_Is_dhdpos)
-        adapt = np.concatenate([V_R_part for s in range(self.constants[self.nStates])], axis=1).T
-        # print("ADAPT: ",adapt.shape, adapt)
-        # print(self.lam_i)
-        scaling = (np.array(self.lam_i, ndmin=2).T * (np.exp(V_Is_ene - adapt))).T
-
-        # print("scaling: ", scaling.shape, scaling)
-        dVdpos_state = scaling * V_Is_dhdpos
-        # print("state_contributions: ",dVdpos_state.shape, dVdpos_state)
-        dVdpos = np.sum(dVdpos_state, axis=1)
-        # print("forces: ",dVdpos.shape, dVdpos)
+    def _logsumexp_calc(self, positions, state_energies: np.array = None):
+        """
+        log-sum-exp of the state prefactors -beta*s_i*(V_i-E^R_i), weighted by lambda_i.
+        The returned prefactors contain the weights as ln(lambda_i), such that the energies and forces of the
+        enveloped potential apply.
+        """
+        sum_prefactors, prefactors = super()._logsumexp_calc(positions, state_energies=state_energies)
+        with np.errstate(divide="ignore"):
+            prefactors = prefactors + np.log(self.lam_i)[None, :]
 
-        return np.squeeze(dVdpos)
+        from scipy.special import logsumexp
+        return logsumexp(prefactors, axis=1), prefactors
+
+    def ene_lambda_grid(self, positions, lambdas: Iterable[Union[Number, Iterable[Number]]]) -> np.array:
+        """
+            ene_lambda_grid
+                calculates the energies for a grid of lambdas at once. The state energies are evaluated only once.
 
-    def _logsumexp_calc(self, position):
-        prefactors = []
-        beta = self.constants[self.T] * self.constants[self.kb]
-        for state in range(self.constants[self.nStates]):
-            prefactor = np.array(-beta * self.s_i[state] * (self.V_is[state].ene(position) - self.Eoff_i[state]),
-                                 ndmin=1).T
-            prefactors.append(prefactor)
-        prefactors = np.array(prefactors, ndmin=2).T
+        Parameters
+        ----------
+        positions
+            positions to evaluate
+        lambdas: Iterable[Union[Number, Iterable[Number]]]
+            lambdas of the grid, each either a single lambda or one weight per state
+
+        Returns
+        -------
+        np.array
+            energies - shape (nLambda, nPositions)
+        """
+        lam_i = np.array([self._lambda_vector(lam) for lam in lambdas], ndmin=2)
+        _, prefactors = super()._logsumexp_calc(positions)
 
         from scipy.special import logsumexp
-        sum_prefactors = logsumexp(prefactors, axis=1, b=self.lam)
+        sum_prefactors = logsumexp(prefactors[None, :, :], axis=2, b=lam_i[:, None, :])
+        beta = 1 / (self.constants[self.T] * self.constants[self.kb])
+        return (-1 / (beta * self.s_i[0])) * sum_prefactors
 
-        return np.squeeze(sum_prefactors), np.array(prefactors, ndmin=2).T
 
 
 """
@@ -1127,6 +1125,134 @@ class flatwellPotential(_potential1DCls):
         self.__dict__ = state
 
 
+class tabulatedPotential(_tabulatedPotentialCls, _potential1DCls):
+    """
+    Tabulates the energies and forces of an expensive 1D potential (e.g. envelopes of many states) on a uniform grid
+    once. The energies and forces are then calculated in constant time by cubic Hermite interpolation.
+    The largest deviations from the wrapped potential at probe points of all cells are reported as ene_error and
+    force_error.
+    """
+    name: str = "Tabulated Potential"
+    position = sp.symbols("r")
+
+    def __init__(self, potential: _potential1DCls = harmonicOscillatorPotential(), x_range: Iterable[Number] = (-10, 10),
+                 n_points: int = 1001, threads: int = 1, force_sign: Number = None, verbose: bool = False):
+        """
+        __init__
+            This is the Constructor of the tabulated potential. The wrapped potential is tabulated right away.
+
+        Parameters
+        ----------
+        potential: _potential1DCls, optional
+            the tabulated potential (default: harmonicOscillatorPotential())
+        x_range: Iterable[Number], optional
+            minimal and maximal position of the grid. Outside, the wrapped potential is evaluated. (default: (-10, 10))
+        n_points: int, optional
+            number of grid points (default: 1001)
+        threads: int, optional
+            number of threads tabulating the wrapped potential in chunks (default: 1)
+        force_sign: Number, optional
+            sign of the wrapped forces relative to dV/dpos (default: None - the force_sign of the potential)
+        verbose: bool, optional
+            report the interpolation errors after tabulation
+        """
+        if (n_points < 2 or x_range[1] <= x_range[0]):
+            raise ValueError("tabulatedPotential needs at least two grid points in an increasing range! Got: " +
+                             str(n_points) + " points in " + str(x_range))
+
+        self.potential = potential
+        self.threads = threads
+        self.force_sign = potential.force_sign if (force_sign is None) else force_sign
+        if (self.force_sign not in (-1, 1)):
+            raise ValueError("tabulatedPotential: force_sign needs to be 1 or -1! Got: " + str(self.force_sign))
+        self.verbose = verbose
+        self.grid = np.linspace(x_range[0], x_range[1], n_points)
+
+        self.constants = {**potential.constants}
+        self.V_functional = potential.V
+
+        super().__init__()
+        self.tabulate()
+
+    def tabulate(self):
+        """
+            tabulate
+                evaluates the wrapped potential on the grid and estimates the interpolation errors at probe points of
+                all cells.
+        """
+        self.grid_energies = self._evaluate_chunked(self.potential.ene, self.grid)[:, 0]
+        forces = self._evaluate_chunked(self.potential.force, self.grid)[:, 0]
+        self._check_force_sign(self.grid_energies, forces, self.grid)
+        self.grid_gradients = self.force_sign * forces
+
+        spacing = self.grid[1] - self.grid[0]
+        self.cell_coefficients = (self._hermite_matrix @ np.stack([self.grid_energies[:-1], self.grid_energies[1:],
+                                                                   spacing * self.grid_gradients[:-1],
+                                                                   spacing * self.grid_gradients[1:]])).T
+
+        probes = (self.grid[:-1, None] + (self.grid[1] - self.grid[0]) * self._probe_points[None, :]).flatten()
+        self.ene_error = float(np.max(np.abs(self._interpolate(probes) -
+                                             self._evaluate_chunked(self.potential.ene, probes)[:, 0])))
+        self.force_error = float(np.max(np.abs(self.force_sign * self._interpolate(probes, derivative=True) -
+                                               self._evaluate_chunked(self.potential.force, probes)[:, 0])))
+        if (self.verbose):
+            print("tabulated " + self.potential.name + " on " + str(len(self.grid)) + " points: max ene error " +
+                  str(self.ene_error) + ", max force error " + str(self.force_error))
+
+    def _interpolate(self, positions: np.array, derivative: bool = False) -> np.array:
+        cells, t = self._locate(positions, self.grid)
+        interpolated = np.sum(self.cell_coefficients[cells] * self._powers(t, derivative=derivative), axis=1)
+        return interpolated / (self.grid[1] - self.grid[0]) if (derivative) else interpolated
+
+    def _evaluate(self, positions: Union[Number, Iterable[Number]], derivative: bool = False) -> Union[Number, Iterable[Number]]:
+        positions = np.array(positions, dtype=float, ndmin=1).flatten()
+        inside = (positions >= self.grid[0]) & (positions <= self.grid[-1])
+
+        results = np.empty(len(positions))
+        results[inside] = self._interpolate(positions[inside], derivative=derivative)
+        if (derivative):
+            results[inside] *= self.force_sign
+        if (not np.all(inside)):
+            function = self.potential.force if (derivative) else self.potential.ene
+            results[~inside] = function(positions[~inside])
+        return np.squeeze(results)[()]
+
+    def ene(self, positions: Union[Number, Iterable[Number]]) -> Union[Number, Iterable[Number]]:
+        """
+            ene
+                calculates the potential energy of the given position/s by interpolation of the tabulated energies.
+
+        Parameters
+        ----------
+        positions: Union[Number, Iterable]
+
+        Returns
+        -------
+        ene: Union[Number, Iterable]
+            the calculated potential energies.
+
+        """
+        return self._evaluate(positions)
+
+    def force(self, positions: Union[Number, Iterable[Number]]) -> Union[Number, Iterable[Number]]:
+        """
+            force
+                calculates the potential forces/gradients of the given position/s as analytic derivative of the
+                interpolated energies.
+
+        Parameters
+        ----------
+        positions: Union[Number, Iterable]
+
+        Returns
+        -------
+        force: Union[Number, Iterable]
+            the calculated potential forces.
+
+        """
+        return self._evaluate(positions, derivative=True)
+
+
 """
 Biased potentials
 """
@@ -1135,7 +1261,7 @@ Biased potentials
 """
 
 
-class addedPotentials(_potential1DCls):
+class addedPotentials(_compositePotentialCls, _potential1DCls):
     '''
     Adds two different potentials on top of each other. Can be used to generate
     harmonic potential umbrella sampling or scaled potentials
@@ -1144,7 +1270,7 @@ class addedPotentials(_potential1DCls):
     position = sp.symbols("r")
     bias_potential = True
 
-    def __init__(self, origPotential=harmonicOscillatorPotential(), addPotential=gaussPotential()):
+    def __init__(self, origPotential=harmonicOscillatorPotential(), addPotential=gaussPotential(), threads: int = 1):
         '''
         __init__
               This is the Constructor of the addedPotential class.
@@ -1155,10 +1281,14 @@ class addedPotentials(_potential1DCls):
         addPotential: potential type
             The potential added on top of the unbiased potential to
             bias the system
+        threads: int, optional
+            number of threads evaluating the two potentials (default: 1)
         '''
 
         self.origPotential = origPotential
         self.addPotential = addPotential
+        self.potential_terms = [origPotential, addPotential]
+        self.threads = threads
 
         self.constants = {**origPotential.constants, **addPotential.constants}
 
@@ -1169,7 +1299,7 @@ class addedPotentials(_potential1DCls):
 
         super().__init__()
 
-class sumPotentials(_potential1DCls):
+class sumPotentials(_compositePotentialCls, _potential1DCls):
     """
     Adds n different potentials.
      For adding up wavepotentials, we recommend using the addedwavePotential class.
@@ -1184,17 +1314,22 @@ class sumPotentials(_potential1DCls):
 
     V_functional = sp.Sum(potentials[i, 0], (i, 0, nPotentials))
 
-    def __init__(self, potentials: t.List[_potential1DCls] = (harmonicOscillatorPotential(), harmonicOscillatorPotential(x_shift=1))):
+    def __init__(self, potentials: t.List[_potential1DCls] = (harmonicOscillatorPotential(), harmonicOscillatorPotential(x_shift=1)),
+                 threads: int = 1):
         """
         __init__
             This is the Constructor of an summed Potentials
 
         Parameters
         ----------
-        potentials: List[_potential2DCls], optional
-            it uses the 2D potential class to generate its potential,
-            default to (wavePotential(), wavePotential(multiplicity=[3, 3]))
-        """
+        potentials: List[_potential1DCls], optional
+            the potentials, that are summed up,
+            default to (harmonicOscillatorPotential(), harmonicOscillatorPotential(x_shift=1))
+        threads: int, optional
+            number of threads evaluating the potentials, useful for expensive potentials (default: 1)
+        """
+        self.potential_terms = list(potentials)
+        self.threads = threads
         self.constants = {self.nPotentials: len(potentials)}
         self.constants.update({"V_" + str(i): potentials[i].V for i in range(len(potentials))})
 
@@ -1225,17 +1360,6 @@ class sumPotentials(_potential1DCls):
         msg += "\n"
         return msg
 
-    # OVERRIDE
-    def _update_functions(self):
-        """
-        _update_functions
-            calculates the current energy and derivative of the energy
-        """
-        super()._update_functions()
-
-        self.tmp_Vfunc = self._calculate_energies
-        self.tmp_dVdpfunc = self._calculate_dVdpos
-
 """
     TIME DEPENDENT BIASES 
 """
@@ -1251,6 +1375,7 @@ class metadynamicsPotential(_potential1DCls):
     an ever increasing potential with sympy
     '''
     name: str = "Metadynamics Enhanced Sampling System using grid bias"
+    _checkpoint_attributes = ("bias_grid_energy", "bias_grid_force", "current_n", "finished_steps")
     position = sp.symbols("r")
     bias_potential = True
 
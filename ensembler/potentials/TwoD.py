@@ -2,13 +2,13 @@
 Module: Potential
     This module shall be used to implement subclasses of Potential. This module contains all available potentials.
 """
-from typing import List
+from typing import List, Iterable, Union
 
 import numpy as np
 import sympy as sp
 
-from ensembler.potentials._basicPotentials import _potential2DCls
-from ensembler.util.ensemblerTypes import systemCls
+from ensembler.potentials._basicPotentials import _potential2DCls, _compositePotentialCls, _tabulatedPotentialCls
+from ensembler.util.ensemblerTypes import systemCls, Number
 
 
 class harmonicOscillatorPotential(_potential2DCls):
@@ -195,7 +195,7 @@ class wavePotential(_potential2DCls):
             self.set_degrees(degrees=bool(not radians))
 
 
-class addedWavePotential(_potential2DCls):
+class addedWavePotential(_compositePotentialCls, _potential2DCls):
     """
     Adds two wave potentials
     """
@@ -210,7 +210,7 @@ class addedWavePotential(_potential2DCls):
     V_functional = sp.Sum(wave_potentials[i, 0], (i, 0, nWavePotentials))
 
     def __init__(self, wave_potentials: List[wavePotential] = (wavePotential(), wavePotential(multiplicity=[3, 3])),
-                 degrees: bool = True):
+                 degrees: bool = True, threads: int = 1):
         """
         __init__
             This is the Constructor of an added wave Potential
@@ -222,7 +222,11 @@ class addedWavePotential(_potential2DCls):
             default to (wavePotential(), wavePotential(multiplicity=[3, 3]))
         radians: bool, optional
             set potential to radians or degrees, defaults to False
+        threads: int, optional
+            number of threads evaluating the wave potentials (default: 1)
         """
+        self.potential_terms = list(wave_potentials)
+        self.threads = threads
         self.constants = {self.nWavePotentials: len(wave_potentials)}
         self.constants.update({"V_" + str(i): wave_potentials[i].V for i in range(len(wave_potentials))})
 
@@ -254,20 +258,9 @@ class addedWavePotential(_potential2DCls):
         msg += "\n"
         return msg
 
-    # OVERRIDE
-    def _update_functions(self):
-        """
-        _update_functions
-            calculates the current energy and derivative of the energy
-        """
-        super()._update_functions()
-
-        self.tmp_Vfunc = self._calculate_energies
-        self.tmp_dVdpfunc = self._calculate_dVdpos
-
     def set_degrees(self, degrees: bool = True):
         """
-        Sets output to either degrees or radians
+        Sets output to either degrees or radians for all wave potentials
 
         Parameters
         ----------
@@ -275,29 +268,19 @@ class addedWavePotential(_potential2DCls):
             if True, output will be given in degrees, otherwise in radians, default: True
         """
         self.radians = not degrees
-        if (degrees):
-            self._calculate_energies = lambda positions, positions2: self.tmp_Vfunc(np.deg2rad(positions),
-                                                                                    np.deg2rad(positions2))
-            self._calculate_dVdpos = lambda positions, positions2: self.tmp_dVdpfunc(np.deg2rad(positions),
-                                                                                     np.deg2rad(positions2))
-        else:
-            self.set_radians(radians=not degrees)
+        for wave_potential in self.potential_terms:
+            wave_potential.set_degrees(degrees=degrees)
 
     def set_radians(self, radians: bool = True):
         """
-        Sets output to either degrees or radians
+        Sets output to either degrees or radians for all wave potentials
 
         Parameters
         ----------
         radians: bool, optional,
             if True, output will be given in radians, otherwise in degree, default: True
         """
-        self.radians = radians
-        if (radians):
-            self._calculate_energies = self.tmp_Vfunc
-            self._calculate_dVdpos = self.tmp_dVdpfunc
-        else:
-            self.set_degrees(degrees=not radians)
+        self.set_degrees(degrees=not radians)
 
 
 class gaussPotential(_potential2DCls):
@@ -389,6 +372,168 @@ class gaussPotential(_potential2DCls):
 
 from ensembler.potentials.ND import envelopedPotential, sumPotentials
 
+class tabulatedPotential(_tabulatedPotentialCls, _potential2DCls):
+    """
+    Tabulates the energies and forces of an expensive 2D potential (e.g. deep sums of waves) on a uniform grid once.
+    The energies and forces are then calculated in constant time by bicubic Hermite interpolation. The mixed
+    derivatives of the grid points are obtained by central differences of the tabulated forces.
+    The largest deviations from the wrapped potential at probe points of all cells are reported as ene_error and
+    force_error.
+    """
+    name: str = "Tabulated Potential 2D"
+    position: sp.Matrix = sp.Matrix([sp.symbols("r")])
+
+    def __init__(self, potential: _potential2DCls = harmonicOscillatorPotential(),
+                 x_range: Iterable[Number] = (-10, 10), y_range: Iterable[Number] = (-10, 10),
+                 n_points: Union[int, Iterable[int]] = 201, threads: int = 1, force_sign: Number = None,
+                 verbose: bool = False):
+        """
+        __init__
+            This is the Constructor of the tabulated potential. The wrapped potential is tabulated right away.
+
+        Parameters
+        ----------
+        potential: _potential2DCls, optional
+            the tabulated potential (default: harmonicOscillatorPotential())
+        x_range: Iterable[Number], optional
+            minimal and maximal x position of the grid. Outside, the wrapped potential is evaluated. (default: (-10, 10))
+        y_range: Iterable[Number], optional
+            minimal and maximal y position of the grid. Outside, the wrapped potential is evaluated. (default: (-10, 10))
+        n_points: Union[int, Iterable[int]], optional
+            number of grid points in each or both dimensions (default: 201)
+        threads: int, optional
+            number of threads tabulating the wrapped potential in chunks (default: 1)
+        force_sign: Number, optional
+            sign of the wrapped forces relative to dV/dpos (default: None - the force_sign of the potential)
+        verbose: bool, optional
+            report the interpolation errors after tabulation
+        """
+        n_points = np.broadcast_to(n_points, (2,))
+        if (np.any(n_points < 2) or x_range[1] <= x_range[0] or y_range[1] <= y_range[0]):
+            raise ValueError("tabulatedPotential needs at least two grid points in increasing ranges! Got: " +
+                             str(n_points) + " points in " + str(x_range) + " and " + str(y_range))
+
+        self.potential = potential
+        self.threads = threads
+        self.force_sign = potential.force_sign if (force_sign is None) else force_sign
+        if (self.force_sign not in (-1, 1)):
+            raise ValueError("tabulatedPotential: force_sign needs to be 1 or -1! Got: " + str(self.force_sign))
+        self.verbose = verbose
+        self.grids = (np.linspace(x_range[0], x_range[1], n_points[0]), np.linspace(y_range[0], y_range[1], n_points[1]))
+
+        self.constants = {**potential.constants}
+        self.V_functional = potential.V
+
+        super().__init__()
+        self.tabulate()
+
+    def _initialize_functions(self):
+        nDimensions = self.constants[self.nDimensions]
+        self.position = sp.Matrix([sp.symbols("r_" + str(i)) for i in range(nDimensions)])
+
+    def tabulate(self):
+        """
+            tabulate
+                evaluates the wrapped potential on the grid and estimates the interpolation errors at probe points of
+                all cells.
+        """
+        x_grid, y_grid = self.grids
+        shape = (len(x_grid), len(y_grid))
+        grid_positions = np.stack(np.meshgrid(x_grid, y_grid, indexing="ij"), axis=-1).reshape(-1, 2)
+
+        self.grid_energies = self._evaluate_chunked(self.potential.ene, grid_positions).reshape(shape)
+        forces = self._evaluate_chunked(self.potential.force, grid_positions).reshape(shape + (2,))
+        self._check_force_sign(self.grid_energies, forces, x_grid, y_grid)
+        self.grid_gradients = self.force_sign * forces
+        mixed_derivatives = 0.5 * (np.gradient(self.grid_gradients[:, :, 0], y_grid, axis=1) +
+                                   np.gradient(self.grid_gradients[:, :, 1], x_grid, axis=0))
+
+        # node values and slopes in local coordinates of every cell: [[V, dV/dv], [dV/du, d2V/dudv]] of the 2x2 nodes
+        x_spacing, y_spacing = x_grid[1] - x_grid[0], y_grid[1] - y_grid[0]
+        node_data = [self.grid_energies, y_spacing * self.grid_gradients[:, :, 1],
+                     x_spacing * self.grid_gradients[:, :, 0], x_spacing * y_spacing * mixed_derivatives]
+        corners = lambda data: np.stack([np.stack([data[:-1, :-1], data[:-1, 1:]], axis=-1),
+                                         np.stack([data[1:, :-1], data[1:, 1:]], axis=-1)], axis=-2)
+        values = np.block([[corners(node_data[0]), corners(node_data[1])],
+                           [corners(node_data[2]), corners(node_data[3])]])
+        self.cell_coefficients = self._hermite_matrix @ values @ self._hermite_matrix.T
+
+        # probe points along the cell diagonals
+        x_probes, y_probes = [grid[:-1, None] + (grid[1] - grid[0]) * self._probe_points[None, :] for grid in self.grids]
+        probes = np.stack(np.broadcast_arrays(x_probes[:, None, :], y_probes[None, :, :]), axis=-1).reshape(-1, 2)
+        self.ene_error = float(np.max(np.abs(self._interpolate(probes) -
+                                             self._evaluate_chunked(self.potential.ene, probes)[:, 0])))
+        self.force_error = float(np.max(np.abs(self.force_sign * self._interpolate(probes, derivative=True) -
+                                               self._evaluate_chunked(self.potential.force, probes))))
+        if (self.verbose):
+            print("tabulated " + self.potential.name + " on " + str(shape) + " points: max ene error " +
+                  str(self.ene_error) + ", max force error " + str(self.force_error))
+
+    def _interpolate(self, positions: np.array, derivative: bool = False) -> np.array:
+        (x_grid, y_grid) = self.grids
+        x_cells, u = self._locate(positions[:, 0], x_grid)
+        y_cells, v = self._locate(positions[:, 1], y_grid)
+        coefficients = self.cell_coefficients[x_cells, y_cells]
+        u_powers, v_powers = self._powers(u), self._powers(v)
+
+        if (derivative):
+            return np.stack([np.einsum("ni,nij,nj->n", self._powers(u, derivative=True), coefficients, v_powers) /
+                             (x_grid[1] - x_grid[0]),
+                             np.einsum("ni,nij,nj->n", u_powers, coefficients, self._powers(v, derivative=True)) /
+                             (y_grid[1] - y_grid[0])], axis=-1)
+        else:
+            return np.einsum("ni,nij,nj->n", u_powers, coefficients, v_powers)
+
+    def _evaluate(self, positions: Union[Iterable[Number], Iterable[Iterable[Number]]], derivative: bool = False) -> np.array:
+        positions = np.array(positions, dtype=float).reshape(-1, 2)
+        inside = np.all((positions >= [self.grids[0][0], self.grids[1][0]]) &
+                        (positions <= [self.grids[0][-1], self.grids[1][-1]]), axis=1)
+
+        results = np.empty((len(positions), 2) if (derivative) else len(positions))
+        results[inside] = self._interpolate(positions[inside], derivative=derivative)
+        if (derivative):
+            results[inside] *= self.force_sign
+        if (not np.all(inside)):
+            function = self.potential.force if (derivative) else self.potential.ene
+            results[~inside] = np.reshape(function(positions[~inside]), results[~inside].shape)
+        return np.squeeze(results)[()]
+
+    def ene(self, positions: Union[Iterable[Number], Iterable[Iterable[Number]]]) -> Union[Number, Iterable[Number]]:
+        """
+            ene
+                calculates the potential energy of the given position/s by interpolation of the tabulated energies.
+
+        Parameters
+        ----------
+        positions: Union[Iterable[Number], Iterable[Iterable[Number]]]
+
+        Returns
+        -------
+        ene: Union[Number, Iterable]
+            the calculated potential energies.
+
+        """
+        return self._evaluate(positions)
+
+    def force(self, positions: Union[Iterable[Number], Iterable[Iterable[Number]]]) -> Union[Iterable[Number], Iterable[Iterable[Number]]]:
+        """
+            force
+                calculates the potential forces/gradients of the given position/s as analytic derivative of the
+                interpolated energies.
+
+        Parameters
+        ----------
+        positions: Union[Iterable[Number], Iterable[Iterable[Number]]]
+
+        Returns
+        -------
+        force: Union[Iterable[Number], Iterable[Iterable[Number]]]
+            the calculated potential forces.
+
+        """
+        return self._evaluate(positions, derivative=True)
+
+
 """
 Biased potentials
 """
@@ -397,7 +542,7 @@ Biased potentials
 """
 
 
-class addedPotentials(_potential2DCls):
+class addedPotentials(_compositePotentialCls, _potential2DCls):
     '''
     Adds two different potentials on top of each other. Can be used to generate
     harmonic potential umbrella sampling or scaled potentials
@@ -407,7 +552,7 @@ class addedPotentials(_potential2DCls):
     position: sp.Matrix = sp.Matrix([sp.symbols("r")])
     bias_potential = True
 
-    def __init__(self, origPotential=harmonicOscillatorPotential(), addPotential=gaussPotential()):
+    def __init__(self, origPotential=harmonicOscillatorPotential(), addPotential=gaussPotential(), threads: int = 1):
         '''
         __init__
               This is the Constructor of the addedPotential class.
@@ -418,10 +563,14 @@ class addedPotentials(_potential2DCls):
         addPotential: 2D potential type
             The potential added on top of the unbiased potential to
             bias the system
+        threads: int, optional
+            number of threads evaluating the two potentials (default: 1)
         '''
 
         self.origPotential = origPotential
         self.addPotential = addPotential
+        self.potential_terms = [origPotential, addPotential]
+        self.threads = threads
 
         self.constants = {**origPotential.constants, **addPotential.constants}
 
@@ -455,6 +604,7 @@ class metadynamicsPotential(_potential2DCls):
     '''
 
     name: str = "Metadynamics Enhanced Sampling System using grid bias in 2D"
+    _checkpoint_attributes = ("bias_grid_energy", "bias_grid_force", "current_n")
     position = sp.symbols("r")
     system: systemCls  # metadyn-coupled to system
     bias_potential = True
@@ -1,10 +1,59 @@
 import copy
+import weakref
 import numpy as np, sympy as sp
 
 from ensembler.util.basic_class import _baseClass, notImplementedERR
-from ensembler.util.ensemblerTypes import Iterable, Union, Dict, Number
+from ensembler.util.ensemblerTypes import Iterable, Union, Dict, Number, List, Tuple, Callable
+
+from concurrent.futures.thread import ThreadPoolExecutor
+
+
+class _constantsDict(dict):
+    """
+    dict of the constants of a potential, that counts its modifications and reports them to the owning potential
+    (see _potentialCls.parameter_version).
+    """
+    version: int = 0
+    _owner: weakref.ref = None  # the potential, set by _potentialCls.__setattr__
+
+    def __getstate__(self):
+        # the owner is linked again by the potential after unpickling or copying
+        return {"version": self.version}
+
+    def _modified(self):
+        self.version += 1
+        owner = self._owner() if (self._owner is not None) else None
+        if (owner is not None):
+            owner._parameter_modified()
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._modified()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._modified()
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._modified()
+
+    def setdefault(self, key, default=None):
+        self._modified()
+        return super().setdefault(key, default)
+
+    def pop(self, *args):
+        self._modified()
+        return super().pop(*args)
+
+    def popitem(self):
+        self._modified()
+        return super().popitem()
+
+    def clear(self):
+        super().clear()
+        self._modified()
 
-# from concurrent.futures.thread import ThreadPoolExecutor
 
 class _potentialCls(_baseClass):
     """
@@ -15,12 +64,13 @@ class _potentialCls(_baseClass):
     """
 
     #PRIVATE ATTRIBUTES
+    _parameter_version: int = 0 # counts the modifications, please access via parameter_version
     __nDimensions: sp.Symbol = sp.symbols("nDimensions")   #this Attribute gives the symbol of dimensionality of the potential, please access via nDimensions
     __nStates: sp.Symbol = sp.symbols("nStates") # this Attribute gives the ammount of present states(interesting for free Energy calculus), please access via nStates
     # __threads: int = 1  #Not satisfyingly implemented
 
     def __init__(self, nDimensions:int=1, nStates:int=2):
-        if(not hasattr(self, "_potentialCls__constants")): self.__constants: Dict[sp.Symbol, Union[Number, Iterable]] = {}#contains all set constants and values for the symbols of the potential function, access it via constants
+        if(not hasattr(self, "_potentialCls__constants")): self.__constants: Dict[sp.Symbol, Union[Number, Iterable]] = _constantsDict()#contains all set constants and values for the symbols of the potential function, access it via constants
         self.__constants.update({self.nDimensions: nDimensions, self.nStates: nStates})
         self.name = str(self.__class__.__name__)
 
@@ -52,7 +102,75 @@ class _potentialCls(_baseClass):
 
     @constants.setter
     def constants(self, constants: Dict[sp.Symbol, Union[Number, Iterable]]):
-        self.__constants = constants
+        self.__constants = _constantsDict(constants)
+
+    @property
+    def parameter_version(self) -> int:
+        """
+        counts the modifications of the potential, i.e. of its attributes, its constants and its sub-potentials
+        (e.g. V_is). The count increases with each modification, so that cached energies can be invalidated.
+        """
+        return self._parameter_version
+
+    def __setattr__(self, name: str, value):
+        super().__setattr__(name, value)
+        if (name == "_parameter_version"):
+            return
+        elif (name == "__dict__"):  # restored by __setstate__ (unpickling or copying)
+            for attribute in value.values():
+                self._link_parameters(attribute)
+        else:
+            self._link_parameters(value)
+        self._parameter_modified()
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state.pop("_parents", None)  # weak references, linked again by the parent potentials
+        return state
+
+    def _link_parameters(self, value):
+        """
+        links the constants and the sub-potentials (e.g. V_is) to this potential, such that their modifications
+        increase its parameter_version.
+        """
+        if (isinstance(value, _constantsDict)):
+            value._owner = weakref.ref(self)
+        elif (isinstance(value, _potentialCls)):
+            value.__dict__.setdefault("_parents", weakref.WeakSet()).add(self)
+        elif (isinstance(value, (list, tuple)) and len(value) > 0 and isinstance(value[0], _potentialCls)):
+            for potential in value:
+                self._link_parameters(potential)
+
+    def _parameter_modified(self):
+        """
+        increases the parameter_version of this potential and of all potentials containing it.
+        """
+        self.__dict__["_parameter_version"] = self._parameter_version + 1
+        for parent in self.__dict__.get("_parents", ()):
+            parent._parameter_modified()
+
+    def _checkpoint_state(self) -> Dict:
+        """
+        the checkpoint of a potential contains its numeric constants (by symbol name) and the checkpoint attributes.
+        """
+        state = super()._checkpoint_state()
+        state["constants"] = {str(key): value for key, value in self.constants.items()
+                              if (isinstance(value, (int, float, np.number, np.ndarray)) and not isinstance(value, bool))}
+        return state
+
+    def _restore_checkpoint_state(self, state: Dict):
+        """
+        restores the checkpoint attributes and the changed constants. The functions are only rebuilt, if a constant
+        changed.
+        """
+        super()._restore_checkpoint_state(state)
+        symbols = {str(key): key for key in self.constants}
+        changed = {symbols[name]: value for name, value in state.get("constants", {}).items()
+                   if (name in symbols and not np.array_equal(self.constants[symbols[name]], value))}
+        if (len(changed) > 0):
+            self.constants.update(changed)
+            if (hasattr(self, "_update_functions")):
+                self._update_functions()
 
 
 class _potentialNDCls(_potentialCls):
@@ -67,6 +185,7 @@ class _potentialNDCls(_potentialCls):
 
     V: sp.Function = notImplementedERR
     dVdpos = notImplementedERR
+    force_sign: float = 1.0  # sign of the returned forces relative to dV/dpos, -1 for potentials returning -dV/dpos
 
     def __init__(self, nDimensions: int = -1, nStates: int = 1):
         """
@@ -183,6 +302,18 @@ class _potentialNDCls(_potentialCls):
     def dvdpos(self, positions:Union[Number, Iterable[Number], Iterable[Iterable[Number]]]) -> Union[Number, Iterable[Number], Iterable[Iterable[Number]]]:
         return self.force(positions)
 
+    def _kernel_functions(self) -> Tuple[Callable, Callable]:
+        """
+            _kernel_functions
+                returns the energy and force function for the fast simulation path of system.simulate(kernel=True).
+
+        Returns
+        -------
+        Tuple[Callable, Callable]
+            energy function, force function
+        """
+        return self.ene, self.force
+
 
 class _potential1DCls(_potentialNDCls):
     '''
@@ -242,6 +373,34 @@ class _potential1DCls(_potentialNDCls):
         """
         return np.squeeze(self._calculate_dVdpos(np.squeeze(np.array(positions))))
 
+    def _kernel_functions(self) -> Tuple[Callable, Callable]:
+        """
+            _kernel_functions
+                returns the energy and force function for the fast simulation path of system.simulate(kernel=True).
+                If ene and force are not overwritten, the generated functions are called directly. The positions are
+                still passed as arrays like in ene and force, as numpy evaluates powers of scalars differently, but
+                0-dimensional results are returned as numpy scalars.
+
+        Returns
+        -------
+        Tuple[Callable, Callable]
+            energy function, force function
+        """
+        if (type(self).ene is not _potential1DCls.ene or type(self).force is not _potential1DCls.force or
+                "ene" in vars(self) or "force" in vars(self)):
+            return super()._kernel_functions()
+
+        calculate_energies, calculate_dVdpos = self._calculate_energies, self._calculate_dVdpos
+
+        def ene(positions):
+            return np.array(calculate_energies(np.array(positions)))[()]
+
+        def force(positions):
+            positions = np.array(positions)
+            return np.array(calculate_dVdpos(positions if (positions.ndim == 0) else np.squeeze(positions)))[()]
+
+        return ene, force
+
 
 class _potential2DCls(_potentialNDCls):
     '''
@@ -262,6 +421,151 @@ class _potential2DCls(_potentialNDCls):
         super().__init__(nDimensions=2, nStates=nStates)
 
 
+class _compositePotentialCls(_potentialNDCls):
+    '''
+    Potential Base Class for potentials composed of a sum of other potentials (the potential_terms).
+
+    The symbolic sum is only kept for the representation and for nesting the potential. The energies and forces are
+    calculated numerically by summing up the results of the already compiled terms. Therefore, the compile time
+    scales linearly with the number of terms. Expensive terms can be evaluated in parallel by a thread pool.
+    Derive the composite from this class first, e.g. class sumPotentials(_compositePotentialCls, _potential1DCls).
+
+    @Composite Pattern
+    '''
+    potential_terms: List[_potentialNDCls] = []
+    threads: int = 1  # number of threads evaluating the terms
+
+    def _update_functions(self):
+        """
+        This function builds the symbolic sum without expanding it and the numeric summation of the terms.
+        """
+        self.V = self.V_functional.subs(self.constants)
+
+        self.dVdpos_functional = sp.diff(self.V_functional, self.position)
+        self.dVdpos = sp.diff(self.V, self.position)
+
+        self._sum_terms = self._build_term_summation(self.threads)
+
+    @staticmethod
+    def _build_term_summation(threads: int = 1) -> Callable:
+        """
+        builds the function summing up the results of the given term functions for the same positions.
+        With more than one thread, the terms are evaluated by a thread pool, the summation order is kept.
+        """
+        if (threads > 1):
+            executor = ThreadPoolExecutor(max_workers=threads)
+            return lambda functions, positions: sum(executor.map(lambda function: function(positions), functions))
+        else:
+            return lambda functions, positions: sum(function(positions) for function in functions)
+
+    def ene(self, positions: Union[Number, Iterable[Number], Iterable[Iterable[Number]]]) -> Union[Number, Iterable[Number]]:
+        """
+            ene
+                calculates the potential energy of the given position/s as the sum of the energies of all terms.
+
+        Parameters
+        ----------
+        positions: Union[Number, Iterable]
+
+        Returns
+        -------
+        ene: Union[Number, Iterable]
+            the calculated potential energies.
+
+        """
+        return self._sum_terms([potential.ene for potential in self.potential_terms], positions)
+
+    def force(self, positions: Union[Number, Iterable[Number], Iterable[Iterable[Number]]]) -> Union[Number, Iterable[Number], Iterable[Iterable[Number]]]:
+        """
+            force
+                calculates the potential forces/gradients of the given position/s as the sum of the forces of all terms.
+
+        Parameters
+        ----------
+        positions: Union[Number, Iterable]
+
+        Returns
+        -------
+        force: Union[Number, Iterable]
+            the calculated potential forces.
+
+        """
+        return self._sum_terms([potential.force for potential in self.potential_terms], positions)
+
+
+class _tabulatedPotentialCls(_potentialNDCls):
+    '''
+    Potential Base Class for potentials, that tabulate the energies and forces of a wrapped potential on a uniform grid
+    once and interpolate them with cubic Hermite polynomials, that are precomputed for every grid cell.
+    The forces of the interpolation are the analytic derivatives of the interpolated energies, returned with the sign
+    convention of the wrapped potential (force_sign). Positions outside of the grid are evaluated with the wrapped potential.
+    The forces of the wrapped potential need to be the derivatives with its positions (e.g. wave potentials in radians),
+    otherwise the reported errors are large.
+    Derive the tabulated potential from this class first, e.g.
+    class tabulatedPotential(_tabulatedPotentialCls, _potential1DCls).
+    '''
+    potential: _potentialNDCls
+    threads: int = 1  # number of threads tabulating the wrapped potential
+    # local cell coordinates, at which the Hermite interpolation errors of the energies (1/2) and forces are largest
+    _probe_points: np.array = np.array([0.5 - np.sqrt(3) / 6, 0.5, 0.5 + np.sqrt(3) / 6])
+    # maps the values and slopes (in local coordinates) of the two nodes of a cell to the cubic polynomial coefficients
+    _hermite_matrix: np.array = np.array([[1, 0, 0, 0], [0, 0, 1, 0], [-3, 3, -2, -1], [2, -2, 1, 1]])
+
+    def _update_functions(self):
+        """
+        The symbolic function of the wrapped potential is only kept for the representation and nesting, no numeric
+        function is compiled.
+        """
+        self.V = self.V_functional.subs(self.constants)
+
+        self.dVdpos_functional = sp.diff(self.V_functional, self.position)
+        self.dVdpos = sp.diff(self.V, self.position)
+
+    def _evaluate_chunked(self, function: Callable, positions: np.array) -> np.array:
+        """
+        evaluates the function in chunks of the positions, in parallel if more than one thread is used.
+        The results are returned with the shape (len(positions), -1).
+        """
+        n_chunks = max(1, min(self.threads, len(positions)))
+        chunks = np.array_split(positions, n_chunks)
+        if (n_chunks > 1):
+            with ThreadPoolExecutor(max_workers=n_chunks) as executor:
+                results = list(executor.map(function, chunks))
+        else:
+            results = [function(chunks[0])]
+        return np.concatenate([np.reshape(result, (len(chunk), -1)) for chunk, result in zip(chunks, results)])
+
+    def _check_force_sign(self, energies: np.array, forces: np.array, *grids: np.array):
+        """
+        checks the force sign of the wrapped potential against the finite difference gradients of the tabulated
+        energies and raises, if they disagree (wrong force_sign or a too coarse grid).
+        """
+        gradients = np.stack(np.gradient(energies, *grids), axis=-1) if (len(grids) > 1) else np.gradient(energies, grids[0])
+        if (np.sum(self.force_sign * forces * gradients) < 0):
+            raise ValueError("tabulatedPotential: the forces of " + self.potential.name + " do not match the gradients "
+                             "of its energies with force_sign " + str(self.force_sign) + ". Check the force_sign or "
+                             "use more grid points.")
+
+    @staticmethod
+    def _locate(positions: np.array, grid: np.array) -> Tuple[np.array, np.array]:
+        """
+        finds the grid cells of the positions and their local coordinates t in [0, 1] in O(1).
+        """
+        spacing = grid[1] - grid[0]
+        cells = np.clip(np.floor((positions - grid[0]) / spacing).astype(int), 0, len(grid) - 2)
+        return cells, (positions - grid[cells]) / spacing
+
+    @staticmethod
+    def _powers(t: np.array, derivative: bool = False) -> np.array:
+        """
+        powers (1, t, t^2, t^3) of the local coordinates t, or their derivatives with t, with the shape (len(t), 4).
+        """
+        if (derivative):
+            return np.stack([np.zeros_like(t), np.ones_like(t), 2 * t, 3 * t ** 2], axis=-1)
+        else:
+            return np.stack([np.ones_like(t), t, t ** 2, t ** 3], axis=-1)
+
+
 class _potential1DClsPerturbed(_potential1DCls):
     '''
     Potential Base Class for 1-Dimensional potential functions, that are coupled as linear combination.
@@ -320,6 +624,38 @@ class _potential1DClsPerturbed(_potential1DCls):
         self.dVdlam = self.dVdlam_functional.subs(self.constants)
         self._calculate_dVdlam = sp.lambdify(self.position, self.dVdlam, "numpy")
 
+        # the lambda grid functions are compiled on demand (see _update_lambda_grid_functions)
+        self._calculate_lambda_grid_energies = None
+        self._calculate_lambda_grid_dVdlam = None
+
+    def _update_lambda_grid_functions(self):
+        """
+        This function compiles the coupling and its lambda derivative as functions of lambda and the end state
+        energies, such that they can be broadcasted over many lambdas without rebuilding the potential.
+        """
+        states = list(self.statePotentials.keys())
+        constants = {key: value for key, value in self.constants.items() if (key != self.lam and key not in states)}
+        coupling = self.coupling.subs(constants)
+
+        self._calculate_lambda_grid_energies = sp.lambdify([self.lam] + states, coupling, "numpy")
+        self._calculate_lambda_grid_dVdlam = sp.lambdify([self.lam] + states, sp.diff(coupling, self.lam), "numpy")
+
+    def _evaluate_lambda_grid(self, positions: (Iterable[Number] or Number), lambdas: (Iterable[Number] or Number),
+                              dvdlam: bool = False) -> np.array:
+        """
+        evaluates the end state energies once and broadcasts them against the lambdas.
+        """
+        if (self._calculate_lambda_grid_energies is None):
+            self._update_lambda_grid_functions()
+        function = self._calculate_lambda_grid_dVdlam if (dvdlam) else self._calculate_lambda_grid_energies
+
+        state_energies = [np.array(state.ene(positions), dtype=float, ndmin=1) for state in self.statePotentials.values()]
+        state_energies = np.broadcast_arrays(*state_energies)
+        lambdas = np.array(lambdas, dtype=float, ndmin=1).reshape(-1, 1)
+
+        values = function(lambdas, *[energies[np.newaxis, :] for energies in state_energies])
+        return np.array(np.broadcast_to(values, (lambdas.shape[0], state_energies[0].shape[0])), dtype=float)
+
     """
         public
     """
@@ -356,3 +692,43 @@ class _potential1DClsPerturbed(_potential1DCls):
     #just a different name
     def dvdlam(self, positions: (Iterable[Number] or Number)) -> (Iterable[Number] or Number):
         return self.lambda_force(positions=positions)
+
+    def ene_lambda_grid(self, positions: (Iterable[Number] or Number), lambdas: (Iterable[Number] or Number)) -> np.array:
+        """
+            ene_lambda_grid
+                calculates the potential energies of the given position/s for many lambda values at once.
+                The end state energies are evaluated only once and the lambda parameter of the potential is not changed.
+
+        Parameters
+        ----------
+        positions: Union[Number, Iterable]
+        lambdas: Union[Number, Iterable]
+            the lambda values of the grid
+
+        Returns
+        -------
+        np.array
+            the potential energies with the shape (len(lambdas), len(positions))
+
+        """
+        return self._evaluate_lambda_grid(positions, lambdas)
+
+    def dvdlam_lambda_grid(self, positions: (Iterable[Number] or Number), lambdas: (Iterable[Number] or Number)) -> np.array:
+        """
+            dvdlam_lambda_grid
+                calculates the derivatives of the potential with the lambda parameter of the given position/s for many
+                lambda values at once.
+
+        Parameters
+        ----------
+        positions: Union[Number, Iterable]
+        lambdas: Union[Number, Iterable]
+            the lambda values of the grid
+
+        Returns
+        -------
+        np.array
+            the lambda derivatives with the shape (len(lambdas), len(positions))
+
+        """
+        return self._evaluate_lambda_grid(positions, lambdas, dvdlam=True)
@@ -4,7 +4,7 @@ Module: Sampler
 """
 
 from ensembler.util.basic_class import _baseClass, notImplementedERR
-from ensembler.util.ensemblerTypes import systemCls as systemType, Tuple
+from ensembler.util.ensemblerTypes import systemCls as systemType, Tuple, Callable
 
 
 class _samplerCls(_baseClass):
@@ -22,6 +22,8 @@ class _samplerCls(_baseClass):
     # general:
     verbose: bool = False
     nDimensions: int = 0
+    # the step reads the current state of the system (needed by system.simulate(kernel=True) and lazy_energies)
+    _step_needs_state: bool = False
 
     def __init__(self):
         """
@@ -58,6 +60,31 @@ class _samplerCls(_baseClass):
         """
         notImplementedERR()
 
+    def _step_kernel(self, system: systemType) -> Callable:
+        """
+        _step_kernel
+            returns the step function for the fast simulation path of system.simulate(kernel=True).
+            The function maps the current (position, velocity, force) to the new ones. By default, it sets the current
+            variables of the system and calls step. Subclasses can return a closure over their parameters instead,
+            which has to give the same results and draw the random numbers in the same order as step.
+
+        Parameters
+        ----------
+        system : systemType
+            The system that should be integrated
+
+        Returns
+        -------
+        Callable
+            the step function
+        """
+
+        def kernel_step(position, velocity, force):
+            system._currentPosition, system._currentVelocities, system._currentForce = position, velocity, force
+            return self.step(system)
+
+        return kernel_step
+
     def integrate(self, system: systemType, steps: int) -> None:
         """
         integrate This function provides an alternative way for System.simulate, just executed by the samplers class.
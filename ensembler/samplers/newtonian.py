@@ -7,7 +7,7 @@ Module: Sampler
 """
 
 from ensembler.samplers._basicSamplers import _samplerCls
-from ensembler.util.ensemblerTypes import systemCls as systemType, Union, Number
+from ensembler.util.ensemblerTypes import systemCls as systemType, Union, Number, Callable
 
 
 class newtonianSampler(_samplerCls):
@@ -82,6 +82,24 @@ class velocityVerletIntegrator(newtonianSampler):
 
         return new_position, new_velocity, new_forces
 
+    def _step_kernel(self, system: systemType) -> Callable:
+        """
+        _step_kernel
+            returns the Velocity Verlet step as closure for system.simulate(kernel=True).
+        """
+        if (self.verbose):
+            return super()._step_kernel(system)
+        dt, mass = self.dt, system.mass
+        _, force = system.potential._kernel_functions()
+
+        def kernel_step(position, velocity, forces):
+            new_position = position + velocity * dt - ((0.5 * forces * (dt ** 2)) / mass)
+            new_forces = force(new_position)
+            new_velocity = velocity - ((0.5 * (forces + new_forces) * dt) / mass)
+            return new_position, new_velocity, new_forces
+
+        return kernel_step
+
 
 class positionVerletIntegrator(newtonianSampler):
     """
@@ -124,6 +142,24 @@ class positionVerletIntegrator(newtonianSampler):
             print("\n")
         return new_position, new_velocity, new_forces
 
+    def _step_kernel(self, system: systemType) -> Callable:
+        """
+        _step_kernel
+            returns the Position Verlet step as closure for system.simulate(kernel=True).
+        """
+        if (self.verbose):
+            return super()._step_kernel(system)
+        dt, mass = self.dt, system.mass
+        _, force = system.potential._kernel_functions()
+
+        def kernel_step(position, velocity, forces):
+            new_forces = force(position)
+            new_velocity = velocity - (new_forces * dt / mass)
+            new_position = position + new_velocity * dt
+            return new_position, new_velocity, new_forces
+
+        return kernel_step
+
 
 class leapFrogIntegrator(newtonianSampler):
     """
@@ -169,3 +205,22 @@ class leapFrogIntegrator(newtonianSampler):
             print("\n")
 
         return new_position, new_velocity, new_forces
+
+    def _step_kernel(self, system: systemType) -> Callable:
+        """
+        _step_kernel
+            returns the leapFrog step as closure for system.simulate(kernel=True).
+        """
+        if (self.verbose):
+            return super()._step_kernel(system)
+        dt, mass = self.dt, system.mass
+        _, force = system.potential._kernel_functions()
+
+        def kernel_step(position, velocity, forces):
+            v_halft = velocity - ((0.5 * dt * forces) / mass)
+            new_position = position + v_halft * dt
+            new_forces = force(new_position)
+            new_velocity = v_halft - ((0.5 * new_forces * dt) / mass)
+            return new_position, new_velocity, new_forces
+
+        return kernel_step
@@ -26,6 +26,7 @@ class conjugate_gradient(optimizer):
     Linear equations should have a symmetric matrix and be positive-definite.
     """
     epsilon: float
+    _step_needs_state = True
 
     def __init__(self, max_step_size: float = 1, epsilon: float = 10 ** -20):
         """
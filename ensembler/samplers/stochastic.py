@@ -10,6 +10,7 @@ import scipy.constants as const
 from ensembler.samplers._basicSamplers import _samplerCls
 from ensembler.util.ensemblerTypes import Union, List, Tuple, Number
 from ensembler.util.ensemblerTypes import systemCls as systemType
+from ensembler.util.random_stream import randomStream
 
 
 class stochasticSampler(_samplerCls):
@@ -32,7 +33,16 @@ class stochasticSampler(_samplerCls):
     _critInSpaceRange = lambda self, pos: self.spaceRange is None or (
             self.spaceRange != None and pos >= min(self.spaceRange) and pos <= max(self.spaceRange))
 
-    def random_shift(self, nDimensions: int) -> Union[float, np.array]:
+    def _walkers_in_space_range(self, positions: np.array) -> np.array:
+        """
+        checks the space range for each walker (first axis of the positions).
+        """
+        if (self.spaceRange is None):
+            return np.ones(len(positions), dtype=bool)
+        in_range = (positions >= min(self.spaceRange)) & (positions <= max(self.spaceRange))
+        return np.all(np.reshape(in_range, (len(positions), -1)), axis=1)
+
+    def random_shift(self, nDimensions: int, rng: randomStream = np.random) -> Union[float, np.array]:
         """
         randomShift
             This function calculates the shift for the current position.
@@ -41,6 +51,10 @@ class stochasticSampler(_samplerCls):
         ----------
         nDimensions : int
             gives the dimensionality of the position, defining the ammount of shifts.
+            (or the shape of the positions of multiple walkers or particles - see system.position_shape)
+        rng : randomStream, optional
+            random numbers to draw from, usually the random stream of the system (see system.rng).
+            (default: the global numpy random state)
 
         Returns
         -------
@@ -49,21 +63,22 @@ class stochasticSampler(_samplerCls):
         """
 
         # which sign will the shift have?
-        sign = np.array([-1 if (x < 50) else 1 for x in np.random.randint(low=0, high=100, size=nDimensions)])
+        sign = np.where(rng.random(size=nDimensions) < 0.5, -1, 1)
 
         # Check if there is a space restriction? - converges faster
         if (not isinstance(self.fixedStepSize, type(None))):
             shift = np.array(np.full(shape=nDimensions, fill_value=self.fixedStepSize), ndmin=1)
         elif (not isinstance(self.spaceRange, type(None))):
-            shift = np.array(np.multiply(np.abs(np.random.randint(low=np.min(self.spaceRange) / self.resolution,
-                                                                  high=np.max(self.spaceRange) / self.resolution,
-                                                                  size=nDimensions)), self.resolution), ndmin=1)
+            low = int(np.min(self.spaceRange) / self.resolution)
+            high = int(np.max(self.spaceRange) / self.resolution)
+            shift = np.array(np.multiply(np.abs(low + np.floor(rng.random(size=nDimensions) * (high - low))),
+                                         self.resolution), ndmin=1)
         else:
-            shift = self.step_size_coefficient * np.array(np.abs(np.random.rand(nDimensions)), ndmin=1)
+            shift = self.step_size_coefficient * np.array(np.abs(rng.random(size=nDimensions)), ndmin=1)
 
         # Is the step shift in the allowed area?
-        if (self.minStepSize != None and any([s < self.minStepSize for s in shift])):
-            self.posShift = np.multiply(sign, np.array([s if (s > self.minStepSize) else self.minStepSize for s in shift]))
+        if (self.minStepSize != None and np.any(shift < self.minStepSize)):
+            self.posShift = np.multiply(sign, np.maximum(shift, self.minStepSize))
         else:
             self.posShift = sign * shift
 
@@ -79,6 +94,7 @@ class monteCarloIntegrator(stochasticSampler):
         Monte Carlo samplers.
     """
     name = "Monte Carlo Integrator"
+    _step_needs_state = True
 
     def __init__(self, space_range: Tuple[Number, Number] = None,
                  step_size_coefficient: Number = 5, minimal_step_size: Number = None,
@@ -127,8 +143,11 @@ class monteCarloIntegrator(stochasticSampler):
         current_state = system.current_state
         self.oldpos = current_state.position
 
+        if (system.nWalkers > 1):
+            return self._step_walkers(system)
+
         while (True):
-            self.random_shift(system.nDimensions)
+            self.random_shift(system.position_shape, system.rng)
             self.newPos = np.add(self.oldpos, self.posShift)
             # only get positions in certain range or accept if no range
             if (self._critInSpaceRange(self.newPos)):
@@ -142,6 +161,22 @@ class monteCarloIntegrator(stochasticSampler):
 
         return np.squeeze(self.newPos), np.nan, np.squeeze(self.posShift)
 
+    def _step_walkers(self, system: systemType) -> Tuple[np.array, float, np.array]:
+        """
+        _step_walkers
+            Monte Carlo step of all walkers of the system at once. Only the walkers outside of the space range draw
+            new shifts.
+        """
+        shifts = np.zeros(system.position_shape)
+        pending = np.ones(system.nWalkers, dtype=bool)
+        while (np.any(pending)):
+            shifts[pending] = self.random_shift(np.shape(shifts[pending]), system.rng)
+            pending[pending] = ~self._walkers_in_space_range(self.oldpos[pending] + shifts[pending])
+
+        self.posShift = shifts
+        self.newPos = np.add(self.oldpos, shifts)
+        return self.newPos, np.nan, self.posShift
+
 
 class metropolisMonteCarloIntegrator(stochasticSampler):
     """
@@ -167,14 +202,15 @@ class metropolisMonteCarloIntegrator(stochasticSampler):
 
     """
     name = "Metropolis Monte Carlo Integrator"
+    _step_needs_state = True
     # Parameters:
     maxIterationTillAccept: float = np.inf  # how often shall the samplers iterate till it accepts a step forcefully
     convergence_limit: int = np.inf  # after reaching a certain limit abort iteration
 
     # METROPOLIS CRITERION
     ##random part of Metropolis Criterion:
-    _default_randomness = lambda self, ene_new, current_state: (
-            self._randomness_factor * np.random.rand() <= np.exp(
+    _default_randomness = lambda self, ene_new, current_state, rng=np.random: (
+            self._randomness_factor * rng.random(size=np.shape(ene_new) if (np.ndim(ene_new) > 0) else None) <= np.exp(
         -1.0 / (const.gas_constant / 1000.0 * current_state.temperature) * (
                     ene_new - current_state.total_potential_energy)))
 
@@ -214,7 +250,7 @@ class metropolisMonteCarloIntegrator(stochasticSampler):
         self.maxIterationTillAccept = max_iteration_tillAccept
 
     ##default Metropolis Criterion
-    def metropolis_criterion(self, ene_new, current_state):
+    def metropolis_criterion(self, ene_new, current_state, rng: randomStream = np.random):
         """
         metropolisCriterion
             The metropolis criterion decides if a step is accepted.
@@ -225,13 +261,18 @@ class metropolisMonteCarloIntegrator(stochasticSampler):
             new energy in case the step is accepted
         current_state: stateType
             state of the current step
+        rng: randomStream, optional
+            random numbers to draw from (default: the global numpy random state)
 
         Returns boolean
-            defines if step is accepted or not
+            defines if step is accepted or not (for each walker, if multiple energies are given)
         -------
 
         """
-        return (ene_new < current_state.total_potential_energy or self._default_randomness(ene_new, current_state))
+        if (np.ndim(ene_new) > 0):
+            return (ene_new < current_state.total_potential_energy) | self._default_randomness(ene_new, current_state,
+                                                                                                rng)
+        return (ene_new < current_state.total_potential_energy or self._default_randomness(ene_new, current_state, rng))
 
     def step(self, system: systemType) -> Tuple[float, None, float]:
         """
@@ -250,14 +291,17 @@ class metropolisMonteCarloIntegrator(stochasticSampler):
 
         """
 
+        if (system.nWalkers > 1):
+            return self._step_walkers(system)
+
         current_iteration = 0
         current_state = system.current_state
         self.oldpos = current_state.position
-        nDimensions = system.nDimensions
+        nDimensions = system.position_shape
 
         # integrate position
         while (current_iteration <= self.convergence_limit and current_iteration <= self.maxIterationTillAccept):  # while no value in spaceRange was found, terminates in first run if no spaceRange
-            self.random_shift(nDimensions)
+            self.random_shift(nDimensions, system.rng)
 
             # eval new Energy
             system._currentPosition = self.oldpos + self.posShift
@@ -268,7 +312,8 @@ class metropolisMonteCarloIntegrator(stochasticSampler):
 
             # MetropolisCriterion
             if (self.maxIterationTillAccept <= current_iteration or ((self._critInSpaceRange(system._currentPosition) and
-                                                                   self.metropolis_criterion(new_ene, current_state)))):
+                                                                   self.metropolis_criterion(new_ene, current_state,
+                                                                                             system.rng)))):
                 break
             else:  # not accepted
                 current_iteration += 1
@@ -288,6 +333,43 @@ class metropolisMonteCarloIntegrator(stochasticSampler):
 
         return np.squeeze(system._currentPosition), np.nan, np.squeeze(self.posShift)
 
+    def _step_walkers(self, system: systemType) -> Tuple[np.array, float, np.array]:
+        """
+        _step_walkers
+            Metropolis Monte Carlo step of all walkers of the system at once. Like in step, each walker draws new
+            shifts until one is accepted. The pending walkers are evaluated with one potential call per iteration.
+        """
+        current_iteration = 0
+        current_state = system.current_state
+        self.oldpos = np.array(current_state.position)
+        current_energies = np.broadcast_to(current_state.total_potential_energy, (system.nWalkers,))
+
+        shifts = np.zeros(system.position_shape)
+        pending = np.ones(system.nWalkers, dtype=bool)
+        while (np.any(pending)):
+            shifts[pending] = self.random_shift(np.shape(shifts[pending]), system.rng)
+            new_positions = self.oldpos[pending] + shifts[pending]
+            new_ene = np.array(system.potential.ene(new_positions), ndmin=1)
+
+            # MetropolisCriterion
+            pending_state = current_state._replace(position=self.oldpos[pending],
+                                                   total_potential_energy=current_energies[pending])
+            accepted = self._walkers_in_space_range(new_positions) & self.metropolis_criterion(new_ene, pending_state, system.rng)
+            if (self.maxIterationTillAccept <= current_iteration):
+                accepted[:] = True
+            pending[pending] = ~accepted
+            current_iteration += 1
+
+            if (np.any(pending) and current_iteration >= self.convergence_limit):
+                raise ValueError(
+                    "Metropolis-MonteCarlo samplers did not converge! Think about the maxIterationTillAccept")
+
+        self.posShift = shifts
+        self.newPos = self.oldpos + shifts
+        if (self.verbose):
+            print(str(self.__name__) + ": walkers accepted after " + str(current_iteration) + " iterations")
+        return self.newPos, np.nan, self.posShift
+
 
 '''
 Langevin stochastic integration
@@ -301,6 +383,7 @@ class langevinIntegrator(stochasticSampler):
     Integrator does not calculate velocities. Therefore, the kinetic energy is undefined.
     """
     name = "Langevin Integrator"
+    _checkpoint_attributes = ("_oldPosition", "_first_step", "R_x", "newForces")
 
     def __init__(self, dt: float = 0.005, gamma: float = 50, old_position: float = None):
         """
@@ -351,9 +434,9 @@ class langevinIntegrator(stochasticSampler):
 
         """
 
-        nDimensions = system.nDimensions
+        nDimensions = system.position_shape
         # get random number, normal distributed for nDimensions dimentions
-        curr_random = np.squeeze(np.random.normal(0, 1, nDimensions))
+        curr_random = np.squeeze(system.rng.normal(size=nDimensions))
         # scale random number according to fluctuation-dissipation theorem
         # energy is expected to be in units of k_B
         self.R_x = np.sqrt(2 * system.temperature * self.gamma * system.mass / self.dt) * curr_random
@@ -399,7 +482,7 @@ class langevinIntegrator(stochasticSampler):
 
             self._oldPosition = self.currentPosition - self.currentVelocity * self.dt
 
-            if(system.nDimensions < len(np.array(self._oldPosition, ndmin=1))):   #this is not such a nice fix, but if multiple states are involved, multiple vels are needed as well.
+            if(system.position_shape == system.nDimensions and system.nDimensions < len(np.array(self._oldPosition, ndmin=1))):   #this is not such a nice fix, but if multiple states are involved, multiple vels are needed as well.
                 self._oldPosition = np.squeeze(self._oldPosition[:system.nDimensions])
         else:
             self._oldPosition = np.array(self._oldPosition)
@@ -455,10 +538,10 @@ class langevinVelocityIntegrator(langevinIntegrator):
 
         # for the first step we have to calculate new random numbers and forces
         # then we can take the one from  the previous  step
-        nDimensions = system.nDimensions
+        nDimensions = system.position_shape
         if self._first_step:
             # get random number, normal distributed for nDimensions dimentions
-            curr_random = np.squeeze(np.random.normal(0, 1, nDimensions))
+            curr_random = np.squeeze(system.rng.normal(size=nDimensions))
             # scale random number according to fluctuation-dissipation theorem
             # energy is expected to be in units of k_B
             self.R_x = np.sqrt(2 * system.temperature * self.gamma * system.mass / self.dt) * curr_random
@@ -476,7 +559,7 @@ class langevinVelocityIntegrator(langevinIntegrator):
 
         # calculate forces and random number for new position
         # get random number, normal distributed for nDimensions dimentions
-        curr_random = np.squeeze(np.random.normal(0, 1, nDimensions))  # for n dimentions
+        curr_random = np.squeeze(system.rng.normal(size=nDimensions))  # for n dimentions
         # scale random number according to fluctuation-dissipation theorem
         # energy is expected to be in units of k_B
         self.R_x = np.sqrt(2 * system.temperature * self.gamma * system.mass / self.dt) * curr_random
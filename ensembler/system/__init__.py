@@ -1,5 +1,5 @@
 """
 Systems wrap the sampler and the potential class to allow easy orchestration of simulations.
 """
-from . import basic_system, eds_system, perturbed_system
+from . import basic_system, eds_system, perturbed_system, observers
 from .basic_system import system
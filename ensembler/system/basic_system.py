@@ -14,8 +14,11 @@ pd.options.mode.use_inf_as_na = True
 
 # Typing
 from ensembler.util.basic_class import _baseClass
-from ensembler.util.ensemblerTypes import samplerCls, conditionCls, potentialCls, Number, Union, Iterable, NoReturn, \
-    List
+from ensembler.util.random_stream import randomStream
+from ensembler.util.profiling import simulationProfile
+from ensembler.util.trajectory_retention import allRetention, retention_policies
+from ensembler.util.ensemblerTypes import samplerCls, conditionCls, observerCls, potentialCls, Number, Union, Iterable, \
+    NoReturn, List, Tuple, Dict
 
 from ensembler.util import dataStructure as data
 
@@ -38,9 +41,19 @@ class system(_baseClass):
 
     # general attributes
     nParticles: int
+    nWalkers: int
     nDimensions: int
     nStates: int
 
+    # versions of the coordinates, increased on each assignment (see _update_energies)
+    _position_version: int = 0
+    _velocity_version: int = 0
+
+    # stored by save_checkpoint
+    _checkpoint_attributes = ("_currentPosition", "_currentVelocities", "_currentForce", "_currentTemperature",
+                              "_currentTotE", "_currentTotPot", "_currentTotKin", "_temperature", "_mass", "step",
+                              "initial_position")
+
     """
         Attributes
     """
@@ -101,6 +114,39 @@ class system(_baseClass):
         else:
             raise ValueError("Conditions needs to be a List of objs, that are a subclass of _conditionCls")
 
+    @property
+    def observers(self) -> List[observerCls]:
+        """
+        observers list contains the observers of the system, which are called during the simulation on their steps,
+        without changing the system.
+
+        Returns
+        -------
+        List[_observerCls]
+            the list of observers of the system.
+        """
+        return self._observers
+
+    @observers.setter
+    def observers(self, observers: List[observerCls]):
+        if (isinstance(observers, List)):
+            self._observers = observers
+        else:
+            raise ValueError("Observers needs to be a List of objs, that are a subclass of _observerCls")
+
+    def add_observer(self, observer: observerCls) -> NoReturn:
+        """
+            add_observer
+                adds an observer to the system.
+
+        Parameters
+        ----------
+        observer: _observerCls
+            observer, that is called every observer.every_step steps and/or with blocks of observer.block_size saved
+            frames
+        """
+        self._observers.append(observer)
+
     @property
     def total_system_energy(self) -> Number:
         """
@@ -173,7 +219,69 @@ class system(_baseClass):
 
     @property
     def trajectory(self) -> pd.DataFrame:
-        return pd.DataFrame(list(map(lambda x: x._asdict(), self._trajectory)), columns=list(self.state.__dict__["_fields"]))
+        """
+            trajectory
+                the saved states of the simulation. For multiple walkers, the rows are indexed by (frame, walker).
+
+        Returns
+        -------
+        pd.DataFrame
+            the trajectory
+        """
+        if (self.nWalkers == 1):
+            return pd.DataFrame(list(map(lambda x: x._asdict(), self._trajectory)),
+                                columns=list(self.state.__dict__["_fields"]))
+
+        n_frames = len(self._trajectory)
+        columns = {}
+        for field in self.state.__dict__["_fields"]:
+            # scalars (e.g. the temperature or undefined velocities) are broadcasted to all walkers
+            values = [np.array(getattr(state, field), dtype=float) for state in self._trajectory]
+            shape = max([(self.nWalkers,)] + [value.shape for value in values], key=len)
+            values = np.array([np.broadcast_to(value, shape) for value in values])
+            values = values.reshape((n_frames * self.nWalkers,) + values.shape[2:])
+            columns[field] = list(values) if (values.ndim > 1) else values
+
+        index = pd.MultiIndex.from_product([range(n_frames), range(self.nWalkers)], names=["frame", "walker"])
+        return pd.DataFrame(columns, index=index, columns=list(self.state.__dict__["_fields"]))
+
+    @property
+    def position_shape(self) -> Union[int, Tuple[int, ...]]:
+        """
+            position_shape
+                the shape of the positions of all walkers or particles, which is used by the samplers to draw random
+                numbers: nDimensions for a single particle, else (n,) for one dimension or (n, nDimensions).
+
+        Returns
+        -------
+        Union[int, Tuple[int, ...]]
+            shape of the positions
+        """
+        n = max(self.nWalkers, self.nParticles)
+        if (n == 1):
+            return self.nDimensions
+        elif (self.nDimensions == 1):
+            return (n,)
+        else:
+            return (n, self.nDimensions)
+
+    @property
+    def _currentPosition(self) -> Union[Number, Iterable[Number]]:
+        return self.__dict__["_currentPosition"]
+
+    @_currentPosition.setter
+    def _currentPosition(self, position: Union[Number, Iterable[Number]]):
+        self.__dict__["_currentPosition"] = position
+        self._position_version += 1
+
+    @property
+    def _currentVelocities(self) -> Union[Number, Iterable[Number]]:
+        return self.__dict__["_currentVelocities"]
+
+    @_currentVelocities.setter
+    def _currentVelocities(self, velocities: Union[Number, Iterable[Number]]):
+        self.__dict__["_currentVelocities"] = velocities
+        self._velocity_version += 1
 
     @property
     def position(self) -> Union[Number, Iterable[Number]]:
@@ -248,13 +356,15 @@ class system(_baseClass):
     @mass.setter
     def mass(self, mass: float):
         self._mass = mass
+        self._velocity_version += 1  # the kinetic energy changes
 
 
 
 
     def __init__(self, potential: potentialCls=harmonicOscillatorPotential(), sampler: samplerCls=metropolisMonteCarloIntegrator(), conditions: Iterable[conditionCls] = None,
                  temperature: Number = 298.0, start_position: (Iterable[Number] or Number) = None, mass: Number = 1,
-                 verbose: bool = True) -> NoReturn:
+                 n_walkers: int = 1, n_particles: int = 1, seed: Union[int, np.random.SeedSequence] = None,
+                 observers: Iterable[observerCls] = None, verbose: bool = True) -> NoReturn:
         """
             The system class is wrapping all components needed for a simulation.
             It can be used as the control unit for executing a simulation (simulate) and also to manage the generated data or input data.
@@ -270,9 +380,23 @@ class system(_baseClass):
         temperature : float, optional
             temperature of the system
         start_position : float, optional
-            starting position of the system during the simulation
+            starting position of the system during the simulation. For multiple walkers, either one position for all
+            walkers or one position per walker. For multiple particles, one position per particle.
         mass : float, optional
             mass of the single particle
+        n_walkers : int, optional
+            number of independent walkers, that share the potential and the sampler and are propagated together.
+            The positions, velocities and energies get a leading walker axis. (default: 1)
+        n_particles : int, optional
+            number of interacting particles, e.g. for a ND.pairPotential. The positions and velocities get a leading
+            particle axis, the energies are the totals of all particles. (default: 1)
+        seed : Union[int, np.random.SeedSequence], optional
+            seed of the random stream of the system, which is used by the sampler and the conditions
+            (see ensembler.util.random_stream). If None, the seed is drawn from the global numpy random state.
+            (default: None)
+        observers : Iterable[_observerCls], optional
+            observers, that are called on their steps or with blocks of the saved frames during the simulation
+            (see ensembler.system.observers). (default: None)
         verbose : bool, optional
             I can tell you a long iterative story...
         """
@@ -282,13 +406,28 @@ class system(_baseClass):
         #################################
 
         ##Physical parameters
-        self.nParticles = 1  # FUTURE: adapt it to be multiple particles
-        self._mass = mass  # for one particle systems!!!!
+        if (n_walkers < 1 or n_particles < 1):
+            raise ValueError("system: needs at least one walker and particle. Got: n_walkers=" + str(n_walkers) +
+                             " n_particles=" + str(n_particles))
+        if (n_walkers > 1 and n_particles > 1):
+            raise ValueError("system: multiple walkers of multiple particles are not supported.")
+        self.nParticles = n_particles
+        self.nWalkers = n_walkers
+        self._mass = mass  # same mass for all particles
         self._temperature = temperature
+        self.rng = randomStream(seed=seed)
 
         # Output
         self._currentState = self.state(**{key: np.nan for key in self.state.__dict__["_fields"]})
-        self._trajectory =[]
+        self._trajectory: allRetention = allRetention()  # see set_trajectory_retention
+
+        # energy cache - the energies are only evaluated once for each distinct state
+        self._energy_cache_key: Tuple = None
+        self.energy_cache_hits: int = 0
+        self.energy_cache_misses: int = 0
+
+        # profiling - filled by simulate(profile=True)
+        self.profile: simulationProfile = None
 
         # tmpvars - private:
         self._currentTotE: (Number) = np.nan
@@ -309,6 +448,8 @@ class system(_baseClass):
         else:
             self._conditions = conditions
 
+        self._observers = [] if (observers is None) else list(observers)
+
         ## set dim
         if (potential.constants[potential.nDimensions] > 0):
             self.nDimensions = potential.constants[potential.nDimensions]
@@ -415,6 +556,8 @@ class system(_baseClass):
         """
         if (isinstance(initial_position, type(None))):
             self.initial_position = self.random_position()
+        elif (self.position_shape != self.nDimensions):
+            self.initial_position = self._init_walker_positions(initial_position)
         elif ((isinstance(initial_position, Number) and self.nDimensions == 1) or
               (isinstance(initial_position, Iterable) and all(
                   [isinstance(x, Number) for x in initial_position]) and self.nDimensions == len(initial_position))):
@@ -427,13 +570,40 @@ class system(_baseClass):
         self.update_current_state()
         return self.initial_position
 
+    def _init_walker_positions(self, initial_position: Union[Number, Iterable[Number]]) -> np.array:
+        """
+            _init_walker_positions
+                broadcasts the given initial position to all walkers. Particles need one position each.
+
+        Parameters
+        ----------
+        initial_position: Union[Number, Iterable[Number]]
+            one position for all walkers or one position per walker (particle).
+
+        Returns
+        -------
+        np.array
+            the positions of the walkers
+        """
+        initial_position = np.array(initial_position, dtype=float)
+        shapes = [self.position_shape] if (self.nParticles > 1) else [(), (self.nDimensions,), self.position_shape]
+        if (initial_position.shape in shapes):
+            return np.array(np.broadcast_to(np.squeeze(initial_position) if (self.nDimensions == 1) else
+                                            initial_position, self.position_shape))
+        else:
+            raise Exception("Did not understand the initial position! \n given: " + str(
+                initial_position) + "\n Expected shape: " + str(self.position_shape))
+
     def _init_velocities(self) -> NoReturn:
         """
             _init_velocities
                 Initializes the initial velocity randomly.
 
         """
-        if (self.nStates > 1):
+        if (self.position_shape != self.nDimensions):
+            self._currentVelocities = np.sqrt(const.gas_constant / 1000.0 * self.temperature / self.mass) * \
+                                      self.rng.normal(self.position_shape)
+        elif (self.nStates > 1):
             self._currentVelocities = [[self._gen_rand_vel() for dim in range(self.nDimensions)] for s in
                                        range(self.nStates)] if (self.nDimensions > 1) else [self._gen_rand_vel() for
                                                                                             state in
@@ -457,7 +627,7 @@ class system(_baseClass):
         Number, Iterable[Number]
             a randomly selected velocity
         """
-        return np.sqrt(const.gas_constant / 1000.0 * self.temperature / self.mass) * np.random.normal()
+        return np.sqrt(const.gas_constant / 1000.0 * self.temperature / self.mass) * self.rng.normal()
 
     def random_position(self) -> Union[Number, Iterable[Number]]:
         """
@@ -469,7 +639,10 @@ class system(_baseClass):
             a random position
         """
 
-        random_pos = np.squeeze(np.array(np.subtract(np.multiply(np.random.rand(self.nDimensions), 20), 10)))
+        if (self.position_shape != self.nDimensions):
+            return np.subtract(np.multiply(self.rng.random(self.position_shape), 20), 10)
+
+        random_pos = np.squeeze(np.array(np.subtract(np.multiply(self.rng.random(self.nDimensions), 20), 10)))
         if (len(random_pos.shape) == 0):
             return np.float(random_pos)
         else:
@@ -486,11 +659,26 @@ class system(_baseClass):
         Returns
         -------
         Union[Iterable[Number], Number, np.nan]
-            total kinetic energy.
+            total kinetic energy (per walker).
         """
-        if (isinstance(self._currentVelocities, Number) or (isinstance(self._currentVelocities, Iterable) and all(
-                [isinstance(x, Number) and not np.isnan(x) for x in self._currentVelocities]))):
-            return np.sum(0.5 * self.mass * np.square(np.linalg.norm(self._currentVelocities)))
+        return self._kinetic_energy(self._currentVelocities)
+
+    def _kinetic_energy(self, velocities: Union[Iterable[Number], Number]) -> Union[Iterable[Number], Number]:
+        """
+            _kinetic_energy
+                calculates the total kinetic energy of the given velocities (per walker).
+        """
+        if (self.nWalkers > 1):
+            if (velocities is None or np.ndim(velocities) == 0):
+                return np.full(self.nWalkers, np.nan)
+            return 0.5 * self.mass * np.square(np.linalg.norm(np.reshape(velocities, (self.nWalkers, -1)), axis=1))
+        elif (self.nParticles > 1):
+            if (velocities is None or np.ndim(velocities) == 0):
+                return np.nan
+            return 0.5 * self.mass * np.sum(np.square(velocities))
+        elif (isinstance(velocities, Number) or (isinstance(velocities, Iterable) and all(
+                [isinstance(x, Number) and not np.isnan(x) for x in velocities]))):
+            return np.sum(0.5 * self.mass * np.square(np.linalg.norm(velocities)))
         else:
             return np.nan
 
@@ -547,17 +735,54 @@ class system(_baseClass):
     def _update_energies(self) -> NoReturn:
         """
             _updateEne
-                update all total energy terms.
+                update all total energy terms. The energies are cached for the current position, velocities and
+                potential parameters and are only evaluated, if one of them changed since the last update
+                (see energy_cache_hits and energy_cache_misses).
 
         Returns
         -------
         NoReturn
 
         """
+        # the key is reset by propagate, so the lookup is skipped for new positions
+        if (self._energy_cache_key is not None and self._energy_cache_key == self._current_energy_cache_key()):
+            self.energy_cache_hits += 1
+            return
+        self.energy_cache_misses += 1
+
         self._currentTotPot = self.calculate_total_potential_energy()
         self._currentTotKin = self.calculate_total_kinetic_energy()
-        self._currentTotE = self._currentTotPot if (np.isnan(self._currentTotKin)) else np.add(self._currentTotKin,
-                                                                                               self._currentTotPot)
+        self._currentTotE = self._currentTotPot if (np.all(np.isnan(self._currentTotKin))) else np.add(
+            self._currentTotKin, self._currentTotPot)
+
+        # taken after the evaluation, as potentials may update internal caches (e.g. neighbour lists)
+        self._energy_cache_key = self._current_energy_cache_key()
+
+    def _current_energy_cache_key(self) -> Tuple:
+        return (self._position_version, self._velocity_version, id(self.potential), self.potential.parameter_version)
+
+    def _checkpoint_state(self) -> Dict:
+        """
+        the checkpoint of a system contains the current variables, the random stream and the checkpoints of the potential
+        and the sampler.
+        The trajectory is not part of the checkpoint (see write_trajectory).
+        """
+        state = super()._checkpoint_state()
+        state["potential"] = self.potential._checkpoint_state()
+        state["sampler"] = self.sampler._checkpoint_state()
+        state["rng"] = self.rng.get_state()
+        return state
+
+    def _restore_checkpoint_state(self, state: Dict):
+        """
+        restores the potential, the sampler and the current variables and updates the current state.
+        """
+        self.potential._restore_checkpoint_state(state["potential"])
+        self.sampler._restore_checkpoint_state(state["sampler"])
+        self.rng.set_state(state["rng"])
+        super()._restore_checkpoint_state(state)
+        self._energy_cache_key = None
+        self.update_current_state()
 
     def _update_current_vars_from_current_state(self):
         """
@@ -573,7 +798,7 @@ class system(_baseClass):
         self._currentTemperature = self.current_state.temperature
         self._currentTotE = self.current_state.total_system_energy
         self._currentTotPot = self.current_state.total_potential_energy
-        self._currentTotKin = self.state.total_kinetic_energy
+        self._currentTotKin = self.current_state.total_kinetic_energy
         self._currentForce = self.current_state.dhdpos
         self._currentVelocities = self.current_state.velocity
 
@@ -598,7 +823,8 @@ class system(_baseClass):
     def simulate(self, steps: int,
                  withdraw_traj: bool = False, save_every_state: int = 1,
                  init_system: bool = False,
-                 verbosity: bool = True, _progress_bar_prefix: str = "Simulation: ") -> state:
+                 verbosity: bool = True, kernel: bool = False, lazy_energies: bool = False,
+                 profile: bool = False, _progress_bar_prefix: str = "Simulation: ") -> state:
         """
             this function executes the simulation, by exploring the potential energy function with the sampling method for the given n steps.
 
@@ -614,6 +840,19 @@ class system(_baseClass):
             save every n step. (and leave out the rest) (default: 1 - each step)
         verbosity: bool, optional
             change the verbosity of the simulation. (default: True)
+        kernel: bool, optional
+            use the fast simulation path, that compiles the sampler step, the potential and the conditions into one
+            loop. It gives the same trajectory as the default path, but supports only stateless conditions
+            (e.g. periodicBoundaryCondition) and systems with the basic state. (default: False)
+        lazy_energies: bool, optional
+            only calculate the energies and the state for the saved steps. The saved trajectory does not change, but
+            the steps in between skip the potential evaluation. Samplers that read the current state
+            (e.g. metropolisMonteCarloIntegrator) still get it every step. (default: False)
+        profile: bool, optional
+            count and time the simulation phases (propagate, apply_conditions, update_system_properties,
+            update_current_state and append_trajectory) and count the ene and force calls of the potentials. The
+            counts are added to self.profile, see get_profile_report. With kernel, only the whole kernel is timed.
+            The time of the observers is reported as observers. (default: False)
         _progress_bar_prefix: str, optional
             prefix of tqdm progress bar. (default: "Simulation")
 
@@ -621,14 +860,22 @@ class system(_baseClass):
         -------
         state
             returns the last current state
+
+        Raises
+        ------
+        ValueError
+            if kernel is set and the system or a condition does not support the fast simulation path or the system
+            has observers.
         """
+        if (kernel and len(self._observers) > 0):
+            raise ValueError("system: the fast simulation path (kernel=True) does not support observers.")
 
         if (init_system):
             self._init_position()
             self._init_velocities()
 
         if (withdraw_traj):
-            self._trajectory = []
+            self._trajectory = self._new_trajectory()
             self._trajectory.append(self.current_state)
 
         self.update_current_state()
@@ -641,27 +888,257 @@ class system(_baseClass):
         else:
             iteration_queue = range(steps)
 
-        # Simulation loop
-        for self.step in iteration_queue:
+        # the phases are bound once, so that the loop has no profiling overhead, if profile is False
+        propagate = self.propagate
+        apply_conditions = self.apply_conditions
+        update_system_properties = self.update_system_properties
+        update_current_state = self.update_current_state
+        append_trajectory = self._trajectory.append
+        simulate_kernel = self._simulate_kernel
+        if (profile):
+            if (self.profile is None):
+                self.profile = simulationProfile()
+            propagate = self.profile.timed("propagate", propagate)
+            apply_conditions = self.profile.timed("apply_conditions", apply_conditions)
+            update_system_properties = self.profile.timed("update_system_properties", update_system_properties)
+            update_current_state = self.profile.timed("update_current_state", update_current_state)
+            append_trajectory = self.profile.timed("append_trajectory", append_trajectory)
+            simulate_kernel = self.profile.timed("kernel", simulate_kernel)
+            counted_potentials = self.profile.count_potential(self.potential)
+
+        # observers - the step observers are only called on their steps, the block observers get the saved frames
+        step_observers = [observer for observer in self._observers if (observer.every_step is not None)]
+        block_observers = [observer for observer in self._observers if (observer.block_size is not None)]
+        advance_observers = self._advance_observers
+        observe_frame = self._observe_frame
+        if (profile):
+            advance_observers = self.profile.timed("observers", advance_observers)
+            observe_frame = self.profile.timed("observers", observe_frame)
+        last_observation = -1
+        next_observation = last_observation + self._advance_observers(step_observers, 0) if (step_observers) else steps
+        if (len(block_observers) > 0):
+            append_state = append_trajectory
+
+            def append_trajectory(state):
+                append_state(state)
+                observe_frame(block_observers, state)
 
-            # Do one simulation Step.
-            self.propagate()
+        try:
+            if (kernel):
+                simulate_kernel(steps=steps, save_every_state=save_every_state, iteration_queue=iteration_queue)
+                return self.current_state
 
-            # Apply Restraints, Constraints ...
-            self.apply_conditions()
+            every_step = not lazy_energies or self.sampler._step_needs_state
 
-            # Calc new Energy&and other system properties
-            self.update_system_properties()
+            # Simulation loop
+            for self.step in iteration_queue:
 
-            # Set new State
-            self.update_current_state()
+                # Do one simulation Step.
+                propagate()
 
-            if (self.step % save_every_state == 0 and self.step != steps - 1):
-                self._trajectory.append(self.current_state)
+                # Apply Restraints, Constraints ...
+                apply_conditions()
 
+                observe = self.step == next_observation
+                if (every_step or observe or self.step % save_every_state == 0 or self.step == steps - 1):
+                    # Calc new Energy&and other system properties
+                    update_system_properties()
 
-        self._trajectory.append(self.current_state)
-        return self.current_state
+                    # Set new State
+                    update_current_state()
+
+                if (observe):
+                    next_observation = self.step + advance_observers(step_observers, self.step - last_observation)
+                    last_observation = self.step
+
+                if (self.step % save_every_state == 0 and self.step != steps - 1):
+                    append_trajectory(self.current_state)
+
+            append_trajectory(self.current_state)
+            if (step_observers):
+                self._advance_observers(step_observers, steps - 1 - last_observation)
+            return self.current_state
+        finally:
+            if (profile):
+                self.profile.uncount_potential(counted_potentials)
+
+    def _advance_observers(self, observers: List[observerCls], elapsed_steps: int) -> int:
+        """
+            _advance_observers
+                counts down the steps of the observers by the elapsed steps and calls the due observers.
+
+        Parameters
+        ----------
+        observers: List[_observerCls]
+            observers with every_step
+        elapsed_steps: int
+            steps since the last call
+
+        Returns
+        -------
+        int
+            steps until the next due observer
+        """
+        next_observation = None
+        for observer in observers:
+            if (observer._countdown is None):
+                observer._countdown = observer.every_step
+            observer._countdown -= elapsed_steps
+            if (observer._countdown <= 0):
+                observer.observe(self)
+                observer._countdown = observer.every_step
+            if (next_observation is None or observer._countdown < next_observation):
+                next_observation = observer._countdown
+        return next_observation
+
+    def _observe_frame(self, observers: List[observerCls], frame: state) -> NoReturn:
+        for observer in observers:
+            observer._add_frame(self, frame)
+
+    def flush_observers(self) -> NoReturn:
+        """
+            flush_observers
+                passes the saved frames of the incomplete blocks to the block observers, e.g. at the end of a
+                simulation.
+        """
+        for observer in self._observers:
+            if (observer.block_size is not None):
+                observer.flush(self)
+
+    def get_profile_report(self) -> pd.DataFrame:
+        """
+            get_profile_report
+                the counts and times of the simulations with profile=True.
+
+        Returns
+        -------
+        pd.DataFrame
+            one row per simulation phase and per potential class and function (see simulationProfile.report)
+        """
+        if (self.profile is None):
+            return simulationProfile().report()
+        return self.profile.report()
+
+    def _simulate_kernel(self, steps: int, save_every_state: int, iteration_queue: Iterable[int]) -> NoReturn:
+        """
+            _simulate_kernel
+                the fast simulation path of simulate. The sampler step, the potential and the conditions are compiled
+                into one loop, which writes the saved steps into preallocated buffers. The energies are only
+                calculated for the saved steps (or each step, if the sampler needs the current state).
+
+        Parameters
+        ----------
+        steps: int
+            number of integration steps
+        save_every_state: int
+            save every n step.
+        iteration_queue: Iterable[int]
+            the steps (range or tqdm progress bar)
+
+        Raises
+        ------
+        ValueError
+            if the system or a condition does not support the fast simulation path.
+        """
+        if (self.state is not data.basicState):
+            raise ValueError("system.simulate: the kernel path only supports systems with the basic state. Got: " +
+                             str(self.state.__name__))
+        condition_kernels = [condition._kernel() for condition in self._conditions]
+        if (any(condition_kernel is None for condition_kernel in condition_kernels)):
+            raise ValueError("system.simulate: the kernel path only supports stateless conditions. Got: " +
+                             str([condition.name for condition, condition_kernel in
+                                  zip(self._conditions, condition_kernels) if (condition_kernel is None)]))
+        if (steps < 1):
+            self._trajectory.append(self.current_state)
+            return
+
+        sampler_step = self.sampler._step_kernel(self)
+        needs_state = self.sampler._step_needs_state
+        ene, _ = self.potential._kernel_functions()
+        state = self.state
+        temperature = self.temperature
+
+        # preallocated trajectory buffers
+        n_frames = len(range(0, steps - 1, save_every_state)) + 1
+        positions = np.empty(n_frames, dtype=object)
+        velocities = np.empty(n_frames, dtype=object)
+        forces = np.empty(n_frames, dtype=object)
+        potential_energies = np.empty(n_frames, dtype=object)
+
+        # Simulation loop
+        position, velocity, force = self._currentPosition, self._currentVelocities, self._currentForce
+        last_step = steps - 1
+        frame = 0
+        for step in iteration_queue:
+            position, velocity, force = sampler_step(position, velocity, force)
+            for condition_kernel in condition_kernels:
+                position, velocity = condition_kernel(step, position, velocity)
+
+            if (needs_state):
+                self._currentPosition, self._currentVelocities, self._currentForce = position, velocity, force
+                potential_energy = ene(position)
+                kinetic_energy = self.calculate_total_kinetic_energy()
+                self._currentState = state(position, temperature,
+                                           potential_energy if (np.all(np.isnan(kinetic_energy))) else np.add(
+                                               kinetic_energy, potential_energy),
+                                           potential_energy, kinetic_energy, force, velocity)
+
+            if (step % save_every_state == 0 or step == last_step):
+                positions[frame], velocities[frame], forces[frame] = position, velocity, force
+                if (needs_state):
+                    potential_energies[frame] = potential_energy
+                frame += 1
+        self.step = last_step
+
+        # energies of the saved steps
+        if (not needs_state):
+            for frame, position in enumerate(positions):
+                potential_energies[frame] = ene(position)
+        kinetic_energies = self._kernel_kinetic_energies(velocities)
+
+        no_kinetic_energies = np.all(np.reshape(np.isnan(np.array(kinetic_energies, dtype=float)), (n_frames, -1)),
+                                     axis=1)
+        for position, velocity, force, potential_energy, kinetic_energy, no_kinetic_energy in zip(
+                positions, velocities, forces, potential_energies, kinetic_energies, no_kinetic_energies):
+            total_energy = potential_energy if (no_kinetic_energy) else kinetic_energy + potential_energy
+            last_state = state(position, temperature, total_energy, potential_energy, kinetic_energy, force, velocity)
+            self._trajectory.append(last_state)
+
+        self._currentPosition, self._currentVelocities, self._currentForce = position, velocity, force
+        self._currentTemperature = temperature
+        self._currentTotPot, self._currentTotKin, self._currentTotE = potential_energy, kinetic_energy, total_energy
+        self._currentState = last_state
+
+    def _kernel_kinetic_energies(self, velocities: Iterable) -> np.array:
+        """
+            _kernel_kinetic_energies
+                calculates the kinetic energies of the saved velocities of the kernel path, like
+                calculate_total_kinetic_energy. Scalar velocities of a single walker are calculated at once.
+
+        Parameters
+        ----------
+        velocities: Iterable
+            velocities of the saved steps
+
+        Returns
+        -------
+        np.array
+            the total kinetic energies
+        """
+        if (self.position_shape != self.nDimensions):
+            return [self._kinetic_energy(velocity) for velocity in velocities]
+
+        kinetic_energies = np.full(len(velocities), np.nan)
+        scalars = np.array([isinstance(velocity, Number) and isinstance(self.mass, Number) for velocity in velocities],
+                           dtype=bool)
+        if (np.any(scalars)):
+            scalar_velocities = np.array(velocities[scalars], dtype=float)
+            # the norm of a scalar is sqrt(v*v)
+            kinetic_energies[scalars] = 0.5 * self.mass * np.square(np.sqrt(scalar_velocities * scalar_velocities))
+
+        for frame in np.flatnonzero(~scalars):
+            kinetic_energies[frame] = self._kinetic_energy(velocities[frame])
+        return kinetic_energies
 
     def propagate(self) -> (
     Union[Iterable[Number], Number], Union[Iterable[Number], Number], Union[Iterable[Number], Number]):
@@ -677,6 +1154,7 @@ class system(_baseClass):
 
         """
         self._currentPosition, self._currentVelocities, self._currentForce = self.sampler.step(self)
+        self._energy_cache_key = None
         return self._currentPosition, self._currentVelocities, self._currentForce
 
     def apply_conditions(self) -> NoReturn:
@@ -738,7 +1216,52 @@ class system(_baseClass):
         deletes all entries of trajectory and adds current state as first timestep to the trajectory
         :return: None
         """
-        self._trajectory = []
+        self._trajectory = self._new_trajectory()
+
+    @property
+    def trajectory_retention(self) -> str:
+        """
+        the retention policy of the trajectory (see set_trajectory_retention)
+        """
+        return getattr(self._trajectory, "policy", allRetention.policy)
+
+    def set_trajectory_retention(self, policy: str = "all", n_frames: int = None) -> NoReturn:
+        """
+            set_trajectory_retention
+                sets, which of the saved states are kept in the trajectory. Except for "all", the memory of the
+                trajectory is bounded by n_frames, independent of the number of steps. The current state is always
+                available as current_state. The states of the current trajectory are kept according to the new policy.
+
+        Parameters
+        ----------
+        policy: str, optional
+            all - keep all saved states,
+            none - keep only the last saved state,
+            last - keep the last n_frames saved states,
+            stride - keep at most n_frames evenly spaced states (the stride is doubled, if the buffer is full),
+            reservoir - keep a uniform random subsample of n_frames states.
+            (default: all)
+        n_frames: int, optional
+            number of kept states for last, stride and reservoir (default: None)
+
+        Raises
+        ------
+        ValueError
+            if the policy is unknown or n_frames is missing
+        """
+        if (policy not in retention_policies):
+            raise ValueError("system: unknown trajectory retention " + str(policy) + ". Options are: " +
+                             str(list(retention_policies)))
+        rng = self.rng.spawn(1)[0] if (policy == "reservoir") else None
+        trajectory = retention_policies[policy](n_frames=n_frames, rng=rng)
+        trajectory.extend(self._trajectory)
+        self._trajectory = trajectory
+
+    def _new_trajectory(self) -> allRetention:
+        # an empty trajectory with the retention policy of the current one (a list for systems stored before)
+        if (not isinstance(self._trajectory, allRetention)):
+            return allRetention()
+        return self._trajectory.__class__(n_frames=self._trajectory.n_frames, rng=getattr(self._trajectory, "rng", None))
 
     def write_trajectory(self, out_path: str) -> str:
         """
@@ -5,12 +5,14 @@ Module: System
 
 import numpy as np
 import pandas as pd
+import scipy.constants as const
 
 pd.options.mode.use_inf_as_na = True
 
-from ensembler.util.ensemblerTypes import samplerCls, conditionCls, Number, Iterable, Union
+from ensembler.util.ensemblerTypes import samplerCls, conditionCls, observerCls, Number, Iterable, Union, Callable, NoReturn
 
 from ensembler.util import dataStructure as data
+from ensembler.analysis.freeEnergyCalculation import multistateEDS
 from ensembler.potentials import OneD as pot
 from ensembler.samplers.stochastic import metropolisMonteCarloIntegrator
 
@@ -23,6 +25,11 @@ class edsSystem(system):
         The Trajectory contains s and Eoff values for each step.
         Functions like set_s (or simply access s) or set_eoff (or simply access Eoff) give direct acces to the EDS potential.
 
+        In the adaptive mode, the energy offsets are updated during the simulation. The exponential averages
+        <e^(-beta(V_i-V_R))>_R of all states are accumulated in log space over a window of eoff_update_every steps
+        with constant offsets. At the end of each window, the offsets are moved towards the free energies of the states
+        (multistateEDS.propose_eoff_from_free_energies), damped by the damping schedule.
+
     """
     name = "eds system"
     # EDS Dependend Settings
@@ -35,6 +42,15 @@ class edsSystem(system):
     _currentEdsS: Number = np.nan
     _currentEdsEoffs: Iterable[Number] = np.nan
 
+    _checkpoint_attributes = system._checkpoint_attributes + ("_currentEdsS", "_currentEdsEoffs", "_eoff_window_samples",
+                                                              "_eoff_window_log_sums", "eoff_updates")
+
+    # adaptive energy offsets
+    adaptive_eoff: bool = False
+    eoff_update_every: int
+    eoff_damping: Union[Number, Callable[[int], Number], None]
+    eoff_reference_state: int
+
     """
     Attributes
     """
@@ -80,6 +96,7 @@ class edsSystem(system):
         self._currentEdsEoffs = eoff
         self.potential.Eoff_i = self._currentEdsEoffs
         self.update_system_properties()
+        self._reset_eoff_window()
 
     def set_eoff(self, eoff: Iterable[Number]):
         """
@@ -103,7 +120,10 @@ class edsSystem(system):
                  sampler: samplerCls = metropolisMonteCarloIntegrator(),
                  conditions: Iterable[conditionCls] = [],
                  temperature: float = 298.0, start_position: Union[Number, Iterable[Number]] = None,
-                 eds_s: float = 1, eds_Eoff: Iterable[Number] = [0, 0]):
+                 eds_s: float = 1, eds_Eoff: Iterable[Number] = [0, 0],
+                 adaptive_eoff: bool = False, eoff_update_every: int = 1000,
+                 eoff_damping: Union[Number, Callable[[int], Number]] = None, eoff_reference_state: int = 0,
+                 seed: Union[int, np.random.SeedSequence] = None, observers: Iterable[observerCls] = None):
         """
             __init__
                 construct a eds-System that can be used to manage a simulation.
@@ -124,23 +144,110 @@ class edsSystem(system):
             is the S-value of the EDS-Potential
         eds_Eoff: Iterable[Number], optional
             giving the energy offsets for the
+        adaptive_eoff: bool, optional
+            update the energy offsets during the simulation (default: False)
+        eoff_update_every: int, optional
+            number of steps of an averaging window, after which the energy offsets are updated (default: 1000)
+        eoff_damping: Union[Number, Callable[[int], Number]], optional
+            fraction of the step towards the estimated offsets in (0, 1], either constant or a function of the update
+            count n. (default: None - 1/(n+1), which averages the estimates of all windows)
+        eoff_reference_state: int, optional
+            index of the state, whose energy offset is kept constant (default: 0)
+        seed: Union[int, np.random.SeedSequence], optional
+            seed of the random stream of the system (default: None - drawn from the global numpy random state)
+        observers: Iterable[_observerCls], optional
+            observers of the simulation (default: None)
 
         """
         ################################
         # Declare Attributes
         #################################
 
+        if (isinstance(eoff_damping, Number) and not (0 < eoff_damping <= 1)):
+            raise ValueError("EDS System: eoff_damping needs to be in (0, 1]. Got: " + str(eoff_damping))
+
         self._currentEdsS = eds_s
         self._currentEdsEoffs = eds_Eoff
         self.state = data.envelopedPStstate
 
+        self.adaptive_eoff = adaptive_eoff
+        self.eoff_update_every = eoff_update_every
+        self.eoff_damping = eoff_damping
+        self.eoff_reference_state = eoff_reference_state
+        self.eoff_updates = 0
+        self._reset_eoff_window()
+
         super().__init__(potential=potential, sampler=sampler, conditions=conditions, temperature=temperature,
-                         start_position=start_position)
+                         start_position=start_position, seed=seed, observers=observers)
 
         # Output
         self.set_s(self._currentEdsS)
         self.set_eoff(self._currentEdsEoffs)
 
+    """
+    Adaptive Energy Offsets
+    """
+
+    def _reset_eoff_window(self) -> NoReturn:
+        self._eoff_window_samples = 0
+        self._eoff_window_log_sums = None
+
+    def _accumulate_eoff_window(self) -> NoReturn:
+        """
+            _accumulate_eoff_window
+                folds -beta(V_i-V_R) of the current position into the running log-sum-exp of the window. The state
+                energies are evaluated once, V_R is calculated from them.
+        """
+        state_energies = self.potential._state_energies(self._currentPosition)
+        sum_prefactors, _ = self.potential._logsumexp_calc(self._currentPosition, state_energies=state_energies)
+        beta_potential = 1 / (self.potential.constants[self.potential.T] * self.potential.constants[self.potential.kb])
+        V_r = np.sum(-sum_prefactors / (beta_potential * self.potential.s_i[0]))
+        V_is = np.sum(state_energies, axis=0)
+
+        beta = 1 / (const.gas_constant / 1000.0 * self.temperature)
+        dV = -beta * (V_is - V_r)
+        if (self._eoff_window_log_sums is None):
+            self._eoff_window_log_sums = dV
+        else:
+            self._eoff_window_log_sums = np.logaddexp(self._eoff_window_log_sums, dV)
+        self._eoff_window_samples += 1
+
+    def adapt_eoff(self) -> NoReturn:
+        """
+            adapt_eoff
+                moves the energy offsets towards the free energies of the states relative to the reference state,
+                estimated from the exponential averages of the current window (see
+                multistateEDS.propose_eoff_from_free_energies). The enveloped potential is only updated, not rebuilt.
+        """
+        if (self._eoff_window_samples == 0):
+            return
+
+        if (self.eoff_damping is None):
+            damping = 1 / (self.eoff_updates + 1)
+        elif (callable(self.eoff_damping)):
+            damping = self.eoff_damping(self.eoff_updates)
+        else:
+            damping = self.eoff_damping
+
+        beta = 1 / (const.gas_constant / 1000.0 * self.temperature)
+        dF_iR = -(self._eoff_window_log_sums - np.log(self._eoff_window_samples)) / beta
+        eoff = multistateEDS(T=self.temperature, kJ=True).propose_eoff_from_free_energies(
+            dF_iR=dF_iR, Eoff=self.eoff, damping=damping, reference_state=self.eoff_reference_state)
+        self.eoff_updates += 1
+        self.eoff = list(eoff)
+
+    def apply_conditions(self) -> NoReturn:
+        """
+            apply_conditions
+                applies the coupled conditions and, in the adaptive mode, updates the energy offsets.
+        """
+        super().apply_conditions()
+
+        if (self.adaptive_eoff):
+            self._accumulate_eoff_window()
+            if (self._eoff_window_samples >= self.eoff_update_every):
+                self.adapt_eoff()
+
     """
     Overwrite Functions to adapt to EDS
     """
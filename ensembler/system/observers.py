@@ -0,0 +1,167 @@
+"""
+Module: observers
+    Observers calculate custom quantities during a simulation, without changing the system (in contrast to the
+    conditions). They are scheduled by the system: an observer with every_step=n is only called on every n-th step and
+    an observer with block_size=n receives each n saved frames at once, copied into read-only arrays. Steps without a
+    due observer are not slowed down.
+"""
+import copy
+import pickle
+
+import numpy as np
+
+from ensembler.util.basic_class import _baseClass
+from ensembler.util.ensemblerTypes import systemCls as systemType, Callable, Dict, List, NoReturn
+
+
+class _observerCls(_baseClass):
+    """
+    This class provides the basic functionality for the observer classes. Subclasses implement observe and/or
+    observe_block. The observers do not keep a reference to the system, it is passed to each call.
+    """
+    name: str = "observer"
+
+    def __init__(self, every_step: int = None, block_size: int = None):
+        """
+            __init__
+                set the schedule of the observer.
+
+        Parameters
+        ----------
+        every_step: int, optional
+            call observe every n steps. (default: None - never)
+        block_size: int, optional
+            call observe_block with each n saved frames. (default: None - never)
+        """
+        if (every_step is not None and every_step < 1):
+            raise ValueError("observer: every_step needs to be at least 1. Got: " + str(every_step))
+        if (block_size is not None and block_size < 1):
+            raise ValueError("observer: block_size needs to be at least 1. Got: " + str(block_size))
+
+        self.every_step = every_step
+        self.block_size = block_size
+        self._countdown: int = every_step  # steps until the next observe call
+        self._frames: List = []  # saved frames of the current block
+
+    def observe(self, system: systemType) -> NoReturn:
+        """
+            observe
+                called every every_step steps, after the energies and the current state of the system were updated.
+
+        Parameters
+        ----------
+        system: systemType
+            the observed system (system.step is the step in the current simulate call)
+        """
+        pass
+
+    def observe_block(self, system: systemType, frames: Dict[str, np.array]) -> NoReturn:
+        """
+            observe_block
+                called with each block_size saved frames.
+
+        Parameters
+        ----------
+        system: systemType
+            the observed system
+        frames: Dict[str, np.array]
+            the frames of the block, copied into one read-only array per state field (first axis: frame)
+        """
+        pass
+
+    def flush(self, system: systemType) -> NoReturn:
+        """
+            flush
+                passes the frames of the incomplete block to observe_block, e.g. at the end of a simulation.
+
+        Parameters
+        ----------
+        system: systemType
+            the observed system
+        """
+        if (len(self._frames) > 0):
+            frames = self._frames
+            self._frames = []
+            self.observe_block(system, self._stack_frames(frames))
+
+    def _add_frame(self, system: systemType, frame) -> NoReturn:
+        self._frames.append(frame)
+        if (len(self._frames) == self.block_size):
+            self.flush(system)
+
+    @staticmethod
+    def _stack_frames(frames: List) -> Dict[str, np.array]:
+        stacked = {}
+        for field in frames[0]._fields:
+            values = [getattr(frame, field) for frame in frames]
+            try:
+                values = np.array(values, dtype=float)
+            except (TypeError, ValueError):
+                values = np.array(values, dtype=object)
+            values.flags.writeable = False
+            stacked[field] = values
+        return stacked
+
+
+class callbackObserver(_observerCls):
+    """
+    This observer calls the given functions, e.g. to collect custom quantities without subclassing.
+    The functions are pickled with the observer, e.g. for replicas simulated in other processes, where they are called
+    with the copied system (results need to be stored on the system to come back). Functions that can not be pickled
+    (e.g. lambdas) are only usable in-process, pickling the observer raises an error instead of dropping them.
+    """
+    name: str = "callback observer"
+
+    def __init__(self, function: Callable = None, block_function: Callable = None, every_step: int = None,
+                 block_size: int = None):
+        """
+            __init__
+
+        Parameters
+        ----------
+        function: Callable, optional
+            called as function(system) every every_step steps. (default: None)
+        block_function: Callable, optional
+            called as block_function(system, frames) with each block_size saved frames. (default: None)
+        every_step: int, optional
+            call function every n steps. (default: None - 1, if a function is given)
+        block_size: int, optional
+            call block_function with each n saved frames. (default: None - 100, if a block_function is given)
+        """
+        if (function is not None and every_step is None):
+            every_step = 1
+        if (block_function is not None and block_size is None):
+            block_size = 100
+        super().__init__(every_step=every_step, block_size=block_size)
+        self.function = function
+        self.block_function = block_function
+
+    def __getstate__(self):
+        # the functions are kept, as an observer without them would silently do nothing in other processes
+        state = super().__getstate__()
+        for name in ("function", "block_function"):
+            function = getattr(self, name, None)
+            try:
+                pickle.dumps(function)
+            except (pickle.PicklingError, AttributeError, TypeError) as err:
+                raise pickle.PicklingError("callbackObserver: the " + name + " " + str(function) + " can not be "
+                                           "pickled, use a module level function to simulate in other processes."
+                                           ) from err
+            state[name] = function
+        return state
+
+    def __deepcopy__(self, memo):
+        # the functions are shared by copies (e.g. replicas), only the other attributes are copied
+        copy_obj = self.__class__()
+        copy_obj.__setstate__(copy.deepcopy(_observerCls.__getstate__(self), memo))
+        copy_obj.function = self.function
+        copy_obj.block_function = self.block_function
+        return copy_obj
+
+    def observe(self, system: systemType) -> NoReturn:
+        if (getattr(self, "function", None) is not None):
+            self.function(system)
+
+    def observe_block(self, system: systemType, frames: Dict[str, np.array]) -> NoReturn:
+        if (getattr(self, "block_function", None) is not None):
+            self.block_function(system, frames)
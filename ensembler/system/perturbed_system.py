@@ -9,7 +9,7 @@ import pandas as pd
 pd.options.mode.use_inf_as_na = True
 
 from ensembler.util import dataStructure as data
-from ensembler.util.ensemblerTypes import samplerCls, conditionCls
+from ensembler.util.ensemblerTypes import samplerCls, conditionCls, observerCls
 from ensembler.util.ensemblerTypes import Union, Iterable, NoReturn, Number
 
 from ensembler.potentials._basicPotentials import _potential1DClsPerturbed as _perturbedPotentialCls
@@ -33,6 +33,8 @@ class perturbedSystem(system):
     _currentLambda: Number = np.nan
     _currentdHdLambda: Number = np.nan
 
+    _checkpoint_attributes = system._checkpoint_attributes + ("_currentLambda", "_currentdHdLambda")
+
     """
     Attributes
     """
@@ -58,7 +60,8 @@ class perturbedSystem(system):
 
     def __init__(self, potential: _perturbedPotentialCls=linearCoupledPotentials(), sampler: samplerCls=metropolisMonteCarloIntegrator(),
                  conditions: Iterable[conditionCls] = [],
-                 temperature: float = 298.0, start_position: (Iterable[Number] or float) = None, lam: float = 0.0):
+                 temperature: float = 298.0, start_position: (Iterable[Number] or float) = None, lam: float = 0.0,
+                 seed: Union[int, np.random.SeedSequence] = None, observers: Iterable[observerCls] = None):
         """
             __init__
                 construct a eds-System that can be used to manage a simulation.
@@ -77,9 +80,13 @@ class perturbedSystem(system):
             starting position for the simulation and setup of the system.
         lam: Number, optional
             the value of the copuling lambda
+        seed: Union[int, np.random.SeedSequence], optional
+            seed of the random stream of the system (default: None - drawn from the global numpy random state)
+        observers: Iterable[_observerCls], optional
+            observers of the simulation (default: None)
         """
         super().__init__(potential=potential, sampler=sampler, conditions=conditions, temperature=temperature,
-                         start_position=start_position)
+                         start_position=start_position, seed=seed, observers=observers)
 
         self.lam = lam
         self.update_current_state()
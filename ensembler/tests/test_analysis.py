@@ -1,8 +1,17 @@
+import os
+import tempfile
 import numpy as np
 import unittest
 
 
-from ensembler.analysis.freeEnergyCalculation import  zwanzigEquation, threeStateZwanzig, bennetAcceptanceRatio
+from ensembler.analysis.freeEnergyCalculation import  zwanzigEquation, threeStateZwanzig, bennetAcceptanceRatio, \
+    multistateBennetAcceptanceRatio, multistateEnvelopingDistributionSampling
+from ensembler.potentials import OneD
+from ensembler.analysis.reducedEnergies import reducedEnergyMatrix
+from ensembler.analysis import autocorrelation
+from ensembler.analysis.errorEstimation import bootstrap, blockAveraging
+from ensembler.analysis.convergence import convergenceAnalysis
+from ensembler.analysis.streamingFreeEnergy import streamingZwanzig, streamingBAR
 
 class test_ZwanzigEquation(unittest.TestCase):
     feCalculation = zwanzigEquation
@@ -29,6 +38,44 @@ class test_ZwanzigEquation(unittest.TestCase):
         np.testing.assert_almost_equal(desired=dF_ana, actual=dF_zwanzig, decimal=2)
 
 
+class test_ZwanzigEquationImplementations(unittest.TestCase):
+    feCalculation = zwanzigEquation
+
+    def test_efficient_mpmath_agree(self):
+        feCalc = self.feCalculation(kT=True)
+
+        V1 = np.random.normal(1, 0.5, 1000)
+        V2 = np.random.normal(2, 0.5, 1000)
+
+        dF_efficient = feCalc.calculate(Vi=V1, Vj=V2)
+        dF_mpmath = feCalc._calculate_mpmath(Vi=V1, Vj=V2)
+
+        np.testing.assert_almost_equal(desired=dF_mpmath, actual=dF_efficient, decimal=10)
+
+    def test_overflow_robust(self):
+        feCalc = self.feCalculation(kT=True)
+
+        V1 = np.zeros(100)
+        V2 = np.full(100, -1000.0)
+
+        dF = feCalc.calculate(Vi=V1, Vj=V2)
+        np.testing.assert_almost_equal(desired=-1000, actual=dF, decimal=8)
+
+    def test_free_Energy_batch(self):
+        feCalc = self.feCalculation(kT=True)
+
+        samples = 10000
+        V_ref = np.random.normal(1, 0.1, samples)
+        V_states = np.array([np.random.normal(mean, 0.1, samples) for mean in [1, 2, 3]]).T
+
+        dF_batch = feCalc.calculate_batch(Vi=V_ref, Vj=V_states)
+        dF_single = [feCalc.calculate(Vi=V_ref, Vj=V_states[:, state]) for state in range(V_states.shape[1])]
+
+        self.assertEqual(3, len(dF_batch))
+        np.testing.assert_almost_equal(desired=dF_single, actual=dF_batch, decimal=10)
+        np.testing.assert_almost_equal(desired=[0, 1, 2], actual=dF_batch, decimal=1)
+
+
 class test_BAR(test_ZwanzigEquation):
     feCalculation = bennetAcceptanceRatio
 
@@ -100,6 +147,63 @@ class test_BAR(test_ZwanzigEquation):
         np.testing.assert_almost_equal(desired=dF_ana, actual=dF_bar, decimal=2)
 
 
+class test_BARImplementations(unittest.TestCase):
+    feCalculation = bennetAcceptanceRatio
+
+    def test_logspace_mpmath_agree(self):
+        samples = 200
+        V1_1 = np.random.normal(1, 0.5, samples)
+        V2_1 = np.random.normal(2, 0.5, samples)
+        V1_2 = np.random.normal(2, 0.5, samples)
+        V2_2 = np.random.normal(1.5, 0.5, samples)
+
+        dF_logspace = self.feCalculation(kT=True).calculate(Vi_i=V1_1, Vj_i=V2_1, Vi_j=V1_2, Vj_j=V2_2)
+        dF_mpmath = self.feCalculation(kT=True, convergence_radius=10 ** (-8))._calculate_optimize(Vi_i=V1_1,
+                                                                                                  Vj_i=V2_1,
+                                                                                                  Vi_j=V1_2,
+                                                                                                  Vj_j=V2_2)
+
+        np.testing.assert_almost_equal(desired=dF_mpmath, actual=dF_logspace, decimal=6)
+
+    def test_free_Energy_with_error(self):
+        samples = 100000
+        # harmonic states with shifted minima: dF = 0 and the energy differences are known analytically
+        x_1 = np.random.normal(0, 1, samples)
+        x_2 = np.random.normal(1, 1, samples)
+
+        dF, ddF = self.feCalculation(kT=True).calculate_with_error(Vi_i=0.5 * x_1 ** 2, Vj_i=0.5 * (x_1 - 1) ** 2,
+                                                                   Vi_j=0.5 * x_2 ** 2, Vj_j=0.5 * (x_2 - 1) ** 2)
+
+        self.assertTrue(0 < ddF < 0.05)
+        self.assertLess(abs(dF), 5 * ddF)
+
+    def test_free_Energy_ladder(self):
+        samples = 20000
+        force_constants = [1, 2, 4, 8]
+        x = [np.random.normal(0, 1 / np.sqrt(fc), samples) for fc in force_constants]
+        V_kn = np.array([np.concatenate([0.5 * fc * x_l ** 2 for x_l in x]) for fc in force_constants])
+
+        dF, ddF = self.feCalculation(kT=True).calculate_ladder(V_kn=V_kn, N_k=[samples] * len(force_constants))
+
+        self.assertEqual(3, len(dF))
+        self.assertEqual(3, len(ddF))
+        # dF between harmonic oscillators: 0.5*ln(k_j/k_i)
+        np.testing.assert_almost_equal(desired=0.5 * np.log(force_constants[-1] / force_constants[0]),
+                                       actual=np.sum(dF), decimal=1)
+
+    def test_initial_guess(self):
+        samples = 1000
+        x_1 = np.random.normal(0, 1, samples)
+        x_2 = np.random.normal(0, 0.5, samples)
+        energies = {"Vi_i": 0.5 * x_1 ** 2, "Vj_i": 2 * x_1 ** 2, "Vi_j": 0.5 * x_2 ** 2, "Vj_j": 2 * x_2 ** 2}
+
+        dF = self.feCalculation(kT=True, convergence_radius=10 ** (-8)).calculate(**energies)
+        for initial_guess in [dF, -20, 50]:
+            dF_guess = self.feCalculation(kT=True, convergence_radius=10 ** (-8)).calculate(
+                **energies, initial_guess=initial_guess)
+            np.testing.assert_almost_equal(desired=dF, actual=dF_guess, decimal=6)
+
+
 class test_threeStateZwanzigReweighting(test_ZwanzigEquation):
     feCalculation = threeStateZwanzig
 
@@ -133,3 +237,461 @@ class test_threeStateZwanzigReweighting(test_ZwanzigEquation):
         dFRew_zwanz = feCalc.calculate(Vi=V1, Vj=V2, Vr=Vr)
 
         np.testing.assert_almost_equal(desired=dF_ana, actual=dFRew_zwanz, decimal=2)
+
+
+class test_MBAR(unittest.TestCase):
+    feCalculation = multistateBennetAcceptanceRatio
+
+    def setUp(self) -> None:
+        self.samples = 5000
+        self.force_constants = [1, 2, 4, 8]
+        x = [np.random.normal(0, 1 / np.sqrt(fc), self.samples) for fc in self.force_constants]
+        self.V_kn = np.array([np.concatenate([0.5 * fc * x_l ** 2 for x_l in x]) for fc in self.force_constants])
+        self.N_k = [self.samples] * len(self.force_constants)
+
+    def test_constructor(self):
+        print(self.feCalculation(kT=True))
+
+    def test_free_Energy_harmonic(self):
+        dF = self.feCalculation(kT=True).calculate(V_kn=self.V_kn, N_k=self.N_k)
+
+        # dF between harmonic oscillators: 0.5*ln(k_j/k_i)
+        np.testing.assert_almost_equal(desired=0.5 * np.log(np.array(self.force_constants) / self.force_constants[0]),
+                                       actual=dF, decimal=1)
+
+    def test_chunking(self):
+        dF = self.feCalculation(kT=True).calculate(V_kn=self.V_kn, N_k=self.N_k)
+        dF_chunked = self.feCalculation(kT=True, chunk_size=7).calculate(V_kn=self.V_kn, N_k=self.N_k)
+
+        np.testing.assert_almost_equal(desired=dF, actual=dF_chunked, decimal=8)
+
+    def test_two_states_equal_BAR(self):
+        V_kn = self.V_kn[:2, :2 * self.samples]
+        dF, ddF = self.feCalculation(kT=True).calculate_with_error(V_kn=V_kn, N_k=self.N_k[:2])
+        dF_bar, ddF_bar = bennetAcceptanceRatio(kT=True).calculate_with_error(
+            Vi_i=V_kn[0, :self.samples], Vj_i=V_kn[1, :self.samples],
+            Vi_j=V_kn[0, self.samples:], Vj_j=V_kn[1, self.samples:])
+
+        np.testing.assert_almost_equal(desired=dF_bar, actual=dF[1], decimal=6)
+        np.testing.assert_almost_equal(desired=ddF_bar, actual=ddF[1], decimal=4)
+
+    def test_unsampled_states(self):
+        V_kn = np.concatenate([self.V_kn[:, :self.samples], self.V_kn[:, -self.samples:]], axis=1)
+        dF, ddF = self.feCalculation(kT=True).calculate_with_error(V_kn=V_kn, N_k=[self.samples, 0, 0, self.samples])
+
+        np.testing.assert_almost_equal(desired=0.5 * np.log(np.array(self.force_constants) / self.force_constants[0]),
+                                       actual=dF, decimal=1)
+        self.assertTrue(np.all(ddF[1:] > 0))
+
+    def test_initial_guess(self):
+        dF = self.feCalculation(kT=True).calculate(V_kn=self.V_kn, N_k=self.N_k)
+        for initial_guess in [dF, dF + 5, np.zeros(len(self.N_k))]:
+            dF_guess = self.feCalculation(kT=True).calculate(V_kn=self.V_kn, N_k=self.N_k, initial_guess=initial_guess)
+            np.testing.assert_almost_equal(desired=dF, actual=dF_guess, decimal=6)
+
+        with self.assertRaises(ValueError):
+            self.feCalculation(kT=True).calculate(V_kn=self.V_kn, N_k=self.N_k, initial_guess=[0, 1])
+
+    def test_wrong_shape(self):
+        with self.assertRaises(ValueError):
+            self.feCalculation(kT=True).calculate(V_kn=self.V_kn, N_k=self.N_k[:2])
+
+
+class test_multistateEDS(unittest.TestCase):
+    feCalculation = multistateEnvelopingDistributionSampling
+
+    def setUp(self) -> None:
+        self.force_constants = [1, 4, 16]
+        self.potential = OneD.envelopedPotential(
+            V_is=[OneD.harmonicOscillatorPotential(k=fc, x_shift=3 * i) for i, fc in enumerate(self.force_constants)])
+
+        # sample the reference state exactly on a fine grid
+        grid = np.linspace(-5, 11, 16001)
+        weights = np.exp(-(self.potential.ene(grid) - np.min(self.potential.ene(grid))))
+        positions = np.random.choice(grid, size=20000, p=weights / np.sum(weights))
+        self.V_is = np.array([V.ene(positions) for V in self.potential.V_is]).T
+        self.Vr = self.potential.ene(positions)
+
+    def test_constructor(self):
+        print(self.feCalculation(kT=True))
+
+    def test_equal_threeStateZwanzig(self):
+        dF_ij = self.feCalculation(kT=True).calculate_pairwise(V_is=self.V_is, Vr=self.Vr)
+        dF_threeState = threeStateZwanzig(kT=True).calculate(Vi=self.V_is[:, 0], Vj=self.V_is[:, 2], Vr=self.Vr)
+
+        self.assertEqual((3, 3), dF_ij.shape)
+        np.testing.assert_almost_equal(desired=dF_threeState, actual=dF_ij[0, 2], decimal=8)
+        np.testing.assert_almost_equal(desired=-dF_ij.T, actual=dF_ij, decimal=8)
+
+    def test_free_Energy_harmonic(self):
+        dF_ij = self.feCalculation(kT=True).calculate_pairwise(V_is=self.V_is, Vr=self.Vr)
+
+        # dF between harmonic oscillators: 0.5*ln(k_j/k_i)
+        np.testing.assert_almost_equal(desired=0.5 * np.log(np.array(self.force_constants) / self.force_constants[0]),
+                                       actual=dF_ij[0], decimal=1)
+
+    def test_propose_eoff(self):
+        Eoff = self.feCalculation(kT=True).propose_eoff(V_is=self.V_is, Vr=self.Vr, Eoff=self.potential.Eoff)
+        np.testing.assert_almost_equal(desired=0.5 * np.log(np.array(self.force_constants) / self.force_constants[0]),
+                                       actual=Eoff, decimal=1)
+
+        damped_Eoff = self.feCalculation(kT=True).propose_eoff(V_is=self.V_is, Vr=self.Vr, Eoff=self.potential.Eoff,
+                                                               damping=0.5)
+        np.testing.assert_almost_equal(desired=0.5 * Eoff, actual=damped_Eoff, decimal=8)
+
+        self.potential.set_Eoff(list(Eoff))
+        self.assertListEqual(list(Eoff), list(self.potential.Eoff))
+
+        dF_iR = self.feCalculation(kT=True).calculate(V_is=self.V_is, Vr=self.Vr)
+        np.testing.assert_almost_equal(desired=Eoff, actual=self.feCalculation(kT=True).propose_eoff_from_free_energies(
+            dF_iR=dF_iR, Eoff=self.potential.Eoff), decimal=8)
+
+    def test_wrong_shape(self):
+        with self.assertRaises(ValueError):
+            self.feCalculation(kT=True).calculate(V_is=self.V_is, Vr=self.Vr[:10])
+        with self.assertRaises(ValueError):
+            self.feCalculation(kT=True).propose_eoff(V_is=self.V_is, Vr=self.Vr, Eoff=[0, 0])
+        with self.assertRaises(ValueError):
+            self.feCalculation(kT=True).propose_eoff_from_free_energies(dF_iR=[0, 1, 2], Eoff=[0, 0])
+
+    def test_convergence(self):
+        curves = convergenceAnalysis(self.feCalculation(kT=True), n_checkpoints=2).calculate(V_is=self.V_is,
+                                                                                             Vr=self.Vr)
+
+        self.assertEqual(12, len(curves))
+        np.testing.assert_almost_equal(desired=self.feCalculation(kT=True).calculate(V_is=self.V_is, Vr=self.Vr),
+                                       actual=curves[(curves.direction == "forward") & (curves.fraction == 1)].dF,
+                                       decimal=8)
+
+
+class test_reducedEnergyMatrix(unittest.TestCase):
+    tmp_test_dir: str = None
+
+    def setUp(self) -> None:
+        from ensembler.potentials.OneD import harmonicOscillatorPotential
+        from ensembler.samplers.stochastic import metropolisMonteCarloIntegrator
+        from ensembler.system.basic_system import system
+
+        test_dir = os.getcwd() + "/tests_out"
+        if (not os.path.exists(test_dir)):
+            os.mkdir(test_dir)
+        if (__class__.tmp_test_dir is None):
+            __class__.tmp_test_dir = tempfile.mkdtemp(dir=test_dir, prefix="tmp_test_analysis")
+
+        self.potentials = [harmonicOscillatorPotential(k=1), harmonicOscillatorPotential(k=2)]
+        self.systems = [system(potential=pot, sampler=metropolisMonteCarloIntegrator(), start_position=0) for pot in
+                        self.potentials]
+        for sys, steps in zip(self.systems, [50, 30]):
+            sys.simulate(steps)
+
+    def test_build(self):
+        u_kn, N_k = reducedEnergyMatrix(potentials=self.potentials, kT=True, chunk_size=7).build(self.systems)
+
+        positions = np.concatenate([sys.trajectory.position for sys in self.systems])
+        np.testing.assert_equal(actual=N_k, desired=[51, 31])
+        np.testing.assert_almost_equal(actual=u_kn, desired=[pot.ene(positions) for pot in self.potentials])
+
+    def test_build_sampled_states(self):
+        u_kn, N_k = reducedEnergyMatrix(potentials=self.potentials, kT=True).build(self.systems[::-1],
+                                                                                    sampled_states=[1, 0])
+
+        positions = np.concatenate([sys.trajectory.position for sys in self.systems])
+        np.testing.assert_equal(actual=N_k, desired=[51, 31])
+        np.testing.assert_almost_equal(actual=u_kn, desired=[pot.ene(positions) for pot in self.potentials])
+
+        with self.assertRaises(ValueError):
+            reducedEnergyMatrix(potentials=self.potentials, kT=True).build(self.systems[:1])
+
+    def test_build_parameter_sets(self):
+        from ensembler.potentials.OneD import envelopedPotential
+        positions = np.linspace(-2, 2, 11)
+        s_values = [1, 0.1]
+
+        u_kn, N_k = reducedEnergyMatrix(potential=envelopedPotential(), parameter_sets=[{"s": s} for s in s_values],
+                                        kT=True).build(positions, sampled_states=[0])
+
+        np.testing.assert_equal(actual=N_k, desired=[11, 0])
+        for state, s in enumerate(s_values):
+            pot = envelopedPotential()
+            pot.set_s(s)
+            np.testing.assert_almost_equal(actual=u_kn[state], desired=pot.ene(positions))
+
+    def test_build_parallel_memmap(self):
+        out_path = tempfile.mktemp(dir=__class__.tmp_test_dir, suffix=".npy")
+        u_kn, N_k = reducedEnergyMatrix(potentials=self.potentials, kT=True).build(self.systems)
+        u_kn_mapped, N_k_mapped = reducedEnergyMatrix(potentials=self.potentials, kT=True, n_processes=2).build(
+            self.systems, out_path=out_path)
+
+        self.assertTrue(os.path.exists(out_path))
+        np.testing.assert_almost_equal(actual=np.load(out_path), desired=u_kn)
+        np.testing.assert_equal(actual=N_k_mapped, desired=N_k)
+
+    def test_build_streamed_positions(self):
+        positions = np.concatenate([sys.trajectory.position for sys in self.systems]).astype(float)
+        positions_path = tempfile.mktemp(dir=__class__.tmp_test_dir, suffix=".npy")
+        np.save(positions_path, positions)
+        mapped_positions = np.load(positions_path, mmap_mode="r")
+
+        for n_processes in [1, 2]:
+            u_kn, N_k = reducedEnergyMatrix(potentials=self.potentials, kT=True, chunk_size=4,
+                                            n_processes=n_processes).build([mapped_positions], sampled_states=[1])
+            np.testing.assert_equal(actual=N_k, desired=[0, len(positions)])
+            np.testing.assert_almost_equal(actual=u_kn, desired=[pot.ene(positions) for pot in self.potentials])
+
+    def test_reduction(self):
+        u_kn, _ = reducedEnergyMatrix(potentials=self.potentials, T=[300, 600], k=1).build(self.systems)
+        V_kn, _ = reducedEnergyMatrix(potentials=self.potentials, kT=True).build(self.systems)
+
+        np.testing.assert_almost_equal(actual=u_kn, desired=V_kn / np.array([[300], [600]]))
+
+
+class test_autocorrelation(unittest.TestCase):
+    phi = 0.9
+
+    def ar_process(self, samples: int, mean: float = 0) -> np.array:
+        # AR(1) process with unit variance and statistical inefficiency g = (1+phi)/(1-phi)
+        noise = np.random.normal(0, np.sqrt(1 - self.phi ** 2), samples)
+        x = np.zeros(samples)
+        for step in range(1, samples):
+            x[step] = self.phi * x[step - 1] + noise[step]
+        return x + mean
+
+    def test_autocorrelation_function(self):
+        x = np.random.normal(0, 1, 500)
+        dx = x - np.mean(x)
+        direct = [np.mean(dx[:len(x) - t] * dx[t:]) / np.mean(dx * dx) for t in range(20)]
+
+        np.testing.assert_almost_equal(actual=autocorrelation.autocorrelation_function(x)[:20], desired=direct)
+        np.testing.assert_almost_equal(actual=autocorrelation.autocorrelation_function(np.ones(10)), desired=np.ones(10))
+
+    def test_statistical_inefficiency(self):
+        x = self.ar_process(50000)
+        g = autocorrelation.statistical_inefficiency(x)
+
+        g_expected = (1 + self.phi) / (1 - self.phi)
+        self.assertLess(abs(g - g_expected) / g_expected, 0.25)
+        self.assertLess(abs(autocorrelation.statistical_inefficiency(np.random.normal(0, 1, 50000)) - 1), 0.1)
+
+    def test_detect_equilibration(self):
+        transient = 200
+        x = np.concatenate([np.linspace(20, 0, transient), self.ar_process(3000)])
+
+        t0, g, effective_samples = autocorrelation.detect_equilibration(x, nskip=10)
+
+        self.assertGreaterEqual(t0, transient * 0.5)
+        self.assertLess(t0, len(x) / 2)
+        np.testing.assert_almost_equal(actual=effective_samples, desired=(len(x) - t0) / g)
+
+    def test_detect_equilibration_default_grid(self):
+        transient = 200
+        x = np.concatenate([np.linspace(20, 0, transient), self.ar_process(3000)])
+
+        # the default tests about 100 starting frames (every 32nd frame here) instead of all
+        t0, g, effective_samples = autocorrelation.detect_equilibration(x)
+
+        self.assertEqual(0, t0 % (len(x) // 100))
+        self.assertGreaterEqual(t0, transient * 0.5)
+        self.assertLess(t0, len(x) / 2)
+
+    def test_subsample(self):
+        np.testing.assert_equal(actual=autocorrelation.subsample_indices(10, 2.5), desired=[0, 3, 5, 8])
+        np.testing.assert_equal(actual=autocorrelation.subsample_indices(4, 1), desired=[0, 1, 2, 3])
+
+        x = self.ar_process(20000)
+        indices = autocorrelation.subsample_correlated_data(x)
+        self.assertLess(len(indices), len(x) / 10)
+        self.assertLess(abs(autocorrelation.autocorrelation_function(x[indices])[1]), 0.3)
+
+    def test_decorrelated_free_energies(self):
+        samples = 20000
+        x_1 = self.ar_process(samples)
+        x_2 = self.ar_process(samples, mean=1)
+        V1_1, V2_1, V1_2, V2_2 = 0.5 * x_1 ** 2, 0.5 * (x_1 - 1) ** 2, 0.5 * x_2 ** 2, 0.5 * (x_2 - 1) ** 2
+
+        _, ddF = bennetAcceptanceRatio(kT=True).calculate_with_error(V1_1, V2_1, V1_2, V2_2)
+        dF_dec, ddF_dec = bennetAcceptanceRatio(kT=True).calculate_with_error(V1_1, V2_1, V1_2, V2_2,
+                                                                               decorrelate=True)
+        self.assertGreater(ddF_dec, 2 * ddF)
+        self.assertLess(abs(dF_dec), 5 * ddF_dec)
+
+        V_kn = np.array([np.concatenate([V1_1, V1_2]), np.concatenate([V2_1, V2_2])])
+        dF_mbar, ddF_mbar = multistateBennetAcceptanceRatio(kT=True).calculate_with_error(V_kn, [samples, samples],
+                                                                                          decorrelate=True)
+        self.assertGreater(ddF_mbar[1], 2 * ddF)
+        self.assertLess(abs(dF_mbar[1]), 5 * ddF_mbar[1])
+
+        dF_zwanzig = zwanzigEquation(kT=True).calculate(Vi=V1_1, Vj=V2_1, decorrelate=True)
+        self.assertTrue(np.isfinite(dF_zwanzig))
+
+
+class test_errorEstimation(unittest.TestCase):
+    samples = 5000
+
+    def setUp(self) -> None:
+        x_1 = np.random.normal(0, 1, self.samples)
+        x_2 = np.random.normal(1, 1, self.samples)
+        self.energies = {"Vi_i": 0.5 * x_1 ** 2, "Vj_i": 0.5 * (x_1 - 1) ** 2,
+                         "Vi_j": 0.5 * x_2 ** 2, "Vj_j": 0.5 * (x_2 - 1) ** 2}
+
+    def test_bootstrap_BAR(self):
+        dF_ana, ddF_ana = bennetAcceptanceRatio(kT=True).calculate_with_error(**self.energies)
+        errorEstimator = bootstrap(bennetAcceptanceRatio(kT=True), n_bootstraps=100, seed=42)
+        dF, ddF = errorEstimator.calculate(**self.energies)
+
+        self.assertEqual(100, len(errorEstimator.bootstrap_estimates))
+        np.testing.assert_almost_equal(desired=dF_ana, actual=dF, decimal=8)
+        self.assertLess(abs(ddF - ddF_ana) / ddF_ana, 0.3)
+
+    def test_bootstrap_parallel_reproducible(self):
+        _, ddF = bootstrap(zwanzigEquation(kT=True), n_bootstraps=20, seed=42).calculate(Vi=self.energies["Vi_i"],
+                                                                                         Vj=self.energies["Vj_i"])
+        _, ddF_parallel = bootstrap(zwanzigEquation(kT=True), n_bootstraps=20, seed=42, n_processes=2).calculate(
+            Vi=self.energies["Vi_i"], Vj=self.energies["Vj_i"])
+
+        np.testing.assert_almost_equal(desired=ddF, actual=ddF_parallel, decimal=10)
+
+    def test_moving_block_bootstrap(self):
+        _, ddF = bootstrap(zwanzigEquation(kT=True), n_bootstraps=50, block_length=25).calculate(
+            Vi=self.energies["Vi_i"], Vj=self.energies["Vj_i"])
+        self.assertTrue(ddF > 0)
+
+    def test_block_averaging(self):
+        dF_ana, ddF_ana = bennetAcceptanceRatio(kT=True).calculate_with_error(**self.energies)
+        errorEstimator = blockAveraging(bennetAcceptanceRatio(kT=True), n_blocks=20)
+        dF, ddF = errorEstimator.calculate(**self.energies)
+
+        self.assertEqual(20, len(errorEstimator.block_estimates))
+        np.testing.assert_almost_equal(desired=dF_ana, actual=dF, decimal=8)
+        self.assertLess(abs(ddF - ddF_ana) / ddF_ana, 0.8)
+
+    def test_MBAR(self):
+        V_kn = np.array([np.concatenate([self.energies["Vi_i"], self.energies["Vi_j"]]),
+                         np.concatenate([self.energies["Vj_i"], self.energies["Vj_j"]])])
+        _, ddF_ana = multistateBennetAcceptanceRatio(kT=True).calculate_with_error(V_kn=V_kn,
+                                                                                   N_k=[self.samples, self.samples])
+        dF, ddF = bootstrap(multistateBennetAcceptanceRatio(kT=True), n_bootstraps=50).calculate(
+            V_kn=V_kn, N_k=[self.samples, self.samples])
+
+        self.assertEqual(2, len(ddF))
+        self.assertLess(abs(ddF[1] - ddF_ana[1]) / ddF_ana[1], 0.4)
+
+    def test_missing_energies(self):
+        with self.assertRaises(ValueError):
+            bootstrap(bennetAcceptanceRatio(kT=True)).calculate(Vi=self.energies["Vi_i"], Vj=self.energies["Vj_i"])
+
+
+class test_convergenceAnalysis(unittest.TestCase):
+    samples = 1000
+
+    def setUp(self) -> None:
+        x_1 = np.random.normal(0, 1, self.samples)
+        x_2 = np.random.normal(1, 1, self.samples)
+        self.energies = {"Vi_i": 0.5 * x_1 ** 2, "Vj_i": 0.5 * (x_1 - 1) ** 2,
+                         "Vi_j": 0.5 * x_2 ** 2, "Vj_j": 0.5 * (x_2 - 1) ** 2}
+
+    def test_zwanzig(self):
+        Vi, Vj = self.energies["Vi_i"], self.energies["Vj_i"]
+        curves = convergenceAnalysis(zwanzigEquation(kT=True), n_checkpoints=4).calculate(Vi=Vi, Vj=Vj)
+
+        self.assertEqual(8, len(curves))
+        self.assertListEqual(["direction", "fraction", "n_samples", "dF", "ddF"], list(curves.columns))
+        forward = curves[curves.direction == "forward"]
+        backward = curves[curves.direction == "backward"]
+        for fraction, n_samples, dF in zip(forward.fraction, forward.n_samples, forward.dF):
+            self.assertAlmostEqual(fraction * self.samples, n_samples)
+            self.assertAlmostEqual(zwanzigEquation(kT=True).calculate(Vi=Vi[:n_samples], Vj=Vj[:n_samples]), dF)
+        for n_samples, dF in zip(backward.n_samples, backward.dF):
+            self.assertAlmostEqual(zwanzigEquation(kT=True).calculate(Vi=Vi[-n_samples:], Vj=Vj[-n_samples:]), dF)
+
+    def test_threeStateZwanzig(self):
+        Vr, Vi, Vj = self.energies["Vi_i"], self.energies["Vj_i"], self.energies["Vi_i"] + 0.5
+        curves = convergenceAnalysis(threeStateZwanzig(kT=True), n_checkpoints=2,
+                                     directions=["forward"]).calculate(Vi=Vi, Vj=Vj, Vr=Vr)
+
+        self.assertEqual(2, len(curves))
+        self.assertAlmostEqual(threeStateZwanzig(kT=True).calculate(Vi=Vi, Vj=Vj, Vr=Vr), curves.dF.iloc[-1])
+
+    def test_BAR(self):
+        curves = convergenceAnalysis(bennetAcceptanceRatio(kT=True), n_checkpoints=3).calculate(**self.energies)
+
+        dF, ddF = bennetAcceptanceRatio(kT=True).calculate_with_error(**self.energies)
+        self.assertEqual(6, len(curves))
+        np.testing.assert_almost_equal(desired=[dF, dF], actual=curves[curves.fraction == 1].dF, decimal=6)
+        self.assertTrue(np.all(np.diff(curves[curves.direction == "forward"].ddF) < 0))
+
+    def test_MBAR(self):
+        V_kn = np.array([np.concatenate([self.energies["Vi_i"], self.energies["Vi_j"]]),
+                         np.concatenate([self.energies["Vj_i"], self.energies["Vj_j"]])])
+        curves = convergenceAnalysis(multistateBennetAcceptanceRatio(kT=True), n_checkpoints=2).calculate(
+            V_kn=V_kn, N_k=[self.samples, self.samples])
+
+        self.assertEqual(8, len(curves))
+        self.assertIn("state", curves.columns)
+        dF = multistateBennetAcceptanceRatio(kT=True).calculate(V_kn=V_kn, N_k=[self.samples, self.samples])
+        np.testing.assert_almost_equal(desired=[dF, dF], actual=np.reshape(curves[curves.fraction == 1].dF.to_numpy(), (2, 2)),
+                                       decimal=6)
+
+    def test_wrong_direction(self):
+        with self.assertRaises(ValueError):
+            convergenceAnalysis(zwanzigEquation(kT=True), directions=["sideways"])
+
+
+class test_streamingFreeEnergy(unittest.TestCase):
+    steps = 1000
+
+    def setUp(self) -> None:
+        from ensembler.potentials.OneD import harmonicOscillatorPotential
+        self.Vi = harmonicOscillatorPotential(k=1)
+        self.Vj = harmonicOscillatorPotential(k=1, x_shift=1)
+
+    def simulate(self, potential, observer, start_position: float = 0, steps: int = None):
+        from ensembler.samplers.stochastic import metropolisMonteCarloIntegrator
+        from ensembler.system.basic_system import system
+        sys = system(potential=potential, sampler=metropolisMonteCarloIntegrator(), start_position=start_position,
+                     verbose=False)
+        sys.add_observer(observer)
+        sys.simulate(self.steps if (steps is None) else steps, verbosity=False)
+        return sys.trajectory.position[1:].to_numpy(dtype=float)
+
+    def test_streaming_zwanzig(self):
+        estimator = streamingZwanzig(Vj=self.Vj, kT=True)
+        positions = self.simulate(self.Vi, estimator)
+
+        self.assertEqual(self.steps, estimator.n_samples)
+        np.testing.assert_almost_equal(desired=zwanzigEquation(kT=True).calculate(Vi=self.Vi.ene(positions),
+                                                                                   Vj=self.Vj.ene(positions)),
+                                       actual=estimator.free_energy, decimal=8)
+        self.assertTrue(estimator.error > 0)
+
+    def test_streaming_zwanzig_every_step(self):
+        estimator = streamingZwanzig(Vj=self.Vj, Vi=self.Vi, kT=True, every_step=10)
+        positions = self.simulate(self.Vi, estimator)[9::10]  # observed on every 10th step
+
+        self.assertEqual(len(positions), estimator.n_samples)
+        np.testing.assert_almost_equal(desired=zwanzigEquation(kT=True).calculate(Vi=self.Vi.ene(positions),
+                                                                                   Vj=self.Vj.ene(positions)),
+                                       actual=estimator.free_energy, decimal=8)
+
+        estimator.reset()
+        self.assertTrue(np.isnan(estimator.free_energy))
+
+    def test_streaming_BAR(self):
+        estimator = streamingBAR(Vi=self.Vi, Vj=self.Vj, kT=True, dF_grid=np.linspace(-5, 5, 101))
+        self.assertTrue(np.isnan(estimator.free_energy))
+
+        positions_i = self.simulate(self.Vi, estimator.observer_i, start_position=0)
+        positions_j = self.simulate(self.Vj, estimator.observer_j, start_position=1, steps=self.steps // 2)
+
+        self.assertEqual(self.steps, estimator.n_forward)
+        self.assertEqual(self.steps // 2, estimator.n_reverse)
+        dF = bennetAcceptanceRatio(kT=True).calculate(Vi_i=self.Vi.ene(positions_i), Vj_i=self.Vj.ene(positions_i),
+                                                      Vi_j=self.Vi.ene(positions_j), Vj_j=self.Vj.ene(positions_j))
+        np.testing.assert_almost_equal(desired=dF, actual=estimator.free_energy, decimal=3)
+
+    def test_streaming_BAR_grid(self):
+        estimator = streamingBAR(Vi=self.Vi, Vj=self.Vj, kT=True, dF_grid=np.linspace(5, 10, 11))
+        estimator.update_forward(Vi_i=np.zeros(10), Vj_i=np.ones(10))
+        estimator.update_reverse(Vi_j=np.ones(10), Vj_j=np.zeros(10))
+
+        with self.assertWarns(UserWarning):
+            self.assertTrue(np.isnan(estimator.free_energy))
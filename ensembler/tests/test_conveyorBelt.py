@@ -1,5 +1,9 @@
+import os
+import tempfile
 import unittest
 
+import numpy as np
+
 from ensembler.ensemble.replicas_dynamic_parameters import conveyorBelt
 from ensembler.samplers.stochastic import metropolisMonteCarloIntegrator
 from ensembler.potentials import OneD
@@ -27,6 +31,27 @@ class testEnsemble(unittest.TestCase):
         ens.calculate_total_ensemble_energy()
         ens.get_replicas_positions()
 
+    def test_checkpoint(self):
+        np.random.seed(42)
+        ens = self.convBelt(0.0, 4, system=perturbedSystem(potential=OneD.linearCoupledPotentials(),
+                                                           sampler=metropolisMonteCarloIntegrator()), build=True)
+        ens.simulate(5)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = ens.save_checkpoint(os.path.join(tmp_dir, "conveyorBelt"))
+            ens.simulate(5)
+
+            restarted = self.convBelt(0.0, 4, system=perturbedSystem(potential=OneD.linearCoupledPotentials(),
+                                                                     sampler=metropolisMonteCarloIntegrator()),
+                                      build=True)
+            restarted.load_checkpoint(path)
+        restarted.simulate(5)
+
+        self.assertEqual(ens.capital_lambda, restarted.capital_lambda)
+        self.assertEqual(ens.reject, restarted.reject)
+        np.testing.assert_equal(ens.mem, restarted.mem)
+        self.assertEqual(ens.get_replicas_positions(), restarted.get_replicas_positions())
+
     def test_run_step(self):
         integrator = metropolisMonteCarloIntegrator()
         ha = OneD.harmonicOscillatorPotential(x_shift=-5)
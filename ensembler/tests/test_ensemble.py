@@ -1,5 +1,9 @@
+import os
+import tempfile
 import unittest
 
+import numpy as np
+
 from ensembler.ensemble import replica_exchange, _replica_graph
 from ensembler.samplers import stochastic
 from ensembler.potentials import OneD
@@ -13,7 +17,7 @@ class test_ReplicaExchangeCls(unittest.TestCase):
     sys = system.system(potential=potential, sampler=integrator)
 
     def test_tearDown(self) -> None:
-        self.RE.replicas = {}
+        self.RE._replicas = {}
 
     def test_init_1DREnsemble(self):
         exchange_dimensions = {"temperature": range(288, 310)}
@@ -115,6 +119,59 @@ class test_TemperatureReplicaExchangeCls(unittest.TestCase):
         #print(group.get_Total_Energy())
 
 
+    def test_replica_random_streams(self):
+        sys = system.system(potential=OneD.harmonicOscillatorPotential(), sampler=stochastic.metropolisMonteCarloIntegrator(),
+                            seed=42)
+        group = replica_exchange.temperatureReplicaExchange(system=sys, temperature_range=range(288, 298))
+
+        first_numbers = [replica.rng.random() for replica in group.replicas.values()] + [group.rng.random()]
+        self.assertEqual(len(set(first_numbers)), len(group.replicas) + 1, msg="the random streams are not independent!")
+
+    def test_profile(self):
+        sys = system.system(potential=OneD.harmonicOscillatorPotential(), sampler=stochastic.metropolisMonteCarloIntegrator(),
+                            seed=42)
+        group = replica_exchange.temperatureReplicaExchange(system=sys, temperature_range=range(288, 292))
+        group.simulate(2, steps_between_trials=5, profile=True)
+
+        report = group.get_profile_report().set_index("name")
+        self.assertEqual(2 * 5 * group.nReplicas, report.loc["propagate", "calls"])
+        self.assertEqual(2, report.loc["exchange", "calls"])
+
+        replica_reports = group.get_profile_report(per_replica=True)
+        self.assertEqual(set(group.replicas) | {None}, set(replica_reports.replica))
+
+    def test_trajectory_retention(self):
+        sys = system.system(potential=OneD.harmonicOscillatorPotential(), sampler=stochastic.metropolisMonteCarloIntegrator(),
+                            seed=42)
+        group = replica_exchange.temperatureReplicaExchange(system=sys, temperature_range=range(288, 292))
+        group.set_trajectory_retention("last", 3)
+        group.simulate(4, steps_between_trials=5)
+
+        for replica in group.replicas.values():
+            self.assertEqual(3, len(replica.trajectory))
+            self.assertEqual(replica.current_state.position, replica.trajectory.position.iloc[-1])
+
+    def test_checkpoint(self):
+        T_range = range(288, 298)
+        np.random.seed(42)
+        sys = system.system(potential=OneD.harmonicOscillatorPotential(), sampler=stochastic.metropolisMonteCarloIntegrator())
+        group = replica_exchange.temperatureReplicaExchange(system=sys, temperature_range=T_range)
+        group.simulate(2, steps_between_trials=5)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = group.save_checkpoint(os.path.join(tmp_dir, "temperatureReplicaExchange"))
+            group.simulate(3)
+
+            sys = system.system(potential=OneD.harmonicOscillatorPotential(), sampler=stochastic.metropolisMonteCarloIntegrator())
+            restarted = replica_exchange.temperatureReplicaExchange(system=sys, temperature_range=T_range)
+            restarted.load_checkpoint(path)
+        self.assertEqual(group.nSteps_between_trials, restarted.nSteps_between_trials)
+        restarted.simulate(3)
+
+        self.assertEqual(group.get_replicas_positions(), restarted.get_replicas_positions())
+        self.assertEqual([replica.replicaID for replica in group.replicas.values()],
+                         [replica.replicaID for replica in restarted.replicas.values()])
+
     def test_exchange_all(self):
         integrator = stochastic.metropolisMonteCarloIntegrator()
         potential = OneD.harmonicOscillatorPotential()
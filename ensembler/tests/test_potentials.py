@@ -1,3 +1,4 @@
+import copy
 import os
 import tempfile
 import unittest
@@ -571,6 +572,64 @@ class potentialCls_sumPotentials(test_potentialCls):
                                        err_msg="The results of " + potential.name + " are not correct!",
                                        decimal=8)
 
+    def test_threads(self):
+        positions = np.linspace(-3,3, 10)
+        terms = [OneD.gaussPotential(mu=mu, sigma=0.5) for mu in np.linspace(-2, 2, 8)]
+
+        potential = self.potential_class(terms)
+        threaded_potential = self.potential_class(terms, threads=4)
+
+        np.testing.assert_almost_equal(desired=sum(term.ene(positions) for term in terms),
+                                       actual=potential.ene(positions), decimal=12)
+        np.testing.assert_almost_equal(desired=potential.ene(positions), actual=threaded_potential.ene(positions),
+                                       decimal=12)
+        np.testing.assert_almost_equal(desired=potential.force(positions), actual=threaded_potential.force(positions),
+                                       decimal=12)
+
+        copied_potential = copy.deepcopy(threaded_potential)
+        np.testing.assert_almost_equal(desired=potential.ene(positions), actual=copied_potential.ene(positions),
+                                       decimal=12)
+
+
+class potentialCls_tabulatedPotential(test_potentialCls):
+    potential_class = OneD.tabulatedPotential
+
+    def test_interpolation(self):
+        wrapped = OneD.envelopedPotential(V_is=[OneD.harmonicOscillatorPotential(x_shift=x_shift) for x_shift in range(-2, 3)],
+                                          s=0.5)
+        potential = self.potential_class(potential=wrapped, x_range=(-6, 6), n_points=601, threads=3)
+        positions = np.linspace(-5.99, 5.99, 137)
+
+        self.assertLess(potential.ene_error, 1e-8)
+        self.assertLess(potential.force_error, 1e-6)
+        np.testing.assert_allclose(desired=wrapped.ene(positions), actual=potential.ene(positions), atol=1e-8)
+        np.testing.assert_allclose(desired=wrapped.force(positions), actual=potential.force(positions), atol=1e-6)
+        self.assertIsInstance(potential.ene(0.3), Number)
+
+    def test_outside_grid(self):
+        wrapped = OneD.harmonicOscillatorPotential(k=2)
+        potential = self.potential_class(potential=wrapped, x_range=(-1, 1), n_points=11)
+        positions = np.array([-3, 0.5, 4])
+
+        np.testing.assert_almost_equal(desired=wrapped.ene(positions), actual=potential.ene(positions), decimal=10)
+        np.testing.assert_almost_equal(desired=wrapped.force(positions), actual=potential.force(positions), decimal=10)
+
+    def test_wrong_grid(self):
+        with self.assertRaises(ValueError):
+            self.potential_class(x_range=(1, -1))
+        with self.assertRaises(ValueError):
+            self.potential_class(n_points=1)
+
+    def test_force_sign(self):
+        wrapped = OneD.envelopedPotential(V_is=[OneD.harmonicOscillatorPotential(x_shift=x_shift) for x_shift in [-1, 1]])
+        self.assertEqual(-1, self.potential_class(potential=wrapped, x_range=(-3, 3), n_points=61).force_sign)
+        self.assertEqual(1, self.potential_class(x_range=(-3, 3), n_points=61).force_sign)
+
+        with self.assertRaises(ValueError):
+            self.potential_class(x_range=(-3, 3), n_points=61, force_sign=-1)
+        with self.assertRaises(ValueError):
+            self.potential_class(x_range=(-3, 3), n_points=61, force_sign=0)
+
 
 """
 TEST for perturbed Potentials 1D
@@ -700,6 +759,24 @@ class potentialCls_perturbedLinearCoupledPotentials(test_potentialCls):
                                            lam) + "!\n\tPositions: " + str(positions) + "\n\tEnergies: " + str(
                                            energies), decimal=2)
 
+    def test_lambda_grid(self):
+        ha = OneD.harmonicOscillatorPotential(k=1.0, x_shift=-5.0)
+        hb = OneD.harmonicOscillatorPotential(k=2.0, x_shift=5.0)
+        potential = self.potential_class(Va=ha, Vb=hb, lam=0.5)
+        positions = np.linspace(-10, 10, num=7)
+        lambdas = np.linspace(0, 1, num=5)
+
+        energies = potential.ene_lambda_grid(positions, lambdas)
+        dvdlams = potential.dvdlam_lambda_grid(positions, lambdas)
+
+        self.assertEqual((5, 7), energies.shape)
+        self.assertEqual((5, 7), dvdlams.shape)
+        self.assertEqual(0.5, potential.constants[potential.lam], msg="the grid evaluation changed lambda!")
+        for lam, lambda_energies, lambda_dvdlams in zip(lambdas, energies, dvdlams):
+            potential.set_lambda(lam)
+            np.testing.assert_allclose(desired=potential.ene(positions), actual=lambda_energies, rtol=1e-8)
+            np.testing.assert_allclose(desired=potential.dvdlam(positions), actual=lambda_dvdlams, rtol=1e-8)
+
 
 class potentialCls_perturbed_exponentialCoupledPotentials(test_potentialCls):
     potential_class = OneD.exponentialCoupledPotentials
@@ -747,6 +824,25 @@ class potentialCls_perturbed_exponentialCoupledPotentials(test_potentialCls):
 class potentialCls_perturbed_envelopedPotentials(test_potentialCls):
     potential_class = OneD.envelopedPotential
 
+    def test_parameter_version(self):
+        import pickle
+        V_is = [OneD.harmonicOscillatorPotential(x_shift=2), OneD.harmonicOscillatorPotential(x_shift=-2)]
+        potential = self.potential_class(V_is=V_is)
+
+        # modifications of the constants and of the sub-potentials are propagated to the enveloped potential
+        for modify in [lambda pot: pot.constants.update({pot.nStates: 2}),
+                       lambda pot: pot.V_is[0].constants.update({pot.V_is[0].k: 2}),
+                       lambda pot: setattr(pot.V_is[1], "name", "modified")]:
+            version = potential.parameter_version
+            modify(potential)
+            self.assertGreater(potential.parameter_version, version)
+
+        # the links are restored for copies and pickled potentials
+        for restored in [copy.deepcopy(potential), pickle.loads(pickle.dumps(potential))]:
+            version = restored.parameter_version
+            restored.V_is[0].constants.update({restored.V_is[0].k: 3})
+            self.assertGreater(restored.parameter_version, version)
+
     def test_ene_1Pos(self):
         potential = self.potential_class(s=100)
         positions = 0
@@ -912,6 +1008,52 @@ class potentialCls_perturbed_envelopedPotentials(test_potentialCls):
                                            actual_energies), decimal=1)
 
 
+    def test_multi_s(self):
+        potential = self.potential_class(V_is=[OneD.harmonicOscillatorPotential(k=1),
+                                               OneD.harmonicOscillatorPotential(k=2, x_shift=3),
+                                               OneD.harmonicOscillatorPotential(k=3, x_shift=-2)],
+                                         s=[0.5, 0.2, 1.0], eoff=[0, 1, 2])
+        positions = np.linspace(-3, 4, 8)
+
+        # CHECK energies: V_R = -1/s_0 * ln(sum_i e^(-s_i*(V_i-E_i)))
+        prefactors = np.array([-s * (V.ene(positions) - eoff) for V, s, eoff in
+                               zip(potential.V_is, potential.s_i, potential.Eoff_i)])
+        expected_results = -1 / potential.s_i[0] * np.log(np.sum(np.exp(prefactors), axis=0))
+        np.testing.assert_almost_equal(desired=expected_results, actual=potential.ene(positions), decimal=8)
+
+        # CHECK forces: numerical derivative of the energies
+        h = 10 ** (-6)
+        expected_forces = -(potential.ene(positions + h) - potential.ene(positions - h)) / (2 * h)
+        np.testing.assert_almost_equal(desired=expected_forces, actual=potential.force(positions), decimal=5)
+
+        # CHECK same s for all states equals a single s
+        potential.s_i = [0.5, 0.5, 0.5]
+        energies = potential.ene(positions)
+        potential.s_i = 0.5
+        np.testing.assert_almost_equal(desired=potential.ene(positions), actual=energies, decimal=8)
+
+    def test_temperature(self):
+        T, kb = 2, 1.5
+        potential = self.potential_class(s=[0.5, 0.8], eoff=[0, 1], T=T, kb=kb)
+        positions = np.linspace(-3, 4, 8)
+
+        # CHECK energies: V_R = -1/(beta*s_0) * ln(sum_i e^(-beta*s_i*(V_i-E_i))), with beta = 1/(kb*T)
+        beta = 1 / (kb * T)
+        prefactors = np.array([-beta * s * (V.ene(positions) - eoff) for V, s, eoff in
+                               zip(potential.V_is, potential.s_i, potential.Eoff_i)])
+        expected_results = -1 / (beta * potential.s_i[0]) * np.log(np.sum(np.exp(prefactors), axis=0))
+        np.testing.assert_almost_equal(desired=expected_results, actual=potential.ene(positions), decimal=8)
+
+        # worked out by hand: x=0.3, s=0.5, T=2, kb=1
+        potential = self.potential_class(s=0.5, T=2)
+        self.assertAlmostEqual(-1.3196, potential.ene(0.3), places=4)
+
+        # CHECK forces: numerical derivative of the energies
+        h = 10 ** (-6)
+        expected_forces = -(potential.ene(positions + h) - potential.ene(positions - h)) / (2 * h)
+        np.testing.assert_almost_equal(desired=expected_forces, actual=potential.force(positions), decimal=5)
+
+
 class potentialCls_perturbed_hybridCoupledPotentials(test_potentialCls):
     potential_class = OneD.hybridCoupledPotentials
 
@@ -1037,6 +1179,24 @@ class potentialCls_perturbed_hybridCoupledPotentials(test_potentialCls):
                                        lam) + "!\n\tPositions: " + str(positions) + "\n\tEnergies: " + str(
                                        energies))
 
+    def test_lambda_grid(self):
+        ha = OneD.harmonicOscillatorPotential(k=1.0, x_shift=-5.0)
+        hb = OneD.harmonicOscillatorPotential(k=2.0, x_shift=5.0)
+        potential = self.potential_class(Va=ha, Vb=hb, lam=0.5)
+        positions = np.linspace(-10, 10, num=7)
+        lambdas = np.linspace(0, 1, num=5)
+
+        energies = potential.ene_lambda_grid(positions, lambdas)
+        dvdlams = potential.dvdlam_lambda_grid(positions, lambdas)
+
+        self.assertEqual((5, 7), energies.shape)
+        self.assertEqual((5, 7), dvdlams.shape)
+        self.assertEqual(0.5, potential.constants[potential.lam], msg="the grid evaluation changed lambda!")
+        for lam, lambda_energies, lambda_dvdlams in zip(lambdas, energies, dvdlams):
+            potential.set_lambda(lam)
+            np.testing.assert_allclose(desired=potential.ene(positions), actual=lambda_energies, rtol=1e-8)
+            np.testing.assert_allclose(desired=potential.dvdlam(positions), actual=lambda_dvdlams, rtol=1e-8)
+
 
 class potentialCls_perturbed_lambdaEnvelopedPotentials(test_potentialCls):
     potential_class = OneD.lambdaEDSPotential
@@ -1114,6 +1274,55 @@ class potentialCls_perturbed_lambdaEnvelopedPotentials(test_potentialCls):
                                            positions) + "\n\tEnergies: " + str(
                                            actual_energies), decimal=1)
 
+    def test_multi_lambda(self):
+        potential = self.potential_class(V_is=[OneD.harmonicOscillatorPotential(k=1),
+                                               OneD.harmonicOscillatorPotential(k=2, x_shift=3),
+                                               OneD.harmonicOscillatorPotential(k=3, x_shift=-2)],
+                                         lam=[0.2, 0.0, 0.8], s=0.5)
+        positions = np.linspace(-3, 4, 8)
+
+        # CHECK energies: V_R = -1/s * ln(sum_i lam_i * e^(-s*V_i))
+        expected_results = -1 / 0.5 * np.log(np.sum([lam * np.exp(-0.5 * V.ene(positions)) for V, lam in
+                                                     zip(potential.V_is, potential.lam_i)], axis=0))
+        np.testing.assert_almost_equal(desired=expected_results, actual=potential.ene(positions), decimal=8)
+
+        # CHECK forces: numerical derivative of the energies
+        h = 10 ** (-6)
+        expected_forces = -(potential.ene(positions + h) - potential.ene(positions - h)) / (2 * h)
+        np.testing.assert_almost_equal(desired=expected_forces, actual=potential.force(positions), decimal=5)
+
+        # CHECK a single lambda splits 1-lambda over the other states
+        potential.lam = 0.4
+        np.testing.assert_almost_equal(desired=[0.4, 0.3, 0.3], actual=potential.lam_i, decimal=8)
+
+    def test_ene_lambda_grid(self):
+        potential = self.potential_class(V_is=[OneD.harmonicOscillatorPotential(k=1),
+                                               OneD.harmonicOscillatorPotential(k=2, x_shift=3),
+                                               OneD.harmonicOscillatorPotential(k=3, x_shift=-2)], s=0.5, T=2, kb=1.5)
+        positions = np.linspace(-3, 4, 8)
+        lambdas = [0.1, [0.2, 0.0, 0.8], [1, 0, 0]]
+
+        energies = potential.ene_lambda_grid(positions, lambdas)
+
+        self.assertEqual((3, 8), energies.shape)
+        for lam, lambda_energies in zip(lambdas, energies):
+            potential.set_lam(lam)
+            np.testing.assert_almost_equal(desired=potential.ene(positions), actual=lambda_energies, decimal=8)
+        np.testing.assert_almost_equal(desired=potential.V_is[0].ene(positions), actual=energies[2], decimal=8)
+
+        # CHECK analytic: V_R = -1/(beta*s_0) * ln(sum_i lambda_i e^(-beta*s_i*V_i)), with beta = 1/(kb*T)
+        beta = 1 / (2 * 1.5)
+        expected_energies = -1 / (beta * 0.5) * np.log(np.sum(
+            np.array([0.2, 0.0, 0.8])[:, None] * np.exp([-beta * 0.5 * V.ene(positions) for V in potential.V_is]),
+            axis=0))
+        np.testing.assert_almost_equal(desired=expected_energies, actual=energies[1], decimal=8)
+
+    def test_wrong_lambda(self):
+        potential = self.potential_class()
+        with self.assertRaises(ValueError):
+            potential.set_lam([1.2, -0.2])
+        with self.assertRaises(IOError):
+            potential.set_lam([0.2, 0.3, 0.5])
 
 """
 Test Simple 2D Potentials:
@@ -1409,10 +1618,40 @@ class potentialCls_2D_sumPotentials(test_potentialCls):
                                        err_msg="The results of " + potential.name + " are not correct!", decimal=8)
 
 
+class potentialCls_2D_tabulatedPotential(test_potentialCls):
+    potential_class = TwoD.tabulatedPotential
+
+    def test_interpolation(self):
+        wrapped = TwoD.gaussPotential(amplitude=2, mu=(0.5, -0.5), sigma=(1, 2))
+        potential = self.potential_class(potential=wrapped, x_range=(-4, 4), y_range=(-5, 5), n_points=(161, 201),
+                                         threads=2)
+        positions = np.random.default_rng(42).uniform(-4, 4, size=(50, 2))
+
+        self.assertLess(potential.ene_error, 1e-5)
+        self.assertLess(potential.force_error, 1e-4)
+        np.testing.assert_allclose(desired=wrapped.ene(positions), actual=potential.ene(positions), atol=1e-5)
+        np.testing.assert_allclose(desired=wrapped.force(positions), actual=potential.force(positions), atol=1e-4)
+        self.assertEqual((2,), potential.force([0.1, 0.2]).shape)
+
+    def test_outside_grid(self):
+        wrapped = TwoD.harmonicOscillatorPotential()
+        potential = self.potential_class(potential=wrapped, x_range=(-1, 1), y_range=(-1, 1), n_points=11)
+        positions = np.array([[-3, 0], [0.5, 0.5], [0, 4]])
+
+        np.testing.assert_almost_equal(desired=wrapped.ene(positions), actual=potential.ene(positions), decimal=10)
+        np.testing.assert_almost_equal(desired=wrapped.force(positions), actual=potential.force(positions), decimal=10)
+
+    def test_force_sign(self):
+        self.assertEqual(1, self.potential_class(x_range=(-1, 1), y_range=(-1, 1), n_points=11).force_sign)
+        with self.assertRaises(ValueError):
+            self.potential_class(x_range=(-1, 1), y_range=(-1, 1), n_points=11, force_sign=-1)
+
+
 """
 Test Simple ND Potentials:
 """
 from ensembler.potentials import ND
+from ensembler.conditions.box_conditions import periodicBoundaryCondition
 
 
 class potentialCls_ND_harmonicOscillatorPotential(test_potentialCls):
@@ -1451,6 +1690,58 @@ class potentialCls_ND_harmonicOscillatorPotential(test_potentialCls):
         # for ind, (expected, actual) in enumerate(zip(expected_result, forces.T)):
 
 
+class potentialCls_ND_envelopedPotential(test_potentialCls):
+    potential_class = ND.envelopedPotential
+
+    def test_multi_s(self):
+        potential = self.potential_class(s=[0.5, 0.3], eoff=[0, 1])
+        positions = np.array([[0, 0], [1, 2], [3, 3.5], [-1, 2]], dtype=float)
+
+        # CHECK energies: V_R = -1/s_0 * ln(sum_i e^(-s_i*(V_i-E_i)))
+        prefactors = np.array([-s * (V.ene(positions) - eoff) for V, s, eoff in
+                               zip(potential.V_is, potential.s_i, potential.Eoff_i)])
+        expected_results = -1 / potential.s_i[0] * np.log(np.sum(np.exp(prefactors), axis=0))
+        np.testing.assert_almost_equal(desired=expected_results, actual=potential.ene(positions), decimal=8)
+
+        # CHECK forces: numerical gradient of the energies
+        h = 10 ** (-6)
+        expected_forces = np.array([-(potential.ene(positions + h * direction) -
+                                      potential.ene(positions - h * direction)) / (2 * h)
+                                    for direction in np.eye(2)]).T
+        forces = potential.force(positions)
+        self.assertEqual(positions.shape, forces.shape)
+        np.testing.assert_almost_equal(desired=expected_forces, actual=forces, decimal=5)
+        np.testing.assert_almost_equal(desired=expected_forces[1], actual=potential.force(positions[1]), decimal=5)
+
+    def test_temperature(self):
+        T, kb = 2, 1.5
+        potential = self.potential_class(s=[0.5, 0.8], eoff=[0, 1], T=T, kb=kb)
+        positions = np.array([[0, 0], [1, 2], [3, 3.5], [-1, 2]], dtype=float)
+
+        # CHECK energies: V_R = -1/(beta*s_0) * ln(sum_i e^(-beta*s_i*(V_i-E_i))), with beta = 1/(kb*T)
+        beta = 1 / (kb * T)
+        prefactors = np.array([-beta * s * (V.ene(positions) - eoff) for V, s, eoff in
+                               zip(potential.V_is, potential.s_i, potential.Eoff_i)])
+        expected_results = -1 / (beta * potential.s_i[0]) * np.log(np.sum(np.exp(prefactors), axis=0))
+        np.testing.assert_almost_equal(desired=expected_results, actual=potential.ene(positions), decimal=8)
+
+
+class potentialCls_ND_lambdaEDSPotential(test_potentialCls):
+    potential_class = ND.lambdaEDSPotential
+
+    def test_ene_lambda_grid(self):
+        potential = self.potential_class(s=0.5, T=2, kb=1.5)
+        positions = np.array([[0, 0], [1, 2], [3, 3.5], [-1, 2]], dtype=float)
+        lambdas = np.linspace(0, 1, 5)
+
+        energies = potential.ene_lambda_grid(positions, lambdas)
+
+        self.assertEqual((5, 4), energies.shape)
+        for lam, lambda_energies in zip(lambdas, energies):
+            potential.set_lam(lam)
+            np.testing.assert_almost_equal(desired=potential.ene(positions), actual=lambda_energies, decimal=8)
+
+
 class potentialCls_ND_sumPotentials(test_potentialCls):
     potential_class = TwoD.sumPotentials
 
@@ -1491,6 +1782,90 @@ class potentialCls_ND_sumPotentials(test_potentialCls):
                                        decimal=8)
 
 
+class potentialCls_ND_pairPotential(test_potentialCls):
+    potential_class = ND.pairPotential
+
+    def setUp(self) -> None:
+        super().setUp()
+        np.random.seed(42)
+        self.box_length = 8.0
+        # particles on a distorted grid, so that no pair is too close
+        grid = np.stack(np.meshgrid(*[np.arange(4)] * 3), axis=-1).reshape(-1, 3) * (self.box_length / 4)
+        self.positions = grid + np.random.uniform(-0.3, 0.3, size=grid.shape)
+
+    def brute_force_energy(self, positions: np.array, cutoff: float, box_length: float = None) -> float:
+        pair = OneD.lennardJonesPotential(sigma=1, epsilon=1)
+        energy = 0
+        for i in range(len(positions)):
+            for j in range(i + 1, len(positions)):
+                displacement = positions[j] - positions[i]
+                if (box_length is not None):
+                    displacement -= box_length * np.round(displacement / box_length)
+                distance = np.linalg.norm(displacement)
+                if (distance < cutoff):
+                    energy += pair.ene(distance) - pair.ene(cutoff)
+        return energy
+
+    def test_energies(self):
+        potential = self.potential_class(cutoff=2.5)
+        np.testing.assert_almost_equal(desired=self.brute_force_energy(self.positions, cutoff=2.5),
+                                       actual=potential.ene(self.positions), decimal=8)
+
+    def test_energies_periodic(self):
+        box = periodicBoundaryCondition(boundary=[[0, self.box_length]] * 3)
+        potential = self.potential_class(cutoff=2.5, box=box)
+
+        expected = self.brute_force_energy(self.positions, cutoff=2.5, box_length=self.box_length)
+        np.testing.assert_almost_equal(desired=expected, actual=potential.ene(self.positions), decimal=8)
+        # images of the particles in other boxes give the same energy
+        shifted = self.positions + self.box_length * np.random.randint(-2, 3, size=self.positions.shape)
+        potential.reset_neighbour_list()
+        np.testing.assert_almost_equal(desired=expected, actual=potential.ene(shifted), decimal=8)
+
+    def test_dVdpos(self):
+        box = periodicBoundaryCondition(boundary=[[0, self.box_length]] * 3)
+        potential = self.potential_class(cutoff=2.5, box=box)
+        forces = potential.force(self.positions)
+
+        self.assertEqual(self.positions.shape, forces.shape)
+        np.testing.assert_almost_equal(desired=np.zeros(3), actual=np.sum(forces, axis=0), decimal=8)
+
+        h = 1e-6
+        for particle, dimension in [(0, 0), (5, 1), (63, 2)]:
+            shift = np.zeros_like(self.positions)
+            shift[particle, dimension] = h
+            numerical = (potential.ene(self.positions + shift) - potential.ene(self.positions - shift)) / (2 * h)
+            np.testing.assert_almost_equal(desired=numerical, actual=forces[particle, dimension], decimal=4)
+
+    def test_one_dimension(self):
+        potential = self.potential_class(nDimensions=1, cutoff=2.5)
+        positions = np.array([0, 1.1, 2.3, 3.2, 6.0])
+
+        expected = self.brute_force_energy(positions[:, None], cutoff=2.5)
+        np.testing.assert_almost_equal(desired=expected, actual=potential.ene(positions), decimal=8)
+        self.assertEqual(positions.shape, potential.force(positions).shape)
+
+    def test_neighbour_list(self):
+        potential = self.potential_class(cutoff=1.5, skin=0.3)
+        i, j = potential.neighbour_pairs(self.positions)
+
+        distances = np.linalg.norm(self.positions[:, None] - self.positions[None, :], axis=-1)
+        expected_i, expected_j = np.nonzero(np.triu(distances < 1.8, k=1))
+        self.assertEqual(set(zip(expected_i, expected_j)), set(zip(i, j)))
+
+        # the list is reused for small displacements and rebuilt after moving further than skin/2
+        potential.ene(self.positions + 0.05)
+        self.assertEqual(1, potential.n_neighbour_list_builds)
+        potential.ene(self.positions + 0.2)
+        self.assertEqual(2, potential.n_neighbour_list_builds)
+
+    def test_constructor_errors(self):
+        self.assertRaises(ValueError, self.potential_class, cutoff=0)
+        self.assertRaises(ValueError, self.potential_class, box=periodicBoundaryCondition(boundary=[[0, 4]] * 3))
+        self.assertRaises(ValueError, self.potential_class, nDimensions=2,
+                          box=periodicBoundaryCondition(boundary=[[0, 8]] * 3))
+
+
 """
 biased potentials
 """
@@ -1,4 +1,6 @@
+import copy
 import os
+import pickle
 import tempfile
 import unittest
 
@@ -7,8 +9,15 @@ import numpy as np
 from ensembler import samplers
 from ensembler import potentials
 from ensembler import system
+from ensembler.system import observers
 from ensembler.util import dataStructure as data
 
+
+def _observe_step(sys):
+    # module level, so that it can be pickled with a callbackObserver
+    sys.observed_step = sys.step
+
+
 class test_System(unittest.TestCase):
     system_class = system.system
     tmp_test_dir: str = None
@@ -244,6 +253,224 @@ class test_System(unittest.TestCase):
                                  ind + 1) + " after propergating in attribute: velocity!")  # due to samplers
             old_frame = frame
 
+    def test_simulate_kernel(self):
+        from ensembler.conditions.box_conditions import periodicBoundaryCondition
+        from ensembler.conditions.restrain_conditions import positionRestraintCondition
+        steps = 200
+
+        for sampler_class, conditions in [(self.sampler.__class__, []),
+                                          (samplers.newtonian.velocityVerletIntegrator, []),
+                                          (samplers.stochastic.langevinIntegrator,
+                                           [periodicBoundaryCondition(boundary=[-1, 1])])]:
+            trajectories = []
+            for kernel in [False, True]:
+                np.random.seed(42)
+                sys = self.system_class(potential=self.pot, sampler=sampler_class(), start_position=0.5,
+                                        temperature=300,
+                                        conditions=conditions)
+                sys.simulate(steps=steps, save_every_state=3, verbosity=False, kernel=kernel)
+                trajectories.append(sys.trajectory)
+
+            object_trajectory, kernel_trajectory = trajectories
+            self.assertEqual(object_trajectory.shape, kernel_trajectory.shape)
+            self.assertEqual(steps - 1, sys.step)
+            for column in object_trajectory.columns:
+                np.testing.assert_array_equal(np.array(object_trajectory[column].tolist(), dtype=float),
+                                              np.array(kernel_trajectory[column].tolist(), dtype=float),
+                                              err_msg="kernel path differs in " + column)
+
+        sys = self.system_class(potential=self.pot, sampler=self.sampler, start_position=0.5,
+                                conditions=[positionRestraintCondition(position_0=0)])
+        self.assertRaises(ValueError, sys.simulate, steps=10, verbosity=False, kernel=True)
+
+    def test_energy_cache(self):
+        potential = potentials.OneD.harmonicOscillatorPotential(k=1)
+        sys = system.system(potential=potential, sampler=samplers.newtonian.velocityVerletIntegrator(),
+                            start_position=0.5)
+        hits, misses = sys.energy_cache_hits, sys.energy_cache_misses
+
+        # unchanged state
+        sys._update_energies()
+        sys.temperature = 310
+        self.assertEqual((hits + 2, misses), (sys.energy_cache_hits, sys.energy_cache_misses))
+
+        # new position, velocity or potential parameters
+        sys.position = 0.7
+        self.assertEqual(misses + 1, sys.energy_cache_misses)
+        self.assertEqual(potential.ene(0.7), sys.total_potential_energy)
+
+        sys.velocity = 2.0
+        self.assertEqual(misses + 2, sys.energy_cache_misses)
+        np.testing.assert_almost_equal(desired=2.0, actual=sys.total_kinetic_energy)
+
+        potential.constants.update({potential.k: 2})
+        potential._update_functions()
+        sys._update_energies()
+        self.assertEqual(misses + 3, sys.energy_cache_misses)
+        self.assertEqual(potential.ene(0.7), sys.total_potential_energy)
+
+        # one evaluation per step
+        sys.simulate(10, verbosity=False)
+        self.assertEqual(misses + 3 + 10, sys.energy_cache_misses)
+
+    def test_energy_cache_simulate_overhead(self):
+        # the cache key is built once per step and not looked up after propagate
+        sys = system.system(potential=potentials.OneD.harmonicOscillatorPotential(),
+                            sampler=samplers.stochastic.langevinIntegrator(), start_position=0.5)
+        hits = sys.energy_cache_hits
+        key_calls = []
+        build_key = sys._current_energy_cache_key
+        sys._current_energy_cache_key = lambda: key_calls.append(1) or build_key()
+
+        steps = 100
+        sys.simulate(steps, verbosity=False)
+        self.assertLessEqual(sys.energy_cache_hits - hits, 1)  # only the update before the loop
+        self.assertLessEqual(len(key_calls), steps + 2)
+
+    def test_simulate_lazy_energies(self):
+        steps = 50
+        for sampler_class in [self.sampler.__class__, samplers.stochastic.langevinIntegrator]:
+            trajectories = []
+            evaluations = []
+            for lazy_energies in [False, True]:
+                np.random.seed(42)
+                sys = self.system_class(potential=copy.deepcopy(self.pot), sampler=sampler_class(),
+                                        start_position=0.5, temperature=300)
+                misses = sys.energy_cache_misses
+                sys.simulate(steps=steps, save_every_state=5, verbosity=False, lazy_energies=lazy_energies)
+                trajectories.append(sys.trajectory)
+                evaluations.append(sys.energy_cache_misses - misses)
+
+            for column in trajectories[0].columns:
+                np.testing.assert_equal(trajectories[0][column].tolist(), trajectories[1][column].tolist(),
+                                        err_msg="lazy energies differ in " + column)
+            if (not sys.sampler._step_needs_state):
+                self.assertLess(evaluations[1], evaluations[0] / 3)
+
+    def test_seed(self):
+        trajectories = []
+        for global_seed in [1, 2]:
+            np.random.seed(global_seed)
+            sys = self.system_class(potential=copy.deepcopy(self.pot), sampler=samplers.stochastic.langevinIntegrator(),
+                                    start_position=0.5, seed=42)
+            sys.simulate(steps=20, verbosity=False)
+            trajectories.append(sys.trajectory)
+
+        for column in trajectories[0].columns:
+            np.testing.assert_equal(trajectories[0][column].tolist(), trajectories[1][column].tolist(),
+                                    err_msg="seeded trajectory differs in " + column)
+
+    def test_profile(self):
+        steps = 20
+        sys = self.system_class(potential=copy.deepcopy(self.pot), sampler=samplers.stochastic.langevinIntegrator(),
+                                start_position=0.5, seed=42)
+        force_function = sys.potential.__dict__.get("force")
+        sys.simulate(steps=steps, verbosity=False, profile=True)
+        report = sys.get_profile_report().set_index("name")
+
+        for phase in ["propagate", "apply_conditions", "update_system_properties", "update_current_state"]:
+            self.assertEqual(steps, report.loc[phase, "calls"], msg="wrong number of calls of " + phase)
+        self.assertEqual(steps, report.loc["append_trajectory", "calls"])
+        self.assertTrue(all(report[report.kind == "phase"].total_time >= 0))
+        self.assertIn(sys.potential.__class__.__name__ + ".force", report.index)
+        self.assertEqual(force_function, sys.potential.__dict__.get("force"), msg="the counting wrapper was not removed!")
+
+        # without profile, nothing is counted
+        sys.simulate(steps=steps, verbosity=False)
+        self.assertEqual(steps, sys.get_profile_report().set_index("name").loc["propagate", "calls"])
+
+    def test_observers(self):
+        observed_steps = []
+        blocks = []
+        step_observer = observers.callbackObserver(function=lambda sys: observed_steps.append(sys.step), every_step=3)
+        block_observer = observers.callbackObserver(block_function=lambda sys, frames: blocks.append(frames),
+                                                    block_size=4)
+        sys = self.system_class(potential=copy.deepcopy(self.pot), sampler=samplers.stochastic.langevinIntegrator(),
+                                start_position=0.5, seed=42, observers=[step_observer])
+        sys.add_observer(block_observer)
+
+        sys.simulate(steps=10, verbosity=False)
+        sys.simulate(steps=5, verbosity=False)
+        self.assertEqual([2, 5, 8, 1, 4], observed_steps, msg="the stride is not kept over simulations!")
+
+        # 15 saved frames: 3 full blocks, the rest is passed by flush_observers
+        self.assertEqual(3, len(blocks))
+        sys.flush_observers()
+        self.assertEqual([4, 4, 4, 3], [len(block["position"]) for block in blocks])
+        np.testing.assert_equal(sys.trajectory.position.tolist()[1:],
+                                np.concatenate([block["position"] for block in blocks]).tolist())
+
+        self.assertRaises(ValueError, observers.callbackObserver, every_step=0)
+
+    def test_callback_observer_pickling(self):
+        # the functions are pickled with the system, e.g. for replicas simulated in other processes
+        sys = self.system_class(potential=copy.deepcopy(self.pot), sampler=samplers.stochastic.langevinIntegrator(),
+                                start_position=0.5, seed=42,
+                                observers=[observers.callbackObserver(function=_observe_step, every_step=3)])
+        restored = pickle.loads(pickle.dumps(sys))
+        restored.simulate(steps=10, verbosity=False)
+        self.assertEqual(8, restored.observed_step)
+
+        # functions, that can not be pickled, are only usable in-process
+        observer = observers.callbackObserver(function=lambda sys: None)
+        self.assertIs(observer.function, copy.deepcopy(observer).function)
+        self.assertRaises(pickle.PicklingError, pickle.dumps, observer)
+
+    def test_trajectory_retention(self):
+        steps = 40
+        sys = self.system_class(potential=copy.deepcopy(self.pot), sampler=samplers.stochastic.langevinIntegrator(),
+                                start_position=0.5, seed=42)
+        sys.simulate(steps=steps, verbosity=False)
+        reference = sys.trajectory.position.tolist()
+
+        for policy, n_frames, expected in [("none", None, reference[-1:]), ("last", 5, reference[-5:]),
+                                           ("stride", 8, reference[::8])]:
+            sys = self.system_class(potential=copy.deepcopy(self.pot), sampler=samplers.stochastic.langevinIntegrator(),
+                                    start_position=0.5, seed=42)
+            sys.set_trajectory_retention(policy, n_frames)
+            sys.simulate(steps=steps, verbosity=False)
+            self.assertEqual(policy, sys.trajectory_retention)
+            np.testing.assert_equal(expected, sys.trajectory.position.tolist(), err_msg="wrong frames kept by " + policy)
+
+            # the policy is kept, if the trajectory is cleared
+            sys.simulate(steps=steps, verbosity=False, withdraw_traj=True)
+            self.assertEqual(policy, sys.trajectory_retention)
+
+        sys = self.system_class(potential=copy.deepcopy(self.pot), sampler=samplers.stochastic.langevinIntegrator(),
+                                start_position=0.5, seed=42)
+        sys.set_trajectory_retention("reservoir", 10)
+        sys.simulate(steps=steps, verbosity=False)
+        positions = sys.trajectory.position.tolist()
+        self.assertEqual(10, len(positions))
+        self.assertEqual(sorted(reference.index(position) for position in positions),
+                         [reference.index(position) for position in positions], msg="the reservoir is not ordered!")
+        self.assertEqual(steps + 1, copy.deepcopy(sys)._trajectory.n_offered)
+
+        self.assertRaises(ValueError, sys.set_trajectory_retention, "last")
+        self.assertRaises(ValueError, sys.set_trajectory_retention, "everything")
+
+    def test_checkpoint(self):
+        steps = 20
+        for sampler_class in [self.sampler.__class__, samplers.stochastic.langevinVelocityIntegrator]:
+            np.random.seed(42)
+            sys = self.system_class(potential=copy.deepcopy(self.pot), sampler=sampler_class(), start_position=0.5)
+            sys.simulate(steps=steps, verbosity=False)
+            path = sys.save_checkpoint(self.tmp_out_path)
+            sys.simulate(steps=steps, verbosity=False)
+
+            restarted = self.system_class(potential=copy.deepcopy(self.pot), sampler=sampler_class(),
+                                          start_position=0.1)
+            restarted.load_checkpoint(path)
+            restarted.simulate(steps=steps, verbosity=False)
+
+            # the first frame of the restarted system is its initial state
+            for column in sys.trajectory.columns:
+                np.testing.assert_equal(sys.trajectory[column].tolist()[-steps:],
+                                        restarted.trajectory[column].tolist()[1:],
+                                        err_msg="restarted trajectory differs in " + column)
+
+        self.assertRaises(IOError, potentials.OneD.harmonicOscillatorPotential().load_checkpoint, path)
+
     def test_applyConditions(self):
         """
         NOT IMPLEMENTED!
@@ -696,6 +923,10 @@ class test_perturbedSystem1D(test_System):
                                  ind + 1) + " after propergating in attribute: dhdLam!")
             old_frame = frame
 
+    def test_simulate_kernel(self):
+        sys = self.system_class(potential=self.pot, sampler=self.sampler)
+        self.assertRaises(ValueError, sys.simulate, steps=10, verbosity=False, kernel=True)
+
     def test_applyConditions(self):
         """
         NOT IMPLEMENTED!
@@ -1118,6 +1349,10 @@ class test_edsSystem1D(test_System):
                                  ind + 1) + " after propergating in attribute: Eoff!")
             old_frame = frame
 
+    def test_simulate_kernel(self):
+        sys = self.system_class(potential=self.pot, sampler=self.sampler)
+        self.assertRaises(ValueError, sys.simulate, steps=10, verbosity=False, kernel=True)
+
     def test_applyConditions(self):
         """
         NOT IMPLEMENTED!
@@ -1242,6 +1477,164 @@ class test_edsSystem1D(test_System):
                                                       temperature=temperature, eds_s=s)
         self.assertEqual(1.9999724639297711, sys.total_potential_energy, msg="Could not get the correct Pot Energy!")
 
+    def test_adaptive_eoff(self):
+        # the end states only differ by y_shift, so the converged offsets differ by dF = 5 kJ/mol
+        dF = 5
+        pot = potentials.OneD.envelopedPotential(
+            V_is=[potentials.OneD.harmonicOscillatorPotential(k=10, x_shift=-1),
+                  potentials.OneD.harmonicOscillatorPotential(k=10, x_shift=1, y_shift=dF)], eoff=[0, 0])
+        sys = self.system_class(potential=pot, sampler=self.sampler, start_position=0, temperature=300,
+                                adaptive_eoff=True, eoff_update_every=500, seed=0)
+
+        deviations = []
+        for window in range(6):
+            sys.simulate(500, verbosity=False)
+            deviations.append(abs(sys.eoff[1] - sys.eoff[0] - dF))
+
+        self.assertIs(pot, sys.potential)
+        self.assertEqual(6, sys.eoff_updates)
+        self.assertLess(deviations[0], dF)
+        self.assertLess(deviations[-1], deviations[0])
+        self.assertLess(deviations[-1], 1)
+        np.testing.assert_almost_equal(desired=sys.eoff, actual=sys.trajectory.eoff.iloc[-1], decimal=8)
+
+    def test_adaptive_eoff_damping(self):
+        for damping in [0, 1.5]:
+            with self.assertRaises(ValueError):
+                self.system_class(potential=self.pot, sampler=self.sampler, start_position=0, temperature=300,
+                                  adaptive_eoff=True, eoff_damping=damping)
+
+        sys = self.system_class(potential=self.pot, sampler=self.sampler, start_position=0, temperature=300,
+                                adaptive_eoff=True, eoff_update_every=10, eoff_damping=lambda n: 0.0)
+        with self.assertRaises(ValueError):
+            sys.simulate(30, verbosity=False)
+
+        sys = self.system_class(potential=self.pot, sampler=self.sampler, start_position=0, temperature=300)
+        sys.simulate(30, verbosity=False)
+        self.assertEqual(0, sys.eoff_updates)
+
+    def test_adaptive_eoff_window(self):
+        sys = self.system_class(potential=self.pot, sampler=self.sampler, start_position=0, temperature=300,
+                                adaptive_eoff=True, eoff_update_every=50)
+        sys.simulate(20, verbosity=False)
+
+        self.assertEqual(20, sys._eoff_window_samples)
+        self.assertEqual((len(self.pot.V_is),), np.shape(sys._eoff_window_log_sums))
+        self.assertEqual(0, sys.eoff_updates)
+
+        checkpoint = sys._checkpoint_state()
+        np.testing.assert_array_equal(sys._eoff_window_log_sums, checkpoint["_eoff_window_log_sums"])
+
+
+
+class test_walkerSystem(unittest.TestCase):
+    system_class = system.system
+
+    def setUp(self) -> None:
+        self.pot1D = potentials.OneD.doubleWellPotential()
+        self.pot2D = potentials.TwoD.harmonicOscillatorPotential()
+        self.n_walkers = 20
+
+    def test_constructor(self):
+        sys = self.system_class(potential=self.pot1D, start_position=0.5, n_walkers=self.n_walkers)
+        self.assertEqual(self.n_walkers, sys.nWalkers)
+        self.assertEqual((self.n_walkers,), sys.position_shape)
+        np.testing.assert_array_equal(np.full(self.n_walkers, 0.5), sys.position)
+        np.testing.assert_allclose(self.pot1D.ene(sys.position), sys.total_potential_energy)
+
+        start_positions = np.linspace(-1, 1, self.n_walkers * 2).reshape(self.n_walkers, 2)
+        sys = self.system_class(potential=self.pot2D, start_position=start_positions, n_walkers=self.n_walkers,
+                                sampler=samplers.newtonian.velocityVerletIntegrator())
+        np.testing.assert_array_equal(start_positions, sys.position)
+        self.assertEqual((self.n_walkers, 2), np.shape(sys.velocity))
+        self.assertEqual((self.n_walkers,), np.shape(sys.total_kinetic_energy))
+
+        self.assertRaises(Exception, self.system_class, potential=self.pot2D, start_position=[0, 0, 0],
+                          n_walkers=self.n_walkers)
+        self.assertRaises(ValueError, self.system_class, potential=self.pot1D, n_walkers=0)
+
+    def test_simulate(self):
+        steps = 30
+        for pot, start_position in [(self.pot1D, 0.5), (self.pot2D, [0.5, 0.5])]:
+            for sampler in [samplers.stochastic.metropolisMonteCarloIntegrator(),
+                            samplers.stochastic.monteCarloIntegrator(),
+                            samplers.stochastic.langevinIntegrator(),
+                            samplers.stochastic.langevinVelocityIntegrator(),
+                            samplers.newtonian.velocityVerletIntegrator()]:
+                sys = self.system_class(potential=pot, sampler=sampler, start_position=start_position,
+                                        n_walkers=self.n_walkers)
+                sys.simulate(steps, verbosity=False)
+                trajectory = sys.trajectory
+
+                self.assertEqual(((steps + 1) * self.n_walkers, len(sys.state._fields)), trajectory.shape)
+                self.assertEqual(["frame", "walker"], list(trajectory.index.names))
+                self.assertEqual(np.shape(start_position), np.shape(trajectory.position.loc[(steps, 0)]))
+
+                # the walkers start at the same position, but are propagated independently
+                final_positions = np.array(trajectory.xs(steps, level="frame").position.tolist())
+                self.assertEqual(self.n_walkers, len(np.unique(final_positions, axis=0)), msg=sampler.name)
+                np.testing.assert_allclose(pot.ene(final_positions),
+                                           trajectory.xs(steps, level="frame").total_potential_energy)
+
+    def test_simulate_kernel(self):
+        trajectories = []
+        for kernel in [False, True]:
+            np.random.seed(42)
+            sys = self.system_class(potential=self.pot1D, sampler=samplers.stochastic.langevinVelocityIntegrator(),
+                                    start_position=0.5, n_walkers=self.n_walkers)
+            sys.simulate(50, save_every_state=7, verbosity=False, kernel=kernel)
+            trajectories.append(sys.trajectory)
+
+        for column in trajectories[0].columns:
+            np.testing.assert_array_equal(trajectories[0][column], trajectories[1][column])
+
+
+class test_particleSystem(unittest.TestCase):
+    system_class = system.system
+
+    def setUp(self) -> None:
+        from ensembler.conditions.box_conditions import periodicBoundaryCondition
+
+        self.box_length = 8.0
+        self.box = periodicBoundaryCondition(boundary=[[0, self.box_length]] * 2)
+        self.pot = potentials.ND.pairPotential(nDimensions=2, cutoff=2.5, skin=0.3, box=self.box)
+        self.start_positions = np.stack(np.meshgrid(*[np.arange(4)] * 2), axis=-1).reshape(-1, 2) * 2.0 + 0.5
+        self.n_particles = len(self.start_positions)
+
+    def test_constructor(self):
+        sys = self.system_class(potential=self.pot, sampler=samplers.newtonian.velocityVerletIntegrator(),
+                                conditions=[self.box], start_position=self.start_positions,
+                                n_particles=self.n_particles)
+        self.assertEqual((self.n_particles, 2), sys.position_shape)
+        self.assertEqual((self.n_particles, 2), np.shape(sys.velocity))
+        self.assertEqual(0, np.ndim(sys.total_kinetic_energy))
+        np.testing.assert_allclose(self.pot.ene(self.start_positions), sys.total_potential_energy)
+
+        self.assertRaises(Exception, self.system_class, potential=self.pot, start_position=[0.5, 0.5],
+                          n_particles=self.n_particles)
+        self.assertRaises(ValueError, self.system_class, potential=self.pot, n_particles=2, n_walkers=2)
+
+    def test_simulate(self):
+        steps = 100
+        trajectories = []
+        for kernel in [False, True]:
+            np.random.seed(42)
+            sys = self.system_class(potential=self.pot, sampler=samplers.newtonian.velocityVerletIntegrator(),
+                                    conditions=[self.box], start_position=self.start_positions,
+                                    n_particles=self.n_particles, temperature=0.5)
+            sys.simulate(steps, verbosity=False, kernel=kernel)
+            trajectories.append(sys.trajectory)
+
+        trajectory = trajectories[0]
+        self.assertEqual((steps + 1, len(sys.state._fields)), trajectory.shape)
+        self.assertEqual((self.n_particles, 2), np.shape(trajectory.position.iloc[-1]))
+        # the particles stay in the box and the total energy is conserved
+        self.assertTrue(np.all((trajectory.position.iloc[-1] >= 0) & (trajectory.position.iloc[-1] <= self.box_length)))
+        np.testing.assert_allclose(trajectory.total_system_energy.iloc[0], trajectory.total_system_energy, rtol=1e-3)
+
+        for column in trajectory.columns:
+            np.testing.assert_array_equal(np.array(trajectory[column].tolist(), dtype=float),
+                                          np.array(trajectories[1][column].tolist(), dtype=float))
 
 
 if __name__ == '__main__':
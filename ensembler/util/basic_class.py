@@ -6,7 +6,11 @@ Module: basic_class
 import io
 import pickle
 import copy
-from typing import Union, Callable
+from typing import Union, Callable, Dict, Tuple
+
+import numpy as np
+
+from ensembler.util.checkpoint import write_checkpoint, read_checkpoint
 
 
 def notImplementedERR():
@@ -19,6 +23,7 @@ class _baseClass:
     """
     name: str = "Unknown"
     _verbose:bool =False
+    _checkpoint_attributes: Tuple[str] = () # attributes stored by save_checkpoint, extended by the subclasses
 
     def __name__(self) -> str:
         return str(self.name)
@@ -93,3 +98,58 @@ class _baseClass:
         bufferedReader.close()
 
         return obj
+
+    def save_checkpoint(self, path: str) -> str:
+        """
+            save_checkpoint
+                This method stores the numeric state of the object (e.g. positions, velocities, step counters, bias
+                grids) and the state of the numpy random generator to a compact .npz file.
+                In contrast to save, no code objects are pickled, so checkpoints of large ensembles are small and fast
+                to read. The object can be restored with load_checkpoint on an identically constructed object.
+
+        Parameters
+        ----------
+        path: str
+            path of the checkpoint file, the suffix .npz is added, if missing.
+
+        Returns
+        -------
+        str
+            path of the checkpoint file
+        """
+        state = {"state": self._checkpoint_state(), "random_state": list(np.random.get_state())}
+        return write_checkpoint(path=path, name=self.__class__.__name__, state=state)
+
+    def load_checkpoint(self, path: str):
+        """
+            load_checkpoint
+                This method restores the state written by save_checkpoint into this object, including the state of
+                the numpy random generator. A continued simulation is identical to the not interrupted one.
+
+        Parameters
+        ----------
+        path: str
+            path of the checkpoint file
+
+        Raises
+        ------
+        IOError
+            if the checkpoint was written by another class
+        """
+        state = read_checkpoint(path=path, name=self.__class__.__name__)
+        self._restore_checkpoint_state(state["state"])
+        np.random.set_state(tuple(state["random_state"]))
+
+    def _checkpoint_state(self) -> Dict:
+        """
+        returns the state stored by save_checkpoint
+        """
+        return {name: getattr(self, name) for name in self._checkpoint_attributes if (hasattr(self, name))}
+
+    def _restore_checkpoint_state(self, state: Dict):
+        """
+        restores the state returned by _checkpoint_state
+        """
+        for name in self._checkpoint_attributes:
+            if (name in state):
+                setattr(self, name, state[name])
@@ -0,0 +1,161 @@
+"""
+Module: checkpoint
+    This module writes and reads the compact checkpoints of ensembler classes (see _baseClass.save_checkpoint).
+    A checkpoint is a numpy .npz archive: the arrays are stored as members, all other values (numbers, strings,
+    lists and dicts) are stored in one JSON document. Lists of equally shaped arrays (e.g. the positions of all
+    replicas) are stacked into one member, so that the size of the archive does not grow with the number of objects.
+"""
+import json
+
+import numpy as np
+
+from ensembler.util.ensemblerTypes import Dict, List, Union
+
+_format_version = 1
+
+
+def _is_stackable(values: List) -> bool:
+    if (len(values) == 0):
+        return False
+    if (all(isinstance(value, np.ndarray) for value in values) or
+            all(isinstance(value, np.generic) for value in values)):
+        return all(np.shape(value) == np.shape(values[0]) and value.dtype == values[0].dtype for value in values)
+    return False
+
+
+def _encode(value, arrays: Dict[str, np.array], key: str):
+    """
+    converts a value into its JSON representation. Arrays are added to arrays with the given key and referenced.
+    """
+    if (value is None or type(value) in (int, float, str)):
+        return value
+    elif (isinstance(value, (bool, np.bool_))):
+        return {"__type__": "bool", "value": bool(value)}
+    elif (isinstance(value, (np.ndarray, np.generic))):
+        if (value.dtype == object):
+            return _encode(value.tolist(), arrays, key)
+        arrays[key] = np.asarray(value)
+        return {"__type__": "array" if (isinstance(value, np.ndarray)) else "scalar", "key": key}
+    elif (isinstance(value, (list, tuple))):
+        if (_is_stackable(value)):
+            arrays[key] = np.stack(value)
+            return {"__type__": "stacked", "key": key, "arrays": isinstance(value[0], np.ndarray),
+                    "tuple": isinstance(value, tuple)}
+        return {"__type__": "list", "tuple": isinstance(value, tuple),
+                "items": [_encode(item, arrays, key + "/" + str(index)) for index, item in enumerate(value)]}
+    elif (isinstance(value, dict)):
+        return {"__type__": "dict",
+                "items": {str(name): _encode(item, arrays, key + "/" + str(name)) for name, item in value.items()}}
+    else:
+        raise ValueError("checkpoint: can not store a value of type " + str(type(value)) + " in " + key)
+
+
+def _decode(value, arrays):
+    """
+    restores a value from its JSON representation.
+    """
+    if (not isinstance(value, dict)):
+        return value
+    elif (value["__type__"] == "bool"):
+        return value["value"]
+    elif (value["__type__"] == "array"):
+        return np.array(arrays[value["key"]])
+    elif (value["__type__"] == "scalar"):
+        return arrays[value["key"]][()]
+    elif (value["__type__"] == "stacked"):
+        stacked = arrays[value["key"]]
+        items = [np.array(item) for item in stacked] if (value["arrays"]) else list(stacked)
+        return tuple(items) if (value["tuple"]) else items
+    elif (value["__type__"] == "list"):
+        items = [_decode(item, arrays) for item in value["items"]]
+        return tuple(items) if (value["tuple"]) else items
+    elif (value["__type__"] == "dict"):
+        return {name: _decode(item, arrays) for name, item in value["items"].items()}
+    else:
+        raise IOError("checkpoint: unknown entry type " + str(value["__type__"]))
+
+
+def write_checkpoint(path: str, name: str, state: Dict) -> str:
+    """
+        write_checkpoint
+            writes the state into a checkpoint file.
+
+    Parameters
+    ----------
+    path: str
+        path of the checkpoint (the suffix .npz is added, if missing)
+    name: str
+        name of the checkpointed class, which is checked when reading the checkpoint
+    state: Dict
+        the state to store
+
+    Returns
+    -------
+    str
+        path of the checkpoint
+    """
+    arrays = {}
+    metadata = {"format": _format_version, "class": name, "state": _encode(state, arrays, "state")}
+    path = path if (path.endswith(".npz")) else path + ".npz"
+    np.savez(path, __metadata__=np.array(json.dumps(metadata)), **arrays)
+    return path
+
+
+def read_checkpoint(path: str, name: str) -> Dict:
+    """
+        read_checkpoint
+            reads the state of a checkpoint file.
+
+    Parameters
+    ----------
+    path: str
+        path of the checkpoint
+    name: str
+        expected name of the checkpointed class
+
+    Returns
+    -------
+    Dict
+        the stored state
+
+    Raises
+    ------
+    IOError
+        if the checkpoint was written by another class or format version
+    """
+    with np.load(path, allow_pickle=False) as archive:
+        metadata = json.loads(str(archive["__metadata__"]))
+        if (metadata["format"] != _format_version or metadata["class"] != name):
+            raise IOError("checkpoint: " + path + " contains a " + str(metadata["class"]) + " checkpoint (format " +
+                          str(metadata["format"]) + "), but " + name + " (format " + str(_format_version) +
+                          ") was expected.")
+        arrays = {key: archive[key] for key in archive.files}
+    return _decode(metadata["state"], arrays)
+
+
+def stack_states(states: List[Dict]) -> Dict[str, List]:
+    """
+        stack_states
+            converts the states of many objects into one state of lists, so that their arrays can be stacked.
+            Only the entries present in all states are kept.
+    """
+    names = [name for name in states[0] if (all(name in state for state in states))]
+    stacked = {}
+    for name in names:
+        values = [state[name] for state in states]
+        stacked[name] = stack_states(values) if (all(isinstance(value, dict) for value in values)) else values
+    return stacked
+
+
+def unstack_states(stacked: Dict[str, Union[List, Dict]], n_states: int) -> List[Dict]:
+    """
+        unstack_states
+            inverse of stack_states.
+    """
+    states = [{} for _ in range(n_states)]
+    for name, values in stacked.items():
+        if (isinstance(values, dict)):
+            values = unstack_states(values, n_states)
+        for state, value in zip(states, values):
+            state[name] = value
+    return states
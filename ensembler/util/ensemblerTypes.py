@@ -3,12 +3,13 @@
 """
 
 # Generic Types - provided to all other files from here
-from typing import TypeVar, Union, List, Tuple, Iterable, Dict, NoReturn
+from typing import TypeVar, Union, List, Tuple, Iterable, Dict, NoReturn, Callable
 from numbers import Number
 
 # Dummy defs:
 potentialCls = TypeVar("potential")
 conditionCls = TypeVar("condition")
+observerCls = TypeVar("observer")
 samplerCls = TypeVar("samplers")
 
 systemCls = TypeVar("system")
@@ -0,0 +1,184 @@
+"""
+Module: profiling
+    This module provides the lightweight profiling of the simulations. A simulationProfile collects the number of calls
+    and the time (time.perf_counter) of the simulation phases and counts the energy and force evaluations of the
+    potentials by potential class. The profile is stored on the system, therefore it is also available for replicas,
+    which were simulated in other processes, and can be aggregated over the replicas of an ensemble.
+"""
+import time
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from ensembler.util.ensemblerTypes import Callable, Dict, Iterable, List, potentialCls
+
+
+class simulationProfile:
+    """
+    Collects the calls and times of the simulation phases and the potential evaluations.
+    The profile is only filled, while a simulation runs with profile=True, otherwise nothing is wrapped or timed.
+    """
+    _potential_methods = ("ene", "force")
+
+    def __init__(self):
+        self.phase_calls: Dict[str, int] = defaultdict(int)
+        self.phase_times: Dict[str, float] = defaultdict(float)
+        self.potential_calls: Dict[tuple, int] = defaultdict(int)  # (potential class, method) -> calls
+        self.potential_points: Dict[tuple, int] = defaultdict(int)  # (potential class, method) -> evaluated positions
+
+    def timed(self, phase: str, function: Callable) -> Callable:
+        """
+            timed
+                wraps a function, such that its calls and time are added to the given phase.
+
+        Parameters
+        ----------
+        phase: str
+            name of the phase
+        function: Callable
+            function to time
+
+        Returns
+        -------
+        Callable
+            the timed function
+        """
+        phase_calls = self.phase_calls
+        phase_times = self.phase_times
+        perf_counter = time.perf_counter
+
+        def timed_function(*args, **kwargs):
+            start = perf_counter()
+            result = function(*args, **kwargs)
+            phase_times[phase] += perf_counter() - start
+            phase_calls[phase] += 1
+            return result
+
+        return timed_function
+
+    def count_potential(self, potential: potentialCls) -> List[tuple]:
+        """
+            count_potential
+                wraps the ene and force functions of the potential and its sub-potentials, such that the calls and
+                evaluated positions are counted. The wrappers are removed again with uncount_potential.
+
+        Parameters
+        ----------
+        potential: potentialCls
+            potential to count
+
+        Returns
+        -------
+        List[tuple]
+            the wrapped potentials and their previous instance functions, needed by uncount_potential
+        """
+        wrapped = []
+        for counted_potential in self._potentials(potential):
+            originals = {method: counted_potential.__dict__.get(method) for method in self._potential_methods}
+            for method in self._potential_methods:
+                # written to __dict__, such that the parameter version (and the energy cache) is not changed
+                counted_potential.__dict__[method] = self._counted(counted_potential, method)
+            wrapped.append((counted_potential, originals))
+        return wrapped
+
+    @staticmethod
+    def uncount_potential(wrapped: List[tuple]):
+        """
+            uncount_potential
+                removes the wrappers of count_potential.
+
+        Parameters
+        ----------
+        wrapped: List[tuple]
+            return value of count_potential
+        """
+        for counted_potential, originals in wrapped:
+            for method, original in originals.items():
+                if (original is None):
+                    del counted_potential.__dict__[method]
+                else:
+                    counted_potential.__dict__[method] = original
+
+    def merge(self, profiles: Iterable["simulationProfile"]) -> "simulationProfile":
+        """
+            merge
+                adds the counts and times of the given profiles to this profile.
+
+        Parameters
+        ----------
+        profiles: Iterable[simulationProfile]
+            profiles to add
+
+        Returns
+        -------
+        simulationProfile
+            this profile
+        """
+        for profile in profiles:
+            for target, source in ((self.phase_calls, profile.phase_calls), (self.phase_times, profile.phase_times),
+                                   (self.potential_calls, profile.potential_calls),
+                                   (self.potential_points, profile.potential_points)):
+                for key, value in source.items():
+                    target[key] += value
+        return self
+
+    def report(self) -> pd.DataFrame:
+        """
+            report
+                the profile as a table with one row per phase and per potential class and function.
+
+        Returns
+        -------
+        pd.DataFrame
+            columns: kind ("phase" or "potential"), name, calls, points, total_time and mean_time. The potential
+            evaluations have no time, as they are part of the phases.
+        """
+        rows = [{"kind": "phase", "name": phase, "calls": calls, "points": np.nan,
+                 "total_time": self.phase_times[phase], "mean_time": self.phase_times[phase] / calls}
+                for phase, calls in self.phase_calls.items()]
+        rows += [{"kind": "potential", "name": potential_name + "." + method, "calls": calls,
+                  "points": self.potential_points[(potential_name, method)], "total_time": np.nan, "mean_time": np.nan}
+                 for (potential_name, method), calls in self.potential_calls.items()]
+        return pd.DataFrame(rows, columns=["kind", "name", "calls", "points", "total_time", "mean_time"])
+
+    def _counted(self, potential: potentialCls, method: str) -> Callable:
+        function = getattr(potential, method)
+        key = (potential.__class__.__name__, method)
+        potential_calls = self.potential_calls
+        potential_points = self.potential_points
+        nDimensions = potential.constants.get(potential.nDimensions, 1)
+
+        def counted_function(positions, *args, **kwargs):
+            potential_calls[key] += 1
+            potential_points[key] += self._n_points(positions, nDimensions)
+            return function(positions, *args, **kwargs)
+
+        return counted_function
+
+    @staticmethod
+    def _n_points(positions, nDimensions: int) -> int:
+        # a point is one position of the potential, e.g. a float in 1D or a vector of nDimensions in ND
+        size = np.size(positions)
+        if (nDimensions is None or nDimensions <= 1):
+            return size
+        elif (np.ndim(positions) <= 1):
+            return 1
+        return max(1, size // nDimensions)
+
+    @staticmethod
+    def _potentials(potential: potentialCls) -> List[potentialCls]:
+        # the potential and its sub-potentials (e.g. of composite or enveloped potentials), each only once
+        from ensembler.potentials._basicPotentials import _potentialCls
+        potentials = [potential]
+        for value in potential.__dict__.values():
+            if (isinstance(value, _potentialCls)):
+                potentials += simulationProfile._potentials(value)
+            elif (isinstance(value, (list, tuple)) and len(value) > 0 and isinstance(value[0], _potentialCls)):
+                for sub_potential in value:
+                    potentials += simulationProfile._potentials(sub_potential)
+        unique = []
+        for sub_potential in potentials:
+            if (not any(sub_potential is known for known in unique)):
+                unique.append(sub_potential)
+        return unique
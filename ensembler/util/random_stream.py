@@ -0,0 +1,166 @@
+"""
+Module: random_stream
+    This module provides the random number streams of the systems and ensembles. Each stream owns a numpy Generator
+    and pre-generates the random numbers in blocks, which are consumed by index. Thereby, the samplers and conditions
+    do not need to call the random number generator in every step and the simulations of different systems
+    (e.g. replicas in a process pool) are reproducible and independent of each other.
+"""
+import numpy as np
+
+from ensembler.util.ensemblerTypes import Dict, List, Tuple, Union
+
+
+class randomStream:
+    """
+    A stream of random numbers, drawn in blocks from a numpy Generator. Streams for parallel simulations should be
+    created with spawn, which uses the SeedSequence of the stream to generate independent child streams.
+    """
+    _kinds: Tuple[str] = ("random", "normal")
+
+    def __init__(self, seed: Union[int, np.random.SeedSequence] = None, block_size: int = 1024):
+        """
+            __init__
+                constructs a random number stream.
+
+        Parameters
+        ----------
+        seed: Union[int, np.random.SeedSequence], optional
+            seed of the stream. If None, the seed is drawn from the global numpy random state, such that
+            np.random.seed still gives reproducible simulations. (default: None)
+        block_size: int, optional
+            number of random numbers, that are generated at once for each distribution. (default: 1024)
+        """
+        if (block_size < 1):
+            raise ValueError("randomStream: the block size needs to be at least 1. Got: " + str(block_size))
+
+        if (isinstance(seed, np.random.SeedSequence)):
+            self.seed_sequence = seed
+        elif (seed is None):
+            self.seed_sequence = np.random.SeedSequence(np.random.randint(0, 2 ** 32, size=4))
+        else:
+            self.seed_sequence = np.random.SeedSequence(seed)
+        self.generator = np.random.default_rng(self.seed_sequence)
+        self.block_size = block_size
+
+        self._blocks = {kind: np.zeros(0) for kind in self._kinds}
+        self._block_states = {kind: None for kind in self._kinds}  # generator states before the current blocks
+        self._indices = {kind: 0 for kind in self._kinds}
+
+    def random(self, size: Union[int, Tuple[int, ...]] = None) -> Union[float, np.array]:
+        """
+            random
+                uniformly distributed random numbers in [0, 1).
+
+        Parameters
+        ----------
+        size: Union[int, Tuple[int, ...]], optional
+            shape of the random numbers, a single number if None. (default: None)
+
+        Returns
+        -------
+        Union[float, np.array]
+            random numbers
+        """
+        return self._draw("random", size)
+
+    def normal(self, size: Union[int, Tuple[int, ...]] = None) -> Union[float, np.array]:
+        """
+            normal
+                standard normal distributed random numbers.
+
+        Parameters
+        ----------
+        size: Union[int, Tuple[int, ...]], optional
+            shape of the random numbers, a single number if None. (default: None)
+
+        Returns
+        -------
+        Union[float, np.array]
+            random numbers
+        """
+        return self._draw("normal", size)
+
+    def spawn(self, n_streams: int) -> List["randomStream"]:
+        """
+            spawn
+                generates independent child streams, e.g. for the replicas of an ensemble.
+
+        Parameters
+        ----------
+        n_streams: int
+            number of child streams
+
+        Returns
+        -------
+        List[randomStream]
+            the child streams
+        """
+        return [randomStream(seed=seed_sequence, block_size=self.block_size) for seed_sequence in
+                self.seed_sequence.spawn(n_streams)]
+
+    def get_state(self) -> Dict:
+        """
+            get_state
+                the state of the stream, used for checkpoints. Instead of the blocks, the generator states, from
+                which the blocks were drawn, are stored.
+
+        Returns
+        -------
+        Dict
+            state of the stream
+        """
+        return {"generator": self.generator.bit_generator.state,
+                "block_states": dict(self._block_states),
+                "block_lengths": {kind: len(block) for kind, block in self._blocks.items()},
+                "indices": dict(self._indices)}
+
+    def set_state(self, state: Dict):
+        """
+            set_state
+                restores the state returned by get_state.
+
+        Parameters
+        ----------
+        state: Dict
+            state of the stream
+        """
+        for kind in self._kinds:
+            if (state["block_states"][kind] is None):
+                self._blocks[kind] = np.zeros(0)
+            else:
+                self.generator.bit_generator.state = state["block_states"][kind]
+                self._blocks[kind] = self._generate(kind, state["block_lengths"][kind])
+            self._block_states[kind] = state["block_states"][kind]
+            self._indices[kind] = state["indices"][kind]
+        self.generator.bit_generator.state = state["generator"]
+
+    def _generate(self, kind: str, n: int) -> np.array:
+        if (kind == "normal"):
+            return self.generator.standard_normal(n)
+        return self.generator.random(n)
+
+    def _draw(self, kind: str, size: Union[int, Tuple[int, ...]]) -> Union[float, np.array]:
+        # this is called in each step, therefore numpy calls are avoided for the small sizes
+        if (size is None):
+            n = 1
+        elif (isinstance(size, int)):
+            n = size
+        else:
+            n = 1
+            for dimension in size:
+                n *= dimension
+
+        index = self._indices[kind]
+        block = self._blocks[kind]
+        if (index + n > len(block)):
+            # the rest of the current block is dropped, so that each block is drawn from one generator state
+            self._block_states[kind] = self.generator.bit_generator.state
+            block = self._blocks[kind] = self._generate(kind, max(self.block_size, n))
+            index = 0
+        self._indices[kind] = index + n
+
+        if (size is None):
+            return block[index]
+        elif (isinstance(size, int)):
+            return block[index:index + n].copy()
+        return block[index:index + n].reshape(size).copy()
@@ -0,0 +1,140 @@
+"""
+Module: trajectory_retention
+    This module provides the trajectory containers of the systems. They are lists of the saved states, which decide on
+    append, which states are kept. Except for "all", the memory is bounded by the given number of frames, independent
+    of the length of the simulation.
+
+    all:        keep all saved states (default).
+    none:       keep only the last saved state.
+    last:       keep the last n_frames saved states (ring buffer).
+    stride:     keep at most n_frames evenly spaced states. If the buffer is full, every second state is dropped and
+                the stride is doubled.
+    reservoir:  keep a uniform random subsample of n_frames states (reservoir sampling).
+"""
+from ensembler.util.random_stream import randomStream
+from ensembler.util.ensemblerTypes import Dict, Iterable
+
+
+def _rebuild_retention(retention_class: type, states: list, attributes: Dict) -> "allRetention":
+    # copies and pickles are rebuilt without append, which would count and sample the states again
+    retention = retention_class.__new__(retention_class)
+    list.extend(retention, states)
+    retention.__dict__.update(attributes)
+    return retention
+
+
+class allRetention(list):
+    """
+    Keeps all saved states. The retention classes count the offered states in n_offered.
+    """
+    policy: str = "all"
+
+    def __init__(self, n_frames: int = None, rng: randomStream = None):
+        """
+            __init__
+
+        Parameters
+        ----------
+        n_frames: int, optional
+            maximal number of kept states, not used by all and none. (default: None)
+        rng: randomStream, optional
+            random stream, only used by reservoir. (default: None)
+        """
+        super().__init__()
+        self.n_frames = n_frames
+        self.n_offered = 0
+
+    def __reduce__(self):
+        return (_rebuild_retention, (self.__class__, list(self), self.__dict__))
+
+    def append(self, state):
+        self.n_offered += 1
+        super().append(state)
+
+    def extend(self, states: Iterable):
+        for state in states:
+            self.append(state)
+
+
+class noRetention(allRetention):
+    """
+    Keeps only the last saved state.
+    """
+    policy: str = "none"
+
+    def append(self, state):
+        self.n_offered += 1
+        if (len(self) > 0):
+            self[0] = state
+            del self[1:]
+        else:
+            list.append(self, state)
+
+
+class _boundedRetention(allRetention):
+    def __init__(self, n_frames: int = None, rng: randomStream = None):
+        if (n_frames is None or n_frames < 1):
+            raise ValueError("The trajectory retention " + self.policy + " needs n_frames of at least 1. Got: " +
+                             str(n_frames))
+        super().__init__(n_frames=n_frames, rng=rng)
+
+
+class lastRetention(_boundedRetention):
+    """
+    Keeps the last n_frames saved states.
+    """
+    policy: str = "last"
+
+    def append(self, state):
+        self.n_offered += 1
+        list.append(self, state)
+        if (len(self) > self.n_frames):
+            del self[0]
+
+
+class strideRetention(_boundedRetention):
+    """
+    Keeps at most n_frames states with a constant stride, starting with the first state. If the buffer is full, every
+    second state is dropped and the stride is doubled.
+    """
+    policy: str = "stride"
+
+    def __init__(self, n_frames: int = None, rng: randomStream = None):
+        super().__init__(n_frames=n_frames, rng=rng)
+        self.stride = 1
+
+    def append(self, state):
+        if (self.n_offered % self.stride == 0):
+            list.append(self, state)
+            if (len(self) > self.n_frames):
+                del self[1::2]
+                self.stride *= 2
+        self.n_offered += 1
+
+
+class reservoirRetention(_boundedRetention):
+    """
+    Keeps a uniform random subsample of n_frames states (reservoir sampling). The kept states stay in the order of
+    the simulation.
+    """
+    policy: str = "reservoir"
+
+    def __init__(self, n_frames: int = None, rng: randomStream = None):
+        super().__init__(n_frames=n_frames, rng=rng)
+        self.rng = randomStream() if (rng is None) else rng
+
+    def append(self, state):
+        self.n_offered += 1
+        if (len(self) < self.n_frames):
+            list.append(self, state)
+            return
+
+        # the new state replaces a kept state with probability n_frames/n_offered
+        index = int(self.rng.random() * self.n_offered)
+        if (index < self.n_frames):
+            del self[index]
+            list.append(self, state)
+
+
+retention_policies: Dict[str, type] = {retention.policy: retention for retention in
+                                       [allRetention, noRetention, lastRetention, strideRetention, reservoirRetention]}